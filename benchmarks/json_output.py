@@ -0,0 +1,81 @@
+"""
+Serialization time and payload size of large JSON API responses.
+
+Serializes synthetic expense lists like the ones returned by the month
+list and search endpoints with Flask's default provider (stdlib json) and
+with OrjsonProvider, then compresses them as compress_response would,
+printing median times and sizes.
+
+    python benchmarks/json_output.py [--rows 1000,10000,100000] [--repeat N]
+"""
+import os
+import sys
+import gzip
+import time
+import random
+import argparse
+import statistics
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from src.utils import http_output
+from src.utils.http_output import OrjsonProvider
+
+NAMES = ["Żabka", "Biedronka zakupy", "Lidl", "Orlen paliwo", "Bilet ZTM", "Apteka Gemini",
+         "Netflix", "Spotify", "Restauracja Pod Lipą", "Kawiarnia", "Rossmann", "Allegro zamówienie"]
+CATEGORIES = ["Jedzenie", "Transport", "Zdrowie", "Rozrywka", "Rachunki", "Inne"]
+
+
+def make_expenses(rows: int, seed: int = 0):
+    rng = random.Random(seed)
+    return {"expenses": [{
+        "id": i,
+        "name": f"{rng.choice(NAMES)} {rng.randint(1, 500)}",
+        "currency": "PLN",
+        "amount": round(rng.uniform(1, 500), 2),
+        "category": rng.choice(CATEGORIES),
+        "date": f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+        "note": rng.choice(["", "karta", "gotówka", "przelew"])
+    } for i in range(1, rows + 1)]}
+
+
+def median_ms(function, repeat: int):
+    timings, result = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000, result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', default="1000,10000,100000", help="Comma-separated list sizes")
+    parser.add_argument('--repeat', type=int, default=10, help="Runs per measurement (default: 10)")
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    stdlib = DefaultJSONProvider(app)
+    fast = OrjsonProvider(app)
+    print(f"orjson: {'yes' if http_output.orjson else 'no (fallback)'}, "
+          f"brotli: {'yes' if http_output.brotli else 'no'}")
+
+    print(f"{'rows':>7} {'json (ms)':>10} {'orjson (ms)':>12} {'raw (KB)':>9} "
+          f"{'gzip (ms)':>10} {'gzip (KB)':>10} {'br (ms)':>8} {'br (KB)':>8}")
+    for rows in (int(value) for value in args.rows.split(",")):
+        payload = make_expenses(rows)
+        slow_ms, _ = median_ms(lambda: stdlib.dumps(payload, separators=(",", ":")).encode("utf-8"), args.repeat)
+        fast_ms, body = median_ms(lambda: fast.dumps_bytes(payload), args.repeat)
+        gzip_ms, gzipped = median_ms(
+            lambda: gzip.compress(body, compresslevel=http_output.COMPRESS_GZIP_LEVEL, mtime=0), args.repeat)
+        if http_output.brotli is not None:
+            br_ms, compressed = median_ms(
+                lambda: http_output.brotli.compress(body, quality=http_output.COMPRESS_BROTLI_QUALITY), args.repeat)
+            br = f"{br_ms:>8.1f} {len(compressed) / 1024:>8.0f}"
+        else:
+            br = f"{'-':>8} {'-':>8}"
+        print(f"{rows:>7} {slow_ms:>10.1f} {fast_ms:>12.1f} {len(body) / 1024:>9.0f} "
+              f"{gzip_ms:>10.1f} {len(gzipped) / 1024:>10.0f} {br}")
@@ -0,0 +1,78 @@
+"""
+Per-report latency of the monthly PDF renderer.
+
+Renders synthetic months with 10, 1 000 and 10 000 expense rows and prints
+the median latency of the full detail tables, of the same tables with fpdf's
+plain list of used characters instead of CharSubset, and of the per-day and
+per-category subtotals a month above REPORT_DETAIL_THRESHOLD gets instead.
+
+    python benchmarks/pdf_render.py [--repeat N]
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import statistics
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils import generate_pdf as gp
+
+ROW_COUNTS = (10, 1000, 10000)
+CATEGORIES = ["Transport", "Zdrowie", "Jedzenie", "Zakupy", "Rozrywka", "Rachunki"]
+
+
+def make_month(rows: int, seed: int = 0):
+    rng = random.Random(seed)
+    spending = [{
+        'id': i,
+        'name': f"Żabka zakupy {i}",
+        'currency': "PLN",
+        'amount': round(rng.uniform(1, 500), 2),
+        'category': rng.choice(CATEGORIES),
+        'date': f"2025-04-{rng.randint(1, 30):02d}",
+        'note': ""
+    } for i in range(rows)]
+    income = [{'id': 1, 'currency': "PLN", 'amount': 8000.0, 'date': "2025-04-10", 'note': "wypłata"}]
+    return spending, income
+
+
+def render(spending, income, detail_threshold: int) -> int:
+    pdf = gp.render_monthly_report(4, 2025, spending, income, detail_threshold=detail_threshold)
+    return len(pdf.output(dest='S'))
+
+
+def measure(rows: int, repeat: int, detailed: bool = True, char_subset: bool = True) -> float:
+    spending, income = make_month(rows)
+    # Every row in detail tables, or subtotals for any month with more than one row
+    detail_threshold = rows if detailed else 1
+    timings = []
+    subset_class = gp.CharSubset
+    if not char_subset:
+        gp.CharSubset = list
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            render(spending, income, detail_threshold)
+            timings.append(time.perf_counter() - start)
+    finally:
+        gp.CharSubset = subset_class
+    return statistics.median(timings)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5, help="Renders per measurement (default: 5)")
+    args = parser.parse_args()
+
+    # Warm up imports and the fpdf .pkl metric cache on disk
+    render(*make_month(1), detail_threshold=1)
+
+    print(f"{'rows':>8} {'details (ms)':>14} {'details, list subset (ms)':>26} {'subtotals (ms)':>15}")
+    for rows in ROW_COUNTS:
+        repeat = args.repeat if rows < 10000 else max(1, args.repeat // 2)
+        details = measure(rows, repeat) * 1000
+        list_subset = measure(rows, repeat, char_subset=False) * 1000
+        subtotals = measure(rows, repeat, detailed=False) * 1000
+        print(f"{rows:>8} {details:>14.1f} {list_subset:>26.1f} {subtotals:>15.1f}")
@@ -0,0 +1,78 @@
+"""
+Latency of full-text expense search.
+
+Builds a synthetic history of 100 000 expenses for a user that exists only
+in memory, then prints the one-off index build time and the median latency
+of typical queries, compared with a linear scan over all records.
+
+    python benchmarks/search.py [--rows N] [--repeat N]
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import statistics
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.repositories import finance_repository as fr
+from src.repositories import categories_repository as cr
+from src.utils.text_index import fold_text
+
+USER_ID = 999999
+NAMES = ["Żabka", "Biedronka zakupy", "Lidl", "Orlen paliwo", "Bilet ZTM", "Apteka Gemini",
+         "Netflix", "Spotify", "Restauracja Pod Lipą", "Kawiarnia", "Rossmann", "Allegro zamówienie"]
+QUERIES = ["zabka", "zak", "paliwo orlen", "restauracja lipa", "xyz"]
+
+
+def make_history(rows: int, seed: int = 0):
+    rng = random.Random(seed)
+    return [{
+        "id": i,
+        "name": f"{rng.choice(NAMES)} {rng.randint(1, 500)}",
+        "currency": "PLN",
+        "amount": round(rng.uniform(1, 500), 2),
+        "categoryId": rng.randint(1, 10),
+        "date": f"{rng.randint(2020, 2025)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+        "note": rng.choice(["", "karta", "gotówka", "przelew"])
+    } for i in range(1, rows + 1)]
+
+
+def linear_search(rows, query):
+    words = fold_text(query).split()
+    return [row for row in rows
+            if all(word in fold_text(f"{row['name']} {row['note']}") for word in words)]
+
+
+def median_ms(function, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100000, help="Number of expenses (default: 100000)")
+    parser.add_argument('--repeat', type=int, default=20, help="Runs per query (default: 20)")
+    args = parser.parse_args()
+
+    # The synthetic user gets default categories on first use; keep them out of data/
+    cr.save_categories_data = lambda: None
+
+    rows = make_history(args.rows)
+    fr.finance_data["users"][str(USER_ID)] = {"spending": rows, "incomes": []}
+
+    start = time.perf_counter()
+    fr._get_text_index(USER_ID)
+    print(f"index build: {(time.perf_counter() - start) * 1000:.0f} ms for {len(rows)} rows")
+
+    print(f"{'query':>20} {'hits':>7} {'index (ms)':>11} {'scan (ms)':>10}")
+    for query in QUERIES:
+        hits = len(fr.search_spending(query, USER_ID))
+        indexed = median_ms(lambda: fr.search_spending(query, USER_ID, limit=100), args.repeat)
+        scan = median_ms(lambda: linear_search(rows, query), max(1, args.repeat // 10))
+        print(f"{query:>20} {hits:>7} {indexed:>11.2f} {scan:>10.1f}")
@@ -9,7 +9,7 @@ sys.dont_write_bytecode = True
 sys.path.append(os.path.abspath(os.path.dirname(__file__)))
 
 import webview
-from src.server import app
+from src.serve import run_server
 
 # Configure logging
 logging.basicConfig(
@@ -23,9 +23,10 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 def start_server():
-    """Start the Flask server with error handling"""
+    """Start the API server for the desktop window with error handling"""
     try:
-        app.run(port=5000, debug=True, use_reloader=False)
+        # Only the local window uses it; run python -m src.serve to share the API
+        run_server(host="127.0.0.1", port=5000)
     except Exception as e:
         logger.error(f"Server failed to start: {e}")
         sys.exit(1)
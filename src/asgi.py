@@ -0,0 +1,355 @@
+"""
+ASGI entry point: src.asgi:application.
+
+Serve it with an ASGI server in a single worker process, e.g.
+"python -m src.serve --asgi" or "uvicorn --workers 1 src.asgi:application";
+see src/serve.py for why the data cannot be shared between processes.
+
+The endpoints that spend their time waiting run as coroutines on the event
+loop and await their blocking work on executors, so a waiting request holds
+no thread:
+
+- POST /api/login: the bcrypt check is awaited on the password pool of
+  users_repository;
+- GET /api/reports/<year>/<month>/pdf: the report's data is read on the
+  request pool and the PDF rendered on the render pool;
+- GET /api/events: events are handed to the loop, so an open stream holds
+  no thread and up to EVENTS_MAX_ASYNC_STREAMS dashboards can stay
+  connected.
+
+They answer like the Flask views of the same URLs and share their rate
+limits. Every other request is passed to the Flask app, which runs on the
+request pool (ASGI_THREADS).
+"""
+import os
+import re
+import sys
+import json
+import math
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from tempfile import SpooledTemporaryFile
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from asgiref.wsgi import WsgiToAsgiInstance
+from werkzeug.datastructures import Headers
+from werkzeug.http import parse_etags, quote_etag
+
+from src.server import app
+from src.repositories.users_repository import get_user_by_login, submit_check_password
+from src.repositories.session_manager import get_current_user_id, login_user, issue_token, verify_token, TOKEN_TTL_SECONDS
+from src.utils.event_stream import open_async_stream, RECONNECT_MILLISECONDS
+from src.utils.rate_limit import RequestLimit, auth_limit, report_limit
+from src.utils.generate_pdf import report_sources, monthly_report_version, render_monthly_report, pdf_to_bytes
+
+# Configure logger
+logger = logging.getLogger(__name__)
+
+# Constants
+ASGI_THREADS = int(os.environ.get("ASGI_THREADS", "8"))
+ASGI_RENDER_WORKERS = int(os.environ.get("ASGI_RENDER_WORKERS", "2"))
+MAX_BODY_BYTES = 64 * 1024
+
+_request_executor = ThreadPoolExecutor(max_workers=ASGI_THREADS, thread_name_prefix="asgi-request")
+_render_executor = ThreadPoolExecutor(max_workers=ASGI_RENDER_WORKERS, thread_name_prefix="asgi-render")
+
+Send = Callable[[Dict], Awaitable[None]]
+Receive = Callable[[], Awaitable[Dict]]
+
+
+class Request:
+    """
+    The parts of an ASGI HTTP request the native endpoints use.
+    """
+
+    def __init__(self, scope: Dict, receive: Receive):
+        self.scope = scope
+        self.receive = receive
+        self.method = scope["method"]
+        self.path = scope["path"]
+        self.headers = Headers([(name.decode("latin-1"), value.decode("latin-1"))
+                                for name, value in scope.get("headers", [])])
+        self.args = {key: values[0] for key, values in
+                     parse_qs(scope.get("query_string", b"").decode("latin-1")).items()}
+        self.token_user_id: Optional[int] = None
+
+    def bearer_token(self) -> Optional[str]:
+        auth = self.headers.get("Authorization", "")
+        if auth.startswith("Bearer "):
+            return auth[len("Bearer "):].strip()
+        return None
+
+    def user_id(self) -> int:
+        """
+        User of the request's session token, or the current session user.
+        """
+        return self.token_user_id if self.token_user_id is not None else get_current_user_id()
+
+    def client_key(self) -> str:
+        """
+        Rate limit key, as rate_limit.client_key() computes it for Flask.
+        """
+        if self.token_user_id is not None:
+            return f"user:{self.token_user_id}"
+        client = self.scope.get("client")
+        return f"ip:{client[0] if client else None}"
+
+    async def json(self) -> Any:
+        """
+        Read the body as JSON.
+
+        Raises:
+            ValueError: If the body is too large or not valid JSON
+        """
+        body = b""
+        while True:
+            message = await self.receive()
+            if message["type"] != "http.request":
+                raise ValueError("Client disconnected")
+            body += message.get("body", b"")
+            if len(body) > MAX_BODY_BYTES:
+                raise ValueError("Request body too large")
+            if not message.get("more_body"):
+                break
+        return json.loads(body)
+
+
+async def send_response(send: Send, status: int, body: bytes = b"",
+                        headers: Optional[List[Tuple[str, str]]] = None) -> None:
+    """
+    Send a complete response.
+    """
+    headers = list(headers or [])
+    headers.append(("Content-Length", str(len(body))))
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in headers]
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+async def send_json(send: Send, payload: Any, status: int = 200,
+                    headers: Optional[List[Tuple[str, str]]] = None) -> None:
+    """
+    Send a JSON response, serialized by the Flask app's JSON provider.
+    """
+    body = app.json.dumps(payload).encode("utf-8")
+    await send_response(send, status, body, [("Content-Type", "application/json")] + list(headers or []))
+
+
+async def run_limited(limit: RequestLimit, request: Request, send: Send,
+                      handler: Callable[[], Awaitable[None]]) -> None:
+    """
+    Run a handler if the limit admits the request, otherwise answer 429.
+    """
+    refused = limit.acquire(request.client_key())
+    if refused is not None:
+        wait, message = refused
+        await send_json(send, {"success": False, "message": message}, 429,
+                        [("Retry-After", str(max(1, math.ceil(wait))))])
+        return
+    try:
+        await handler()
+    finally:
+        limit.release()
+
+
+async def login(request: Request, send: Send) -> None:
+    """Log in; the bcrypt check is awaited on the password pool"""
+    try:
+        data = await request.json()
+        logger.info(f"Login attempt for user: {data.get('login', 'unknown')}")
+        username = data['login']
+        password = data['password']
+
+        user = get_user_by_login(username)
+        valid = user is not None and await asyncio.wrap_future(submit_check_password(password, user['password']))
+        if not valid:
+            logger.warning(f"Login failed for user '{username}'")
+            await send_json(send, {'success': False, 'error': 'Invalid username or password'}, 401)
+            return
+
+        user_id = user.get('user_id', 1)
+        login_user(user_id)
+        await send_json(send, {'success': True, 'token': issue_token(user_id), 'expires_in': TOKEN_TTL_SECONDS})
+    except Exception as e:
+        logger.error(f"Login error: {e}")
+        await send_json(send, {'success': False, 'error': str(e)}, 500)
+
+
+async def stream_report(request: Request, send: Send, year: int, month: int) -> None:
+    """
+    Render a monthly report on the render pool and return it directly, with
+    the same ETag and 304 handling as the Flask view
+    """
+    loop = asyncio.get_running_loop()
+    try:
+        if not 1 <= month <= 12:
+            raise ValueError("Invalid month")
+
+        user_id = request.user_id()
+        spending, income = report_sources(month, year, user_id)
+        # Computing the version reads the month's rows (and materializes due recurring ones)
+        version = await loop.run_in_executor(_request_executor, monthly_report_version, month, year, spending, income)
+        etag = ("ETag", quote_etag(version))
+
+        if parse_etags(request.headers.get("If-None-Match")).contains(version):
+            await send_response(send, 304, headers=[etag])
+            return
+
+        content = await loop.run_in_executor(
+            _render_executor, lambda: pdf_to_bytes(render_monthly_report(month, year, spending, income))
+        )
+        await send_response(send, 200, content, [
+            ("Content-Type", "application/pdf"),
+            etag,
+            ("Cache-Control", "private, no-cache"),
+            ("Content-Disposition", f"attachment; filename=raport_budzetowy_{month}_{year}_user{user_id}.pdf")
+        ])
+    except ValueError as e:
+        await send_json(send, {"success": False, "message": str(e)}, 400)
+    except Exception as e:
+        logger.error(f"Error streaming report: {e}")
+        await send_json(send, {"success": False, "message": str(e)}, 500)
+
+
+async def stream_events(request: Request, send: Send) -> None:
+    """
+    Stream the user's changes as server-sent events, as GET /api/events of
+    the Flask app does, without holding a thread
+    """
+    user_id = request.user_id()
+    token = request.args.get('token')
+    if token is not None:
+        user_id = verify_token(token)
+        if user_id is None:
+            await send_json(send, {'success': False, 'error': 'Invalid or expired token'}, 401)
+            return
+
+    stream = open_async_stream(user_id)
+    if stream is None:
+        await send_json(send, {"success": False, "message": "Too many open event streams"}, 503,
+                        [("Retry-After", str(RECONNECT_MILLISECONDS // 1000))])
+        return
+
+    async def close_on_disconnect() -> None:
+        while (await request.receive())["type"] != "http.disconnect":
+            pass
+        stream.close()
+
+    watcher = asyncio.ensure_future(close_on_disconnect())
+    try:
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [(b"content-type", b"text/event-stream; charset=utf-8"),
+                        (b"cache-control", b"no-cache"),
+                        (b"x-accel-buffering", b"no")]
+        })
+        async for message in stream:
+            await send({"type": "http.response.body", "body": message.encode("utf-8"), "more_body": True})
+        await send({"type": "http.response.body", "body": b""})
+    finally:
+        watcher.cancel()
+        stream.close()
+
+
+class WsgiInstance(WsgiToAsgiInstance):
+    """
+    asgiref's WSGI adapter for one request, run on the request pool.
+
+    WsgiToAsgi runs all WSGI calls on a single shared thread, which would
+    serialize every Flask request; the app is served by several threads
+    under WSGI as well, so the requests run on _request_executor instead.
+    The response iterable is closed afterwards, as WSGI servers do.
+    """
+
+    async def __call__(self, scope: Dict, receive: Receive, send: Send) -> None:
+        self.scope = scope
+        loop = asyncio.get_running_loop()
+        with SpooledTemporaryFile(max_size=65536) as body:
+            while True:
+                message = await receive()
+                if message["type"] != "http.request":
+                    return
+                body.write(message.get("body", b""))
+                if not message.get("more_body"):
+                    break
+            body.seek(0)
+            self.sync_send = lambda message: asyncio.run_coroutine_threadsafe(send(message), loop).result()
+            await loop.run_in_executor(_request_executor, self.run_wsgi, body)
+
+    def run_wsgi(self, body) -> None:
+        output = self.wsgi_application(self.build_environ(self.scope, body), self.start_response)
+        try:
+            for chunk in output:
+                if not self.response_started:
+                    self.response_started = True
+                    self.sync_send(self.response_start)
+                if chunk:
+                    self.sync_send({"type": "http.response.body", "body": chunk, "more_body": True})
+        finally:
+            if hasattr(output, "close"):
+                output.close()
+        if not self.response_started:
+            self.response_started = True
+            self.sync_send(self.response_start)
+        self.sync_send({"type": "http.response.body"})
+
+
+_REPORT_PDF = re.compile(r"^/api/reports/(\d+)/(\d+)/pdf$")
+
+
+async def dispatch(request: Request, send: Send) -> bool:
+    """
+    Handle a request with a native endpoint.
+
+    Returns:
+        bool: False if no native endpoint serves the request
+    """
+    if request.method == "POST" and request.path == "/api/login":
+        await run_limited(auth_limit, request, send, lambda: login(request, send))
+        return True
+    if request.method == "GET" and request.path == "/api/events":
+        await stream_events(request, send)
+        return True
+    match = _REPORT_PDF.match(request.path)
+    if request.method == "GET" and match:
+        year, month = int(match.group(1)), int(match.group(2))
+        await run_limited(report_limit, request, send, lambda: stream_report(request, send, year, month))
+        return True
+    return False
+
+
+async def application(scope: Dict, receive: Receive, send: Send) -> None:
+    """
+    ASGI application.
+    """
+    if scope["type"] == "lifespan":
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+    if scope["type"] != "http":
+        return
+
+    request = Request(scope, receive)
+    token = request.bearer_token()
+    if token is not None:
+        # Same check as the Flask app's authenticate_token
+        request.token_user_id = verify_token(token)
+        if request.token_user_id is None:
+            await send_json(send, {'success': False, 'error': 'Invalid or expired token'}, 401)
+            return
+
+    if not await dispatch(request, send):
+        await WsgiInstance(app)(scope, receive, send)
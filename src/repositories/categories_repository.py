@@ -1,6 +1,9 @@
 import json
 import os
-from typing import List, Dict, Optional, Union
+import time
+from typing import Callable, List, Dict, Optional, Set, Tuple
+
+from src.utils.event_hub import publish
 
 # Constants
 CATEGORIES_PATH = "data/user_categories.json"
@@ -20,6 +23,20 @@ except (json.JSONDecodeError, FileNotFoundError) as e:
     print(f"Error loading categories data: {e}")
     categories_data = {"users": {}}
 
+# Per-user lookup indexes over the category lists, keyed by user ID string
+_category_indexes: Dict[str, Dict] = {}
+
+# Per-user counters bumped on every category change, for downstream caches
+_categories_versions: Dict[str, int] = {}
+
+# Per-user times of the last category change; categories unchanged since
+# loading were last modified when the file was written
+_categories_modified: Dict[str, float] = {}
+_loaded_modified = os.path.getmtime(CATEGORIES_PATH)
+
+# Callbacks notified with (old_name, new_name, user_id) when a category is renamed
+_rename_listeners: List[Callable[[str, str, int], None]] = []
+
 def save_categories_data() -> None:
     """
     Save categories data to the JSON file.
@@ -74,11 +91,170 @@ def get_user_categories_data(user_id: int) -> Dict:
                 {"id": 8, "name": "Rachunki"},
                 {"id": 9, "name": "Inne"},
                 {"id": 10, "name": "Wspólne"}
-            ]
+            ],
+            "next_category_id": 11
         }
         save_categories_data()
     return categories_data["users"][user_id_str]
 
+def _get_category_index(user_id: int) -> Dict:
+    """
+    Get the lookup index of a user's categories, building it if needed.
+    
+    The index is rebuilt when the underlying list was replaced or changed
+    size behind the repository's back.
+    
+    Args:
+        user_id: User identifier
+        
+    Returns:
+        Dictionary with 'by_id' and 'by_name' category lookups, and the
+        'ancestors' table (category ID -> IDs from itself up to its root)
+    """
+    categories = get_user_categories_data(user_id)['categories']
+    index = _category_indexes.get(str(user_id))
+    if index is None or index['categories'] is not categories or index['size'] != len(categories):
+        index = {'categories': categories, 'size': len(categories), 'by_id': {}, 'by_name': {}, 'ancestors': {}}
+        # The first category wins on duplicates, as with the former linear scans
+        for category in categories:
+            index['by_id'].setdefault(category['id'], category)
+            index['by_name'].setdefault(category['name'], category)
+        for id in index['by_id']:
+            index['ancestors'][id] = _ancestor_chain(id, index['by_id'])
+        _category_indexes[str(user_id)] = index
+    return index
+
+def _ancestor_chain(id: int, by_id: Dict[int, Dict]) -> Tuple[int, ...]:
+    """
+    Walk up the parents of a category.
+    
+    Parents that no longer exist end the chain, and so does a cycle in
+    hand-edited data.
+    
+    Args:
+        id: Category ID
+        by_id: Categories by ID
+        
+    Returns:
+        IDs from the category itself up to its root
+    """
+    chain = [id]
+    parent_id = by_id[id].get('parentId')
+    while parent_id in by_id and parent_id not in chain:
+        chain.append(parent_id)
+        parent_id = by_id[parent_id].get('parentId')
+    return tuple(chain)
+
+def _reparent_children(removed_ids: Set[int], adopter_id: Optional[int], user_id: int) -> None:
+    """
+    Give the children of categories about to be removed a new parent.
+    
+    Children move to the adopter if given, otherwise to their closest
+    ancestor that stays. The adopter itself also moves up to its closest
+    remaining ancestor.
+    
+    Args:
+        removed_ids: IDs of the categories being removed
+        adopter_id: ID of the category taking over the children, if any
+        user_id: User identifier
+    """
+    index = _get_category_index(user_id)
+    for category in index['categories']:
+        if category['id'] in removed_ids or category.get('parentId') not in removed_ids:
+            continue
+        if adopter_id is not None and category['id'] != adopter_id:
+            parent_id = adopter_id
+        else:
+            parent_id = next((ancestor for ancestor in index['ancestors'][category['id']][1:]
+                              if ancestor not in removed_ids), None)
+        if parent_id is None:
+            category.pop('parentId', None)
+        else:
+            category['parentId'] = parent_id
+
+def _categories_changed(user_id: int) -> None:
+    """
+    Drop a user's category index, bump the categories version, save and
+    publish "categories.changed" after a mutation.
+    
+    Args:
+        user_id: User identifier
+    """
+    _category_indexes.pop(str(user_id), None)
+    _categories_versions[str(user_id)] = _categories_versions.get(str(user_id), 0) + 1
+    _categories_modified[str(user_id)] = time.time()
+    save_categories_data()
+    publish("categories.changed", {"user_id": int(user_id), "version": _categories_versions[str(user_id)]})
+
+def get_categories_version(user_id: int = 1) -> int:
+    """
+    Get the version of a user's categories.
+    
+    The version changes whenever a category of the user is added, removed
+    or renamed, so caches of data resolved against categories can tell
+    when they are stale.
+    
+    Args:
+        user_id: User identifier (default: 1)
+        
+    Returns:
+        Version counter of the user's categories
+    """
+    return _categories_versions.get(str(user_id), 0)
+
+def get_categories_last_modified(user_id: int = 1) -> float:
+    """
+    Get the time of the last change to a user's categories.
+    
+    Args:
+        user_id: User identifier (default: 1)
+        
+    Returns:
+        Unix time of the last change, or of the data file's last write if
+        the user's categories did not change since it was loaded
+    """
+    return _categories_modified.get(str(user_id), _loaded_modified)
+
+def on_category_renamed(listener: Callable[[str, str, int], None]) -> None:
+    """
+    Register a callback run after a category is renamed.
+    
+    Data that refers to categories by name (such as budgets) uses it to
+    follow renames.
+    
+    Args:
+        listener: Called with (old_name, new_name, user_id)
+    """
+    _rename_listeners.append(listener)
+
+def get_category_ancestors(id: int, user_id: int = 1) -> Tuple[int, ...]:
+    """
+    Get a category and its ancestors from the precomputed ancestor table.
+    
+    Args:
+        id: Category ID
+        user_id: User identifier (default: 1)
+        
+    Returns:
+        IDs from the category itself up to its root; just the given ID for
+        unknown categories
+    """
+    return _get_category_index(user_id)['ancestors'].get(id, (id,))
+
+def get_category_subtree(id: int, user_id: int = 1) -> List[int]:
+    """
+    Get the IDs of a category and all of its descendants.
+    
+    Args:
+        id: Category ID
+        user_id: User identifier (default: 1)
+        
+    Returns:
+        List of category IDs
+    """
+    ancestors = _get_category_index(user_id)['ancestors']
+    return [category_id for category_id, chain in ancestors.items() if id in chain]
+
 def get_all_categories(user_id: int = 1) -> List[Dict]:
     """
     Get all categories for a user.
@@ -103,12 +279,7 @@ def get_category_by_id(id: int, user_id: int = 1) -> Optional[Dict]:
     Returns:
         Category dictionary or None if not found
     """
-    user_data = get_user_categories_data(user_id)
-    categories = user_data['categories']
-    for category in categories:
-        if category['id'] == id:
-            return category
-    return None
+    return _get_category_index(user_id)['by_id'].get(id)
 
 def get_category_by_name(name: str, user_id: int = 1) -> Optional[Dict]:
     """
@@ -121,39 +292,111 @@ def get_category_by_name(name: str, user_id: int = 1) -> Optional[Dict]:
     Returns:
         Category dictionary or None if not found
     """
-    user_data = get_user_categories_data(user_id)
-    categories = user_data['categories']
-    for category in categories:
-        if category['name'] == name:
-            return category
-    return None
+    return _get_category_index(user_id)['by_name'].get(name)
+
+def _initial_category_id_sequence(user_id: int) -> int:
+    """
+    Compute the next free category ID of a user whose data was saved before
+    category IDs were sequenced.
+    
+    Expenses may still point to removed categories, so their IDs are never
+    handed out again either.
+    
+    Args:
+        user_id: User identifier
+        
+    Returns:
+        int: Next category ID
+    """
+    from src.repositories.finance_repository import finance_data
+    
+    used = [category['id'] for category in get_user_categories_data(user_id)['categories']]
+    spending = finance_data["users"].get(str(user_id), {}).get("spending", [])
+    used.extend(row['categoryId'] for row in spending if isinstance(row.get('categoryId'), int))
+    return max(used, default=0) + 1
+
+def _allocate_category_id(user_id: int) -> int:
+    """
+    Take the next ID from a user's persisted category ID sequence.
+    
+    IDs only ever increase, so a new category never takes over the expenses
+    of a removed one, which stay "Unknown". The sequence is saved together
+    with the categories.
+    
+    Args:
+        user_id: User identifier
+        
+    Returns:
+        int: New category ID
+    """
+    data = get_user_categories_data(user_id)
+    if "next_category_id" not in data:
+        data["next_category_id"] = _initial_category_id_sequence(user_id)
+    id = data["next_category_id"]
+    data["next_category_id"] = id + 1
+    return id
 
-def add_category(name: str, user_id: int = 1) -> int:
+def add_category(name: str, user_id: int = 1, parent_id: Optional[int] = None) -> int:
     """
     Add a new category.
     
     Args:
         name: Category name
         user_id: User identifier (default: 1)
+        parent_id: ID of the parent category (default: top-level category)
         
     Returns:
         ID of the newly created category
+        
+    Raises:
+        ValueError: If the parent category does not exist
     """
-    user_data = get_user_categories_data(user_id)
+    index = _get_category_index(user_id)
+    if parent_id is not None and parent_id not in index['by_id']:
+        raise ValueError(f"Parent category {parent_id} not found")
     
-    # Generate unique ID
-    id = 1
-    for category in user_data['categories']:
-        if category['id'] >= id:
-            id = category['id'] + 1
-            
-    user_data['categories'].append({'id': id, 'name': name})
-    save_categories_data()
+    id = _allocate_category_id(user_id)
+    
+    category = {'id': id, 'name': name}
+    if parent_id is not None:
+        category['parentId'] = parent_id
+    index['categories'].append(category)
+    _categories_changed(user_id)
     return id
 
+def set_category_parent(id: int, parent_id: Optional[int], user_id: int = 1) -> bool:
+    """
+    Move a category under another one, or to the top level.
+    
+    Args:
+        id: Category ID
+        parent_id: ID of the new parent, or None for a top-level category
+        user_id: User identifier (default: 1)
+        
+    Returns:
+        True if the category was moved, False if not found
+        
+    Raises:
+        ValueError: If the parent does not exist or is inside the category's own subtree
+    """
+    index = _get_category_index(user_id)
+    category = index['by_id'].get(id)
+    if category is None:
+        return False
+    if parent_id is None:
+        category.pop('parentId', None)
+    else:
+        if parent_id not in index['by_id']:
+            raise ValueError(f"Parent category {parent_id} not found")
+        if id in index['ancestors'][parent_id]:
+            raise ValueError("A category cannot be moved under itself or its descendants")
+        category['parentId'] = parent_id
+    _categories_changed(user_id)
+    return True
+
 def remove_category_by_name(name: str, user_id: int = 1) -> bool:
     """
-    Remove a category by name.
+    Remove a category by name. Its subcategories move up to its parent.
     
     Args:
         name: Category name
@@ -162,17 +405,17 @@ def remove_category_by_name(name: str, user_id: int = 1) -> bool:
     Returns:
         True if category was removed, False if not found
     """
-    user_data = get_user_categories_data(user_id)
-    for category in user_data['categories']:
-        if category['name'] == name:
-            user_data['categories'].remove(category)
-            save_categories_data()
-            return True
-    return False
+    category = get_category_by_name(name, user_id)
+    if category is None:
+        return False
+    _reparent_children({category['id']}, None, user_id)
+    get_all_categories(user_id).remove(category)
+    _categories_changed(user_id)
+    return True
 
 def remove_category_by_id(id: int, user_id: int = 1) -> bool:
     """
-    Remove a category by ID.
+    Remove a category by ID. Its subcategories move up to its parent.
     
     Args:
         id: Category ID
@@ -181,18 +424,85 @@ def remove_category_by_id(id: int, user_id: int = 1) -> bool:
     Returns:
         True if category was removed, False if not found
     """
-    user_data = get_user_categories_data(user_id)
-    for category in user_data['categories']:
-        if category['id'] == id:
-            user_data['categories'].remove(category)
-            save_categories_data()
-            return True
-    return False
+    category = get_category_by_id(id, user_id)
+    if category is None:
+        return False
+    _reparent_children({category['id']}, None, user_id)
+    get_all_categories(user_id).remove(category)
+    _categories_changed(user_id)
+    return True
+
+def merge_categories(source_ids: List[int], target_id: int, user_id: int = 1) -> int:
+    """
+    Merge categories into another one.
+    
+    Expenses and subcategories of the source categories are moved to the
+    target category, then the source categories are removed.
+    
+    Args:
+        source_ids: IDs of the categories to merge
+        target_id: ID of the category that absorbs them
+        user_id: User identifier (default: 1)
+        
+    Returns:
+        Number of expenses moved to the target category
+        
+    Raises:
+        ValueError: If a category does not exist or the target is among the sources
+    """
+    from src.repositories.finance_repository import reassign_spending_category
+    
+    source_ids = list(dict.fromkeys(source_ids))
+    if get_category_by_id(target_id, user_id) is None:
+        raise ValueError(f"Category {target_id} not found")
+    if target_id in source_ids:
+        raise ValueError("Cannot merge a category into itself")
+    sources = [get_category_by_id(id, user_id) for id in source_ids]
+    missing = [id for id, category in zip(source_ids, sources) if category is None]
+    if missing:
+        raise ValueError(f"Categories not found: {missing}")
+    
+    # Expenses are moved first, so an interrupted merge never leaves them
+    # pointing to a removed category
+    moved = reassign_spending_category(source_ids, target_id, user_id)
+    
+    _reparent_children(set(source_ids), target_id, user_id)
+    categories = get_all_categories(user_id)
+    for category in sources:
+        categories.remove(category)
+    _categories_changed(user_id)
+    return moved
+
+def remove_category(id: int, user_id: int = 1, reassign_to: Optional[int] = None) -> bool:
+    """
+    Remove a category by ID, optionally moving its expenses to another category.
+    
+    Args:
+        id: Category ID
+        user_id: User identifier (default: 1)
+        reassign_to: ID of the category to move the expenses to; without it
+            the expenses keep the removed ID and show as "Unknown"
+        
+    Returns:
+        True if category was removed, False if not found
+        
+    Raises:
+        ValueError: If the reassignment target does not exist or is the removed category
+    """
+    if reassign_to is None:
+        return remove_category_by_id(id, user_id)
+    if get_category_by_id(id, user_id) is None:
+        return False
+    merge_categories([id], reassign_to, user_id)
+    return True
 
 def update_category_by_name(old_name: str, new_name: str, user_id: int = 1) -> bool:
     """
     Update a category name.
     
+    Expenses refer to categories by ID and follow the rename as is;
+    registered rename listeners update data keyed by the old name.
+    
     Args:
         old_name: Current category name
         new_name: New category name
@@ -201,12 +511,12 @@ def update_category_by_name(old_name: str, new_name: str, user_id: int = 1) -> b
     Returns:
         True if category was updated, False if not found
     """
-    user_data = get_user_categories_data(user_id)
-    for category in user_data['categories']:
-        if category['name'] == old_name:
-            category['name'] = new_name
-            save_categories_data()
-            return True
-    return False
-
-
+    category = get_category_by_name(old_name, user_id)
+    if category is None:
+        return False
+    category['name'] = new_name
+    _categories_changed(user_id)
+    
+    for listener in _rename_listeners:
+        listener(old_name, new_name, user_id)
+    return True
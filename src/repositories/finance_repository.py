@@ -2,11 +2,19 @@ import json
 import sys
 import os
 import copy
-from typing import List, Dict, Optional, Any, Union
+import math
+import calendar
+import time
+import tempfile
+import threading
+from datetime import date, timedelta
+from typing import Callable,  List, Dict, Optional, Any, Union, Iterable, Iterator, Set
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from src.utils.validation.validate_date import validate_date
-from src.repositories.categories_repository import get_category_by_id
+from src.repositories.categories_repository import get_category_by_id, get_category_ancestors, get_category_subtree
+from src.utils.text_index import InvertedIndex
+from src.utils.event_hub import publish
 
 # Constants
 FINANCE_PATH = "data/finances.json"
@@ -26,12 +34,49 @@ except (json.JSONDecodeError, FileNotFoundError) as e:
     print(f"Error loading finance data: {e}")
     finance_data = {"users": {}}
 
+# Callbacks run before records are read, with (user_id, last date read);
+# they can add records due up to that date (e.g. recurring transactions)
+_read_hooks: List[Callable[[int, str], None]] = []
+
+# Callbacks run after a spending record changes, with (user_id, old record
+# or None, new record or None)
+_spending_listeners: List[Callable[[int, Optional[Dict], Optional[Dict]], None]] = []
+
+# Per-user spending indexes (expense ID -> record, category ID -> expense IDs,
+# words of name and note -> expense IDs), keyed by user ID string
+_spending_indexes: Dict[str, Dict] = {}
+
+# Per-user income indexes (income ID -> record), keyed by user ID string
+_income_indexes: Dict[str, Dict] = {}
+
+# Per-user data versions and times of the last change, keyed by user ID string;
+# data unchanged since loading was last modified when the file was written
+_finance_versions: Dict[str, int] = {}
+_finance_modified: Dict[str, float] = {}
+_loaded_modified = os.path.getmtime(FINANCE_PATH)
+
+# Serializes changes to finance_data, so a batch validated against the
+# records is applied to the same records and saved before anyone else writes
+_finance_lock = threading.RLock()
+
 def save_finance_data() -> None:
     """
     Save financial data to JSON file.
+    
+    The data is written to a temporary file that replaces the previous one,
+    so an interrupted save never leaves a truncated file behind.
     """
-    with open(FINANCE_PATH, "w") as file:
-        json.dump(finance_data, file, indent=2)
+    directory = os.path.dirname(os.path.abspath(FINANCE_PATH))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".finances-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as file:
+            json.dump(finance_data, file, indent=2)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, FINANCE_PATH)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
 
 def migrate_legacy_finance_data() -> None:
     """
@@ -57,6 +102,94 @@ def migrate_legacy_finance_data() -> None:
 # Execute migration
 migrate_legacy_finance_data()
 
+def on_read(hook: Callable[[int, str], None]) -> None:
+    """
+    Register a callback run before a user's records are read.
+    
+    Args:
+        hook: Called with (user_id, date) where date (YYYY-MM-DD) is the
+            last day being read, never later than today
+    """
+    _read_hooks.append(hook)
+
+def on_spending_changed(listener: Callable[[int, Optional[Dict], Optional[Dict]], None]) -> None:
+    """
+    Register a callback run after every saved change to a spending record.
+    
+    Args:
+        listener: Called with (user_id, old, new): old is None for added
+            records, new is None for removed ones
+    """
+    _spending_listeners.append(listener)
+
+def _notify_spending_changed(user_id: int, old: Optional[Dict], new: Optional[Dict]) -> None:
+    for listener in _spending_listeners:
+        listener(user_id, old, new)
+
+def _finance_changed(user_id: int, kind: str, action: str, ids: List[int]) -> None:
+    """
+    Bump a user's finance version, save and publish "finance.changed" after a mutation.
+    
+    Args:
+        user_id: User identifier
+        kind: 'spending' or 'income'
+        action: 'added', 'removed' or 'updated', or 'batch' for a batch
+            that may have done all three
+        ids: IDs of the changed records
+    """
+    save_finance_data()
+    _finance_versions[str(user_id)] = _finance_versions.get(str(user_id), 0) + 1
+    _finance_modified[str(user_id)] = time.time()
+    publish("finance.changed", {
+        "user_id": int(user_id),
+        "kind": kind,
+        "action": action,
+        "ids": ids,
+        "version": _finance_versions[str(user_id)]
+    })
+
+def get_finance_version(user_id: int = 1) -> int:
+    """
+    Get the version of a user's expenses and incomes.
+    
+    The version changes with every saved change to the user's records.
+    Read hooks run first, so records they would add on the next read
+    (such as due recurring transactions) are already counted.
+    
+    Args:
+        user_id: User identifier (default: 1)
+        
+    Returns:
+        Version counter of the user's financial data
+    """
+    _before_read(user_id)
+    return _finance_versions.get(str(user_id), 0)
+
+def get_finance_last_modified(user_id: int = 1) -> float:
+    """
+    Get the time of the last change to a user's expenses and incomes.
+    
+    Args:
+        user_id: User identifier (default: 1)
+        
+    Returns:
+        Unix time of the last change, or of the data file's last write if
+        the user's records did not change since it was loaded
+    """
+    return _finance_modified.get(str(user_id), _loaded_modified)
+
+def _before_read(user_id: int, month: Optional[int] = None, year: Optional[int] = None) -> None:
+    """
+    Run the read hooks for a whole history read or for a single month.
+    """
+    if not _read_hooks:
+        return
+    until = date.today()
+    if month is not None and year is not None:
+        until = min(until, date(year, month, calendar.monthrange(year, month)[1]))
+    for hook in _read_hooks:
+        hook(user_id, until.isoformat())
+
 def get_user_finance_data(user_id: int) -> Dict:
     """
     Get user's financial data or create empty structure if none exists.
@@ -69,8 +202,10 @@ def get_user_finance_data(user_id: int) -> Dict:
     """
     user_id_str = str(user_id)
     if user_id_str not in finance_data["users"]:
-        finance_data["users"][user_id_str] = {"spending": [], "incomes": []}
-        save_finance_data()
+        with _finance_lock:
+            if user_id_str not in finance_data["users"]:
+                finance_data["users"][user_id_str] = {"spending": [], "incomes": []}
+                save_finance_data()
     return finance_data["users"][user_id_str]
 
 # -------------------------------
@@ -79,6 +214,169 @@ def get_user_finance_data(user_id: int) -> Dict:
 #
 # -------------------------------
 
+def _get_spending_index(user_id: int) -> Dict:
+    """
+    Get the spending index of a user, building it if needed.
+    
+    The index is rebuilt when the spending list was replaced or changed
+    size behind the repository's back.
+    
+    Args:
+        user_id: User identifier
+        
+    Returns:
+        Dictionary with 'by_id' and 'by_category' lookups, and the 'text'
+        index once built by _get_text_index
+    """
+    spending = get_user_finance_data(user_id)['spending']
+    index = _spending_indexes.get(str(user_id))
+    if index is None or index['rows'] is not spending or index['size'] != len(spending):
+        index = {'rows': spending, 'size': len(spending), 'by_id': {}, 'by_category': {}, 'text': None}
+        for row in spending:
+            index['by_id'].setdefault(row['id'], row)
+            index['by_category'].setdefault(row['categoryId'], set()).add(row['id'])
+        _spending_indexes[str(user_id)] = index
+    return index
+
+def _get_text_index(user_id: int) -> InvertedIndex:
+    """
+    Get the full-text index over names and notes of a user's expenses.
+    
+    It is built on the first search and then kept up to date by every
+    spending mutation.
+    
+    Args:
+        user_id: User identifier
+        
+    Returns:
+        InvertedIndex of expense IDs
+    """
+    index = _get_spending_index(user_id)
+    if index['text'] is None:
+        text = InvertedIndex()
+        for row in index['by_id'].values():
+            text.add(row['id'], _spending_text(row))
+        index['text'] = text
+    return index['text']
+
+def _spending_text(row: Dict) -> str:
+    return f"{row.get('name', '')} {row.get('note', '')}"
+
+def _index_spending(index: Dict, row: Dict) -> None:
+    index['by_id'][row['id']] = row
+    index['by_category'].setdefault(row['categoryId'], set()).add(row['id'])
+    if index['text'] is not None:
+        index['text'].add(row['id'], _spending_text(row))
+    index['size'] = len(index['rows'])
+
+def _unindex_spending(index: Dict, row: Dict) -> None:
+    index['by_id'].pop(row['id'], None)
+    if index['text'] is not None:
+        index['text'].remove(row['id'])
+    expense_ids = index['by_category'].get(row['categoryId'])
+    if expense_ids is not None:
+        expense_ids.discard(row['id'])
+        if not expense_ids:
+            del index['by_category'][row['categoryId']]
+    index['size'] = len(index['rows'])
+
+def get_spending_ids_by_category(category_id: int, user_id: int = 1) -> Set[int]:
+    """
+    Get the IDs of expenses assigned to a category.
+    
+    Args:
+        category_id: Category ID
+        user_id: User identifier (default: 1)
+        
+    Returns:
+        Set of spending record IDs
+    """
+    return set(_get_spending_index(user_id)['by_category'].get(category_id, ()))
+
+def reassign_spending_category(source_ids: Iterable[int], target_id: int, user_id: int = 1) -> int:
+    """
+    Move all expenses of the source categories to the target category.
+    
+    Only the affected records are visited, through the category index, and
+    the change is saved with a single write.
+    
+    Args:
+        source_ids: IDs of the categories to move expenses from
+        target_id: ID of the category to move expenses to
+        user_id: User identifier (default: 1)
+        
+    Returns:
+        Number of expenses moved
+    """
+    with _finance_lock:
+        index = _get_spending_index(user_id)
+        changes = []
+        for source_id in set(source_ids):
+            if source_id == target_id:
+                continue
+            for expense_id in index['by_category'].pop(source_id, ()):
+                row = index['by_id'][expense_id]
+                changes.append((dict(row), row))
+                row['categoryId'] = target_id
+                index['by_category'].setdefault(target_id, set()).add(expense_id)
+        if changes:
+            _finance_changed(user_id, "spending", "updated", [row["id"] for _, row in changes])
+        for old, row in changes:
+            _notify_spending_changed(user_id, old, row)
+    return len(changes)
+
+def search_spending(
+    query: str,
+    user_id: int = 1,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    category_id: Optional[int] = None,
+    limit: Optional[int] = None
+) -> List[Dict]:
+    """
+    Find expenses whose name or note contains every word of the query.
+    
+    Words match case- and diacritic-insensitively, and as prefixes:
+    "zab" finds "Żabka".
+    
+    Args:
+        query: Words to look for
+        user_id: User identifier (default: 1)
+        date_from: Earliest date (YYYY-MM-DD), inclusive
+        date_to: Latest date (YYYY-MM-DD), inclusive
+        category_id: Only expenses of this category or its subcategories
+        limit: Maximum number of results
+        
+    Returns:
+        Matching spending records with category names, newest first
+    """
+    _before_read(user_id)
+    matches = _get_text_index(user_id).search(query)
+    index = _get_spending_index(user_id)
+    
+    if category_id is not None:
+        in_category = set()
+        for subcategory_id in get_category_subtree(category_id, user_id) or [category_id]:
+            in_category |= index['by_category'].get(subcategory_id, set())
+        matches &= in_category
+    
+    rows = [index['by_id'][id] for id in matches]
+    if date_from:
+        rows = [row for row in rows if row['date'] >= date_from]
+    if date_to:
+        rows = [row for row in rows if row['date'][:10] <= date_to]
+    rows.sort(key=lambda k: (k['date'], k['id']), reverse=True)
+    if limit is not None:
+        rows = rows[:limit]
+    
+    returned = []
+    for row in rows:
+        temp = dict(row)
+        category = get_category_by_id(temp.pop('categoryId'), user_id)
+        temp['category'] = category["name"] if category else "Unknown"
+        returned.append(temp)
+    return returned
+
 def get_all_spending(user_id: int = 1) -> List[Dict]:
     """
     Get all spending records for a user with category names.
@@ -89,6 +387,7 @@ def get_all_spending(user_id: int = 1) -> List[Dict]:
     Returns:
         List of spending records with category names instead of IDs
     """
+    _before_read(user_id)
     user_data = get_user_finance_data(user_id)
     spends = user_data['spending']
     returned = []
@@ -113,6 +412,7 @@ def get_month_spending(month: int, year: int, user_id: int = 1) -> List[Dict]:
     Returns:
         List of spending records for the specified month
     """
+    _before_read(user_id, month, year)
     user_data = get_user_finance_data(user_id)
     spends = user_data['spending']
     returned = []
@@ -128,6 +428,119 @@ def get_month_spending(month: int, year: int, user_id: int = 1) -> List[Dict]:
             returned.append(temp)
     return sorted(returned, key=lambda k: k['date'])
 
+def iter_month_spending(month: int, year: int, user_id: int = 1) -> Iterator[Dict]:
+    """
+    Iterate over spending records of a month in date order.
+    
+    Unlike get_month_spending, records are copied and resolved one at a time,
+    so consumers that stream them keep memory bounded for very large months.
+    
+    Args:
+        month: Month (1-12)
+        year: Year
+        user_id: User identifier (default: 1)
+        
+    Yields:
+        Spending records with category names instead of IDs
+    """
+    _before_read(user_id, month, year)
+    user_data = get_user_finance_data(user_id)
+    month_prefix = f"{year}-{month:02d}"
+    rows = sorted((row for row in user_data['spending'] if row['date'].startswith(month_prefix)),
+                  key=lambda k: k['date'])
+    
+    for row in rows:
+        temp = dict(row)
+        category = get_category_by_id(temp.pop('categoryId'), user_id)
+        temp['category'] = category["name"] if category else "Unknown"
+        yield temp
+
+def get_month_category_rollups(month: int, year: int, user_id: int = 1) -> Dict[int, Dict[str, float]]:
+    """
+    Get the month's spending per category, rolled up the category tree.
+    
+    Each expense is added to its category and every ancestor from the
+    precomputed ancestor table in a single pass, so the total of any
+    subtree is one lookup in the result.
+    
+    Args:
+        month: Month (1-12)
+        year: Year
+        user_id: User identifier (default: 1)
+        
+    Returns:
+        Dictionary of category ID -> {'spent': amount of the category itself,
+        'total': amount of the category and all its subcategories}
+    """
+    _before_read(user_id, month, year)
+    user_data = get_user_finance_data(user_id)
+    month_prefix = f"{year}-{month:02d}"
+    rollups: Dict[int, Dict[str, float]] = {}
+    
+    for row in user_data['spending']:
+        if not row['date'].startswith(month_prefix):
+            continue
+        category_id = row['categoryId']
+        for ancestor_id in get_category_ancestors(category_id, user_id):
+            rollup = rollups.setdefault(ancestor_id, {'spent': 0.0, 'total': 0.0})
+            rollup['total'] += row['amount']
+        rollups[category_id]['spent'] += row['amount']
+    return rollups
+
+def get_dashboard_summary(user_id: int = 1, today: Optional[date] = None) -> Dict:
+    """
+    Get everything the dashboard pages show, in one pass over each list.
+    
+    Replaces separate reads of the month's incomes total and list, the
+    month's expenses and the last 30 days' expense total, which each
+    scanned the full history; category names are resolved once per
+    category instead of once per row.
+    
+    Args:
+        user_id: User identifier (default: 1)
+        today: Reference day (default: today)
+    
+    Returns:
+        Dictionary with 'incomes_total' (incomes dated from the first of
+        the month on), 'incomes' and 'expenses' (the month's records in
+        date order) and 'expenses_last_30_days' (expense total of the
+        last 30 days, today included)
+    """
+    today = today or date.today()
+    _before_read(user_id)
+    user_data = get_user_finance_data(user_id)
+    month_prefix = today.strftime("%Y-%m")
+    month_start = today.replace(day=1).isoformat()
+    window_start = (today - timedelta(days=29)).isoformat()
+    
+    expenses, expenses_last_30_days, category_names = [], 0.0, {}
+    for row in user_data['spending']:
+        day = row['date'][:10]
+        if day >= window_start:
+            expenses_last_30_days += row['amount']
+        if day.startswith(month_prefix):
+            temp = copy.deepcopy(row)
+            category_id = temp.pop('categoryId')
+            if category_id not in category_names:
+                category = get_category_by_id(category_id, user_id)
+                category_names[category_id] = category["name"] if category else "Unknown"
+            temp['category'] = category_names[category_id]
+            expenses.append(temp)
+    
+    incomes, incomes_total = [], 0.0
+    for row in user_data['incomes']:
+        if row['date'][:10] >= month_start:
+            incomes_total += row['amount']
+        if row['date'].startswith(month_prefix):
+            incomes.append(copy.deepcopy(row))
+    
+    return {
+        'incomes_total': incomes_total,
+        'incomes': sorted(incomes, key=lambda k: k['date']),
+        'expenses': sorted(expenses, key=lambda k: k['date']),
+        'expenses_last_30_days': expenses_last_30_days
+    }
+
 def get_spending_by_id(id: int, user_id: int = 1) -> Optional[Dict]:
     """
     Get a specific spending record by its ID.
@@ -139,12 +552,7 @@ def get_spending_by_id(id: int, user_id: int = 1) -> Optional[Dict]:
     Returns:
         Spending record dict or None if not found
     """
-    user_data = get_user_finance_data(user_id)
-    spends = user_data['spending']
-    for row in spends:
-        if row['id'] == id:
-            return row
-    return None
+    return _get_spending_index(user_id)['by_id'].get(id)
 
 def add_spending(data: Dict, user_id: int = 1) -> Dict:
     """
@@ -160,31 +568,79 @@ def add_spending(data: Dict, user_id: int = 1) -> Dict:
     Raises:
         ValueError: If date format is invalid
     """
-    user_data = get_user_finance_data(user_id)
-    
-    # Generate unique ID
-    id = 1
-    for row in user_data['spending']:
-        if row['id'] >= id:
-            id = row['id'] + 1
-
     if not validate_date(data["date"]):
         raise ValueError("Invalid date")
     
-    temp = {
-        "id": id,
-        "name": data["name"],
-        "currency": data["currency"],
-        "amount": data["amount"],
-        "categoryId": data["category"],
-        "date": data["date"],
-        "note": data.get("note", "")
-    }
-
-    user_data['spending'].append(temp)
-    save_finance_data()
+    with _finance_lock:
+        user_data = get_user_finance_data(user_id)
+        
+        # Generate unique ID
+        id = 1
+        for row in user_data['spending']:
+            if row['id'] >= id:
+                id = row['id'] + 1
+        
+        temp = {
+            "id": id,
+            "name": data["name"],
+            "currency": data["currency"],
+            "amount": data["amount"],
+            "categoryId": data["category"],
+            "date": data["date"],
+            "note": data.get("note", "")
+        }
+        
+        user_data['spending'].append(temp)
+        _index_spending(_get_spending_index(user_id), temp)
+        _finance_changed(user_id, "spending", "added", [temp["id"]])
+    _notify_spending_changed(user_id, None, temp)
     return temp
 
+def add_spending_batch(rows: List[Dict], user_id: int = 1) -> List[Dict]:
+    """
+    Add many spending records with a single write.
+    
+    All rows are validated first, so either every record is added or none.
+    
+    Args:
+        rows: Dictionaries with spending data, as for add_spending
+        user_id: User identifier (default: 1)
+        
+    Returns:
+        The created spending records
+        
+    Raises:
+        ValueError: If a date format is invalid
+    """
+    for position, data in enumerate(rows):
+        if not validate_date(data["date"]):
+            raise ValueError(f"Invalid date in row {position + 1}")
+    
+    with _finance_lock:
+        index = _get_spending_index(user_id)
+        id = max(index['by_id'], default=0) + 1
+        created = []
+        for data in rows:
+            temp = {
+                "id": id,
+                "name": data["name"],
+                "currency": data["currency"],
+                "amount": data["amount"],
+                "categoryId": data["category"],
+                "date": data["date"],
+                "note": data.get("note", "")
+            }
+            index['rows'].append(temp)
+            _index_spending(index, temp)
+            created.append(temp)
+            id += 1
+        
+        if created:
+            _finance_changed(user_id, "spending", "added", [temp["id"] for temp in created])
+    for temp in created:
+        _notify_spending_changed(user_id, None, temp)
+    return created
+
 def remove_spending_by_id(id: int, user_id: int = 1) -> bool:
     """
     Remove a spending record by its ID.
@@ -196,40 +652,52 @@ def remove_spending_by_id(id: int, user_id: int = 1) -> bool:
     Returns:
         True if removed, False if not found
     """
-    user_data = get_user_finance_data(user_id)
-    for row in user_data['spending']:
-        if row['id'] == id:
-            user_data['spending'].remove(row)
-            save_finance_data()
-            return True
-    return False
+    with _finance_lock:
+        index = _get_spending_index(user_id)
+        row = index['by_id'].get(id)
+        if row is None:
+            return False
+        index['rows'].remove(row)
+        _unindex_spending(index, row)
+        _finance_changed(user_id, "spending", "removed", [row["id"]])
+    _notify_spending_changed(user_id, row, None)
+    return True
 
-def update_spending(id: int, data: Dict, user_id: int = 1) -> bool:
+def update_spending(id: int, data: Dict, user_id: int = 1) -> Optional[Dict]:
     """
-    Update a spending record.
+    Update some fields of a spending record.
+    
+    Only the given fields are validated and changed; the record is
+    re-indexed in place and listeners see the old and new record.
     
     Args:
         id: Spending record ID
-        data: Dictionary with updated fields
+        data: Fields to change, named as for add_spending
         user_id: User identifier (default: 1)
         
     Returns:
-        True if updated, False if not found
+        Copy of the updated record, or None if not found
         
     Raises:
-        ValueError: If date format is invalid
+        ValueError: If a field is unknown or invalid, or the category does not exist
     """
-    if data.get("date") is not None and not validate_date(data["date"]):
-        raise ValueError("Invalid date")
-        
-    user_data = get_user_finance_data(user_id)
-    for row in user_data['spending']:
-        if row['id'] == id:
-            for key, value in data.items():
-                row[key] = value
-            save_finance_data()
-            return True
-    return False
+    changes = validate_fields(data, SPENDING_FIELDS)
+    check_spending_category(changes, user_id)
+    
+    with _finance_lock:
+        index = _get_spending_index(user_id)
+        row = index['by_id'].get(id)
+        if row is None:
+            return None
+        old = dict(row)
+        _unindex_spending(index, row)
+        for key, value in changes.items():
+            row["categoryId" if key == "category" else key] = value
+        _index_spending(index, row)
+        _finance_changed(user_id, "spending", "updated", [row["id"]])
+        updated = dict(row)
+    _notify_spending_changed(user_id, old, updated)
+    return updated
         
 # -------------------------------
 #
@@ -237,6 +705,32 @@ def update_spending(id: int, data: Dict, user_id: int = 1) -> bool:
 #
 # -------------------------------
 
+def _get_income_index(user_id: int) -> Dict:
+    """
+    Get the income index of a user, building it if needed.
+    
+    As for spending, the index is rebuilt when the income list was
+    replaced or changed size behind the repository's back.
+    
+    Args:
+        user_id: User identifier
+        
+    Returns:
+        Dictionary with the 'rows' it indexes and the 'by_id' lookup
+    """
+    incomes = get_user_finance_data(user_id)['incomes']
+    index = _income_indexes.get(str(user_id))
+    if index is None or index['rows'] is not incomes or index['size'] != len(incomes):
+        index = {'rows': incomes, 'size': len(incomes), 'by_id': {}}
+        for row in incomes:
+            index['by_id'].setdefault(row['id'], row)
+        _income_indexes[str(user_id)] = index
+    return index
+
+def _index_income(index: Dict, row: Dict) -> None:
+    index['by_id'][row['id']] = row
+    index['size'] = len(index['rows'])
+
 def get_all_incomes(user_id: int = 1) -> List[Dict]:
     """
     Get all income records for a user.
@@ -247,6 +741,7 @@ def get_all_incomes(user_id: int = 1) -> List[Dict]:
     Returns:
         List of income records
     """
+    _before_read(user_id)
     user_data = get_user_finance_data(user_id)
     return user_data['incomes']
 
@@ -262,6 +757,7 @@ def get_month_income(month: int, year: int, user_id: int = 1) -> List[Dict]:
     Returns:
         List of income records for the specified month
     """
+    _before_read(user_id, month, year)
     user_data = get_user_finance_data(user_id)
     incomes = user_data['incomes']
     returned = []
@@ -273,6 +769,27 @@ def get_month_income(month: int, year: int, user_id: int = 1) -> List[Dict]:
             returned.append(temp)
     return sorted(returned, key=lambda k: k['date'])
 
+def iter_month_income(month: int, year: int, user_id: int = 1) -> Iterator[Dict]:
+    """
+    Iterate over income records of a month in date order, copying one at a time.
+    
+    Args:
+        month: Month (1-12)
+        year: Year
+        user_id: User identifier (default: 1)
+        
+    Yields:
+        Income records of the specified month
+    """
+    _before_read(user_id, month, year)
+    user_data = get_user_finance_data(user_id)
+    month_prefix = f"{year}-{month:02d}"
+    rows = sorted((row for row in user_data['incomes'] if row['date'].startswith(month_prefix)),
+                  key=lambda k: k['date'])
+    
+    for row in rows:
+        yield dict(row)
+
 def get_income_by_id(id: int, user_id: int = 1) -> Optional[Dict]:
     """
     Get a specific income record by its ID.
@@ -284,12 +801,7 @@ def get_income_by_id(id: int, user_id: int = 1) -> Optional[Dict]:
     Returns:
         Income record dict or None if not found
     """
-    user_data = get_user_finance_data(user_id)
-    incomes = user_data['incomes']
-    for row in incomes:
-        if row['id'] == id:
-            return row
-    return None
+    return _get_income_index(user_id)['by_id'].get(id)
 
 def add_income(data: Dict, user_id: int = 1) -> Dict:
     """
@@ -305,29 +817,72 @@ def add_income(data: Dict, user_id: int = 1) -> Dict:
     Raises:
         ValueError: If date format is invalid
     """
-    user_data = get_user_finance_data(user_id)
-    
-    # Generate unique ID
-    id = 1
-    for row in user_data['incomes']:
-        if row['id'] >= id:
-            id = row['id'] + 1
-
     if not validate_date(data["date"]):
         raise ValueError("Invalid date")
     
-    temp = {
-        "id": id,
-        "currency": data["currency"],
-        "amount": data["amount"],
-        "date": data["date"],
-        "note": data.get("note", "")
-    }
-
-    user_data['incomes'].append(temp)
-    save_finance_data()
+    with _finance_lock:
+        user_data = get_user_finance_data(user_id)
+        
+        # Generate unique ID
+        id = 1
+        for row in user_data['incomes']:
+            if row['id'] >= id:
+                id = row['id'] + 1
+        
+        temp = {
+            "id": id,
+            "currency": data["currency"],
+            "amount": data["amount"],
+            "date": data["date"],
+            "note": data.get("note", "")
+        }
+        
+        user_data['incomes'].append(temp)
+        _index_income(_get_income_index(user_id), temp)
+        _finance_changed(user_id, "income", "added", [temp["id"]])
     return temp
 
+def add_income_batch(rows: List[Dict], user_id: int = 1) -> List[Dict]:
+    """
+    Add many income records with a single write.
+    
+    All rows are validated first, so either every record is added or none.
+    
+    Args:
+        rows: Dictionaries with income data, as for add_income
+        user_id: User identifier (default: 1)
+        
+    Returns:
+        The created income records
+        
+    Raises:
+        ValueError: If a date format is invalid
+    """
+    for position, data in enumerate(rows):
+        if not validate_date(data["date"]):
+            raise ValueError(f"Invalid date in row {position + 1}")
+    
+    with _finance_lock:
+        index = _get_income_index(user_id)
+        id = max(index['by_id'], default=0) + 1
+        created = []
+        for data in rows:
+            temp = {
+                "id": id,
+                "currency": data["currency"],
+                "amount": data["amount"],
+                "date": data["date"],
+                "note": data.get("note", "")
+            }
+            index['rows'].append(temp)
+            _index_income(index, temp)
+            created.append(temp)
+            id += 1
+        
+        if created:
+            _finance_changed(user_id, "income", "added", [temp["id"] for temp in created])
+    return created
+
 def remove_income_by_id(id: int, user_id: int = 1) -> bool:
     """
     Remove an income record by its ID.
@@ -339,41 +894,328 @@ def remove_income_by_id(id: int, user_id: int = 1) -> bool:
     Returns:
         True if removed, False if not found
     """
-    user_data = get_user_finance_data(user_id)
-    for row in user_data['incomes']:
-        if row['id'] == id:
-            user_data['incomes'].remove(row)
-            save_finance_data()
-            return True
-    return False
+    with _finance_lock:
+        index = _get_income_index(user_id)
+        row = index['by_id'].pop(id, None)
+        if row is None:
+            return False
+        index['rows'].remove(row)
+        index['size'] = len(index['rows'])
+        _finance_changed(user_id, "income", "removed", [row["id"]])
+    return True
 
-def update_income(id: int, data: Dict, user_id: int = 1) -> bool:
+def update_income(id: int, data: Dict, user_id: int = 1) -> Optional[Dict]:
     """
-    Update an income record.
+    Update some fields of an income record.
     
     Args:
         id: Income record ID
-        data: Dictionary with updated fields
+        data: Fields to change, named as for add_income
         user_id: User identifier (default: 1)
         
     Returns:
-        True if updated, False if not found
+        Copy of the updated record, or None if not found
         
     Raises:
-        ValueError: If date format is invalid
+        ValueError: If a field is unknown or invalid
     """
-    if data.get("date") is not None and not validate_date(data["date"]):
-        raise ValueError("Invalid date")
+    changes = validate_fields(data, INCOME_FIELDS)
+    
+    with _finance_lock:
+        row = _get_income_index(user_id)['by_id'].get(id)
+        if row is None:
+            return None
+        row.update(changes)
+        _finance_changed(user_id, "income", "updated", [row["id"]])
+        return dict(row)
+
+# -------------------------------
+#
+# Field Validation and Batches
+#
+# -------------------------------
+
+# Fields of spending and income data as accepted by add_spending/add_income,
+# with their types
+SPENDING_FIELDS = {"name": str, "amount": float, "currency": str, "category": int, "date": str, "note": str}
+INCOME_FIELDS = {"amount": float, "currency": str, "date": str, "note": str}
+BATCH_OPERATIONS = ("create", "update", "delete")
+
+class BatchError(ValueError):
+    """
+    Raised when operations of a batch are invalid; nothing was applied.
+    
+    Attributes:
+        errors: List of {'index': operation position, 'message': reason}
+    """
+    def __init__(self, errors: List[Dict]):
+        super().__init__(f"{len(errors)} invalid operation(s), nothing was applied")
+        self.errors = errors
+
+def _check_field(field: str, kind: type, value: Any) -> Any:
+    """
+    Check the JSON type of one field value; values are not coerced.
+    
+    Returns:
+        The value, as float for amounts
         
-    user_data = get_user_finance_data(user_id)
-    for row in user_data['incomes']:
-        if row['id'] == id:
-            for key, value in data.items():
-                row[key] = value
-            save_finance_data()
-            return True
-    return False
+    Raises:
+        ValueError: If the value is null or of the wrong type, or an amount
+            is not finite
+    """
+    if kind is str:
+        valid = isinstance(value, str)
+    elif kind is float:
+        valid = (isinstance(value, (int, float)) and not isinstance(value, bool)
+                 and math.isfinite(value))
+    else:
+        valid = isinstance(value, int) and not isinstance(value, bool)
+    if not valid:
+        raise ValueError(f"Invalid {field}")
+    return kind(value)
 
+def validate_fields(data: Dict, fields: Dict[str, type], required: Iterable[str] = ()) -> Dict:
+    """
+    Check the fields of spending or income data.
+    
+    Text fields must be strings, amounts finite numbers and categories
+    integers; null is rejected for every field.
+    
+    Args:
+        data: Field values, e.g. from a request
+        fields: SPENDING_FIELDS or INCOME_FIELDS
+        required: Fields that must be present
+        
+    Returns:
+        Dictionary of converted values
+        
+    Raises:
+        ValueError: On unknown, missing or invalid fields
+    """
+    if not isinstance(data, dict):
+        raise ValueError("Data must be an object")
+    unknown = sorted(set(data) - set(fields))
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(unknown)}")
+    missing = [field for field in required if data.get(field) is None]
+    if missing:
+        raise ValueError(f"Missing field(s): {', '.join(missing)}")
+    
+    values = {}
+    for field, value in data.items():
+        values[field] = _check_field(field, fields[field], value)
+    if "date" in values and not validate_date(values["date"]):
+        raise ValueError("Invalid date")
+    return values
 
+def check_spending_category(data: Dict, user_id: int) -> None:
+    """
+    Check that the category of spending data, if given, belongs to the user.
+    
+    Raises:
+        ValueError: If the data names a category the user does not have
+    """
+    if "category" in data and get_category_by_id(data["category"], user_id) is None:
+        raise ValueError(f"Category {data['category']} not found")
 
+def _validate_batch(operations: List[Dict], existing_ids: Iterable[int], fields: Dict[str, type],
+                    required: Iterable[str], check: Optional[Callable[[Dict], None]] = None) -> List[Dict]:
+    """
+    Validate batch operations against the records as they will be when each runs.
+    
+    Args:
+        operations: Batch operations
+        existing_ids: IDs of the records before the batch
+        fields: SPENDING_FIELDS or INCOME_FIELDS
+        required: Fields a create must have
+        check: Optional extra check of the data of creates and updates,
+            raising ValueError
+    
+    Returns:
+        Operations with converted data
+        
+    Raises:
+        BatchError: If any operation is invalid
+    """
+    live = set(existing_ids)
+    validated, errors = [], []
+    for position, operation in enumerate(operations):
+        try:
+            if not isinstance(operation, dict) or operation.get("op") not in BATCH_OPERATIONS:
+                raise ValueError(f"op must be one of {', '.join(BATCH_OPERATIONS)}")
+            op = operation["op"]
+            if op == "create":
+                data = validate_fields(operation.get("data"), fields, required)
+                if check:
+                    check(data)
+                validated.append({"op": op, "data": data})
+                continue
+            
+            id = operation.get("id")
+            if not isinstance(id, int) or isinstance(id, bool):
+                raise ValueError("id must be an integer")
+            if id not in live:
+                raise ValueError(f"Record {id} not found")
+            if op == "delete":
+                live.discard(id)
+                validated.append({"op": op, "id": id})
+            else:
+                data = validate_fields(operation.get("data"), fields)
+                if check:
+                    check(data)
+                validated.append({"op": op, "id": id, "data": data})
+        except ValueError as e:
+            errors.append({"index": position, "message": str(e)})
+    if errors:
+        raise BatchError(errors)
+    return validated
+
+def _restore_rows(rows: List[Dict], rows_before: List[Dict], updates: List[tuple]) -> None:
+    """
+    Undo an applied batch that could not be saved.
+    
+    Args:
+        rows: The user's spending or income list, changed in place
+        rows_before: Shallow copy of the list taken before the batch
+        updates: (copy before the update, updated record) pairs; records
+            updated more than once are restored to their first copy
+    """
+    for old, row in reversed(updates):
+        row.clear()
+        row.update(old)
+    rows[:] = rows_before
+
+def apply_spending_batch(operations: List[Dict], user_id: int = 1) -> List[Dict]:
+    """
+    Create, update and delete spending records atomically, with a single write.
+    
+    All operations are validated before any is applied; an operation on a
+    record deleted earlier in the batch is invalid.
+    
+    Args:
+        operations: List of {"op": "create", "data": {...}} with fields as
+            for add_spending, {"op": "update", "id": n, "data": {...}} with
+            the fields to change, or {"op": "delete", "id": n}
+        user_id: User identifier (default: 1)
+        
+    Returns:
+        Per operation {"op", "id", "record"} (record is None for deletes)
+        
+    Raises:
+        BatchError: If any operation is invalid
+    """
+    with _finance_lock:
+        index = _get_spending_index(user_id)
+        validated = _validate_batch(operations, index['by_id'], SPENDING_FIELDS,
+                                    ("name", "amount", "category", "date"),
+                                    lambda data: check_spending_category(data, user_id))
+        
+        rows_before = list(index['rows'])
+        id = max(index['by_id'], default=0) + 1
+        results, changes, deleted = [], [], set()
+        for operation in validated:
+            record_id = operation.get("id", id)
+            if operation["op"] == "create":
+                data = operation["data"]
+                row = {
+                    "id": id,
+                    "name": data["name"],
+                    "currency": data.get("currency", "PLN"),
+                    "amount": data["amount"],
+                    "categoryId": data["category"],
+                    "date": data["date"],
+                    "note": data.get("note", "")
+                }
+                id += 1
+                index['rows'].append(row)
+                _index_spending(index, row)
+                changes.append((None, row))
+            elif operation["op"] == "update":
+                row = index['by_id'][operation["id"]]
+                old = dict(row)
+                _unindex_spending(index, row)
+                for key, value in operation["data"].items():
+                    row["categoryId" if key == "category" else key] = value
+                _index_spending(index, row)
+                changes.append((old, row))
+            else:
+                row = index['by_id'][operation["id"]]
+                _unindex_spending(index, row)
+                deleted.add(row["id"])
+                changes.append((row, None))
+                row = None
+            results.append({"op": operation["op"], "id": record_id, "record": dict(row) if row else None})
+        
+        if deleted:
+            # One pass instead of a list.remove per deleted record
+            index['rows'][:] = [row for row in index['rows'] if row['id'] not in deleted]
+        index['size'] = len(index['rows'])
+        if changes:
+            try:
+                _finance_changed(user_id, "spending", "batch", [result["id"] for result in results])
+            except BaseException:
+                # Not saved: put the records back as they were and rebuild the index
+                _restore_rows(index['rows'], rows_before, [(old, new) for old, new in changes if old and new])
+                _spending_indexes.pop(str(user_id), None)
+                raise
+    for old, new in changes:
+        _notify_spending_changed(user_id, old, new)
+    return results
 
+def apply_income_batch(operations: List[Dict], user_id: int = 1) -> List[Dict]:
+    """
+    Create, update and delete income records atomically, with a single write.
+    
+    Args:
+        operations: As for apply_spending_batch, with fields as for add_income
+        user_id: User identifier (default: 1)
+        
+    Returns:
+        Per operation {"op", "id", "record"} (record is None for deletes)
+        
+    Raises:
+        BatchError: If any operation is invalid
+    """
+    with _finance_lock:
+        index = _get_income_index(user_id)
+        incomes, by_id = index['rows'], index['by_id']
+        validated = _validate_batch(operations, by_id, INCOME_FIELDS, ("amount", "date"))
+        
+        rows_before = list(incomes)
+        id = max(by_id, default=0) + 1
+        results, updates, deleted = [], [], set()
+        for operation in validated:
+            record_id = operation.get("id", id)
+            if operation["op"] == "create":
+                data = operation["data"]
+                row = {
+                    "id": id,
+                    "currency": data.get("currency", "PLN"),
+                    "amount": data["amount"],
+                    "date": data["date"],
+                    "note": data.get("note", "")
+                }
+                id += 1
+                incomes.append(row)
+                by_id[row['id']] = row
+            elif operation["op"] == "update":
+                row = by_id[operation["id"]]
+                updates.append((dict(row), row))
+                row.update(operation["data"])
+            else:
+                del by_id[operation["id"]]
+                deleted.add(operation["id"])
+                row = None
+            results.append({"op": operation["op"], "id": record_id, "record": dict(row) if row else None})
+        
+        if deleted:
+            incomes[:] = [row for row in incomes if row['id'] not in deleted]
+        index['size'] = len(incomes)
+        if results:
+            try:
+                _finance_changed(user_id, "income", "batch", [result["id"] for result in results])
+            except BaseException:
+                _restore_rows(incomes, rows_before, updates)
+                _income_indexes.pop(str(user_id), None)
+                raise
+    return results
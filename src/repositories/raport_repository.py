@@ -5,13 +5,14 @@ from datetime import datetime
 from typing import Dict, List, Optional, Union, Any, Tuple
 
 # Repository imports
-from src.repositories.categories_repository import get_all_categories, get_category_by_id
+from src.repositories.categories_repository import get_all_categories, get_category_by_id, on_category_renamed
 from src.repositories.finance_repository import (
     get_all_spending,
     get_month_spending,
     get_month_income,
     get_all_incomes
 )
+from src.utils.event_hub import publish
 
 # Configure logger
 logger = logging.getLogger(__name__)
@@ -60,6 +61,7 @@ def save_budgets(data: Dict) -> bool:
         with open(BUDGETS_PATH, 'w') as file:
             json.dump(data, file, indent=2)
         logger.debug("Budget data saved successfully")
+        publish("budgets.changed")
         return True
     except Exception as e:
         logger.error(f"Error saving budget data: {e}")
@@ -140,6 +142,40 @@ def delete_budget(month: int, year: int) -> bool:
     return False
 
 
+def rename_budget_category(old_name: str, new_name: str, user_id: int = 1) -> bool:
+    """
+    Move budget amounts from a renamed category to its new name.
+    
+    Budgets are keyed by the names of the default user's categories (see
+    set_budget), so renames of other users' categories are ignored.
+    
+    Args:
+        old_name: Previous category name
+        new_name: New category name
+        user_id: User whose category was renamed
+    
+    Returns:
+        bool: True if any budget was updated
+    """
+    if int(user_id) != 1 or old_name == new_name:
+        return False
+
+    budgets = load_budgets()
+    changed = False
+    for period, amounts in budgets['budgets'].items():
+        if old_name in amounts:
+            amounts[new_name] = amounts.pop(old_name)
+            changed = True
+
+    if changed and save_budgets(budgets):
+        logger.info(f"Budgets moved from category '{old_name}' to '{new_name}'")
+        return True
+    return False
+
+
+on_category_renamed(rename_budget_category)
+
+
 def get_monthly_report(month: int, year: int, user_id: int = 1) -> Optional[Dict]:
     """
     Generate a comprehensive monthly financial report.
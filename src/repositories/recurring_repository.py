@@ -0,0 +1,358 @@
+import json
+import heapq
+import logging
+import calendar
+import threading
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Set, Tuple
+
+from src.utils.validation.validate_date import validate_date
+from src.repositories import finance_repository as fr
+
+# Configure logger
+logger = logging.getLogger(__name__)
+
+# Constants
+RECURRING_PATH = "data/recurring.json"
+FREQUENCIES = ("monthly", "weekly", "cron")
+KINDS = ("spending", "income")
+CRON_SEARCH_DAYS = 5 * 366  # Cron rules without an occurrence this far ahead are finished
+# Template fields: those of transactions, except the date, which comes from the schedule
+TEMPLATE_FIELDS = {
+    "spending": {field: kind for field, kind in fr.SPENDING_FIELDS.items() if field != "date"},
+    "income": {field: kind for field, kind in fr.INCOME_FIELDS.items() if field != "date"}
+}
+
+# Load recurring rules
+try:
+    with open(RECURRING_PATH, "r") as file:
+        recurring_data = json.load(file)
+        if "users" not in recurring_data:
+            recurring_data["users"] = {}
+except FileNotFoundError:
+    recurring_data = {"users": {}}
+except json.JSONDecodeError as e:
+    logger.error(f"Error loading recurring transactions: {e}")
+    recurring_data = {"users": {}}
+
+# Per-user heaps of (next due date, rule ID), built on first use
+_schedules: Dict[str, List[Tuple[str, int]]] = {}
+_lock = threading.RLock()
+
+def save_recurring_data() -> None:
+    """
+    Save recurring rules to the JSON file.
+    """
+    with open(RECURRING_PATH, "w") as file:
+        json.dump(recurring_data, file, indent=2)
+
+# -------------------------------
+#
+# Schedules
+#
+# -------------------------------
+
+def _parse_cron_field(field: str, low: int, high: int) -> Optional[Set[int]]:
+    """
+    Parse one cron field ("*", "5", "1,15", "1-5", "*/2", "1-10/3").
+    
+    Returns:
+        Set of allowed values, or None for "*" (any value)
+    
+    Raises:
+        ValueError: If the field is malformed or out of range
+    """
+    if field == "*":
+        return None
+    values = set()
+    for part in field.split(","):
+        span, _, step = part.partition("/")
+        if span == "*":
+            start, end = low, high
+        elif "-" in span:
+            start, end = (int(value) for value in span.split("-", 1))
+        else:
+            start = end = int(span)
+        if not low <= start <= end <= high:
+            raise ValueError(f"Cron value out of range {low}-{high}: {part}")
+        values.update(range(start, end + 1, int(step) if step else 1))
+    return values
+
+def parse_cron(expression: str) -> Tuple[Optional[Set[int]], Optional[Set[int]], Optional[Set[int]]]:
+    """
+    Parse a day-level cron expression: "day-of-month month day-of-week".
+    
+    Day of week is 0-6 with 0 = Sunday, as in cron. Example: "1 * *" is the
+    first of every month, "* * 1-5" every weekday, "15 3,6,9,12 *" quarterly.
+    
+    Args:
+        expression: Cron expression with three fields
+    
+    Returns:
+        Allowed days of month, months and days of week (None = any)
+    
+    Raises:
+        ValueError: If the expression is malformed
+    """
+    fields = expression.split()
+    if len(fields) != 3:
+        raise ValueError("Cron expression must have 3 fields: day-of-month month day-of-week")
+    return (_parse_cron_field(fields[0], 1, 31),
+            _parse_cron_field(fields[1], 1, 12),
+            _parse_cron_field(fields[2], 0, 6))
+
+def _cron_matches(day: date, days: Optional[Set[int]], months: Optional[Set[int]],
+                  weekdays: Optional[Set[int]]) -> bool:
+    if months is not None and day.month not in months:
+        return False
+    weekday = (day.weekday() + 1) % 7  # Python: Monday = 0, cron: Sunday = 0
+    if days is not None and weekdays is not None:
+        # As in cron, restricting both fields means either may match
+        return day.day in days or weekday in weekdays
+    return ((days is None or day.day in days) and
+            (weekdays is None or weekday in weekdays))
+
+def _add_months(year: int, month: int, count: int) -> Tuple[int, int]:
+    index = year * 12 + month - 1 + count
+    return index // 12, index % 12 + 1
+
+def next_occurrence(schedule: Dict, start: date, after: date) -> Optional[date]:
+    """
+    Find the first occurrence of a schedule on or after a date.
+    
+    Args:
+        schedule: {"freq": "monthly", "day": 1-31, "interval": n},
+            {"freq": "weekly", "weekday": 0-6 (Monday = 0), "interval": n}
+            or {"freq": "cron", "cron": "day-of-month month day-of-week"}
+        start: First day of the rule; monthly and weekly intervals count from it
+        after: Earliest acceptable date
+    
+    Returns:
+        Date of the occurrence, or None if there is none
+    """
+    after = max(after, start)
+    interval = int(schedule.get("interval", 1))
+    
+    if schedule["freq"] == "monthly":
+        day = int(schedule.get("day", start.day))
+        elapsed = (after.year - start.year) * 12 + after.month - start.month
+        count = -(-elapsed // interval) * interval  # Round up to a multiple of the interval
+        while True:
+            year, month = _add_months(start.year, start.month, count)
+            # Days missing from short months fall on the month's last day
+            candidate = date(year, month, min(day, calendar.monthrange(year, month)[1]))
+            if candidate >= after:
+                return candidate
+            count += interval
+    
+    if schedule["freq"] == "weekly":
+        first = start + timedelta(days=(int(schedule.get("weekday", start.weekday())) - start.weekday()) % 7)
+        if after <= first:
+            return first
+        period = 7 * interval
+        return first + timedelta(days=-(-(after - first).days // period) * period)
+    
+    days, months, weekdays = parse_cron(schedule["cron"])
+    candidate = after
+    for _ in range(CRON_SEARCH_DAYS):
+        if _cron_matches(candidate, days, months, weekdays):
+            return candidate
+        candidate += timedelta(days=1)
+    return None
+
+def _next_due(rule: Dict, after: date) -> Optional[str]:
+    """
+    Next due date of a rule on or after a date, respecting its end date.
+    """
+    occurrence = next_occurrence(rule["schedule"], date.fromisoformat(rule["start"]), after)
+    if occurrence is None or (rule.get("end") and occurrence.isoformat() > rule["end"]):
+        return None
+    return occurrence.isoformat()
+
+# -------------------------------
+#
+# Rules
+#
+# -------------------------------
+
+def get_recurring_rules(user_id: int = 1) -> List[Dict]:
+    """
+    Get a user's recurring transaction rules.
+    
+    Args:
+        user_id: User identifier (default: 1)
+    
+    Returns:
+        List of rule dictionaries
+    """
+    return recurring_data["users"].get(str(user_id), {}).get("rules", [])
+
+def validate_recurring_rule(data: Dict, user_id: int = 1) -> Dict:
+    """
+    Check that a recurring rule is well formed.
+    
+    The template is checked as transaction data is by finance_repository,
+    so the rule can never materialize rows a direct add would reject.
+    
+    Args:
+        data: Rule dictionary
+        user_id: User identifier (default: 1), owner of the template's category
+    
+    Returns:
+        The checked template
+    
+    Raises:
+        ValueError: If the rule is malformed
+    """
+    if data.get("kind") not in KINDS:
+        raise ValueError(f"Kind must be one of {', '.join(KINDS)}")
+    schedule = data.get("schedule") or {}
+    if schedule.get("freq") not in FREQUENCIES:
+        raise ValueError(f"Schedule freq must be one of {', '.join(FREQUENCIES)}")
+    if schedule["freq"] == "cron":
+        parse_cron(schedule.get("cron", ""))
+    if int(schedule.get("interval", 1)) < 1:
+        raise ValueError("Schedule interval must be at least 1")
+    if schedule["freq"] == "monthly" and not 1 <= int(schedule.get("day", 1)) <= 31:
+        raise ValueError("Monthly day must be 1-31")
+    if schedule["freq"] == "weekly" and not 0 <= int(schedule.get("weekday", 0)) <= 6:
+        raise ValueError("Weekly weekday must be 0-6 (Monday = 0)")
+    if not validate_date(data.get("start")):
+        raise ValueError("Invalid start date")
+    if data.get("end") is not None and not validate_date(data["end"]):
+        raise ValueError("Invalid end date")
+    if data["kind"] == "spending":
+        template = fr.validate_fields(data.get("template"), TEMPLATE_FIELDS["spending"],
+                                      required=("name", "amount", "category"))
+        fr.check_spending_category(template, user_id)
+    else:
+        template = fr.validate_fields(data.get("template"), TEMPLATE_FIELDS["income"], required=("amount",))
+    return template
+
+def add_recurring_rule(data: Dict, user_id: int = 1) -> Dict:
+    """
+    Add a recurring transaction rule.
+    
+    Transactions are created from the template when a read reaches their
+    date, starting with the first occurrence on or after the start date.
+    
+    Args:
+        data: Dictionary with kind ('spending' or 'income'), template
+            (fields as for add_spending/add_income, without date), schedule,
+            start and optional end date
+        user_id: User identifier (default: 1)
+    
+    Returns:
+        The created rule
+    
+    Raises:
+        ValueError: If the rule is malformed
+    """
+    template = validate_recurring_rule(data, user_id)
+    with _lock:
+        rules = recurring_data["users"].setdefault(str(user_id), {"rules": []})["rules"]
+        rule = {
+            "id": max((existing["id"] for existing in rules), default=0) + 1,
+            "kind": data["kind"],
+            "template": template,
+            "schedule": dict(data["schedule"]),
+            "start": data["start"],
+            "end": data.get("end")
+        }
+        rule["template"].setdefault("currency", "PLN")
+        rule["next_due"] = _next_due(rule, date.fromisoformat(rule["start"]))
+        rules.append(rule)
+        save_recurring_data()
+    
+        if rule["next_due"] is not None and str(user_id) in _schedules:
+            heapq.heappush(_schedules[str(user_id)], (rule["next_due"], rule["id"]))
+    return rule
+
+def remove_recurring_rule(id: int, user_id: int = 1) -> bool:
+    """
+    Remove a recurring rule. Transactions already created are kept.
+    
+    Args:
+        id: Rule ID
+        user_id: User identifier (default: 1)
+    
+    Returns:
+        True if the rule was removed, False if not found
+    """
+    with _lock:
+        rules = get_recurring_rules(user_id)
+        for rule in rules:
+            if rule["id"] == id:
+                # Its heap entry is skipped when it comes up
+                rules.remove(rule)
+                save_recurring_data()
+                return True
+    return False
+
+# -------------------------------
+#
+# Materialization
+#
+# -------------------------------
+
+def _get_schedule(user_id: int) -> List[Tuple[str, int]]:
+    """
+    Get the heap of due dates of a user's rules, building it if needed.
+    Caller must hold _lock.
+    """
+    heap = _schedules.get(str(user_id))
+    if heap is None:
+        heap = [(rule["next_due"], rule["id"]) for rule in get_recurring_rules(user_id)
+                if rule.get("next_due")]
+        heapq.heapify(heap)
+        _schedules[str(user_id)] = heap
+    return heap
+
+def materialize_due(user_id: int, until: str) -> int:
+    """
+    Create the transactions of all rules due on or before a date.
+    
+    Only rules at the top of the due-date heap are visited, so a read with
+    nothing due costs a single comparison however many rules exist.
+    Created transactions are saved before the rules' next due dates, so an
+    interruption can repeat an occurrence but never skip one.
+    
+    Args:
+        user_id: User identifier
+        until: Last date to materialize (YYYY-MM-DD)
+    
+    Returns:
+        Number of transactions created
+    """
+    with _lock:
+        heap = _get_schedule(user_id)
+        if not heap or heap[0][0] > until:
+            return 0
+    
+        rules = {rule["id"]: rule for rule in get_recurring_rules(user_id)}
+        spending, incomes = [], []
+        while heap and heap[0][0] <= until:
+            due, rule_id = heapq.heappop(heap)
+            rule = rules.get(rule_id)
+            if rule is None or rule.get("next_due") != due:
+                continue  # Removed rule or outdated entry
+    
+            while rule["next_due"] is not None and rule["next_due"] <= until:
+                row = dict(rule["template"], date=rule["next_due"])
+                (spending if rule["kind"] == "spending" else incomes).append(row)
+                rule["next_due"] = _next_due(rule, date.fromisoformat(rule["next_due"]) + timedelta(days=1))
+            if rule["next_due"] is not None:
+                heapq.heappush(heap, (rule["next_due"], rule_id))
+    
+        if spending:
+            fr.add_spending_batch(spending, user_id)
+        if incomes:
+            fr.add_income_batch(incomes, user_id)
+        save_recurring_data()
+    
+        created = len(spending) + len(incomes)
+        if created:
+            logger.info(f"Created {created} recurring transaction(s) for user {user_id} up to {until}")
+        return created
+
+fr.on_read(materialize_due)
@@ -0,0 +1,140 @@
+import json
+import re
+import math
+import logging
+from typing import Dict, List
+
+# Configure logger
+logger = logging.getLogger(__name__)
+
+# Constants
+RULES_PATH = "data/categorization_rules.json"
+RULE_TYPES = ("substring", "regex")
+
+# Load categorization rules
+try:
+    with open(RULES_PATH, "r") as file:
+        rules_data = json.load(file)
+        if "users" not in rules_data:
+            rules_data["users"] = {}
+except FileNotFoundError:
+    rules_data = {"users": {}}
+except json.JSONDecodeError as e:
+    logger.error(f"Error loading categorization rules: {e}")
+    rules_data = {"users": {}}
+
+# Per-user counters bumped on every rule change, for compiled rule caches
+_rules_versions: Dict[str, int] = {}
+
+def save_rules_data() -> None:
+    """
+    Save categorization rules to the JSON file.
+    """
+    with open(RULES_PATH, "w") as file:
+        json.dump(rules_data, file, indent=2)
+
+def get_rules(user_id: int = 1) -> List[Dict]:
+    """
+    Get a user's categorization rules in priority order.
+    
+    Args:
+        user_id: User identifier (default: 1)
+    
+    Returns:
+        List of rule dictionaries; the first matching rule wins
+    """
+    return rules_data["users"].get(str(user_id), {}).get("rules", [])
+
+def get_rules_version(user_id: int = 1) -> int:
+    """
+    Get the version of a user's rules, changed by every add and remove.
+    
+    Args:
+        user_id: User identifier (default: 1)
+    
+    Returns:
+        Version counter of the user's rules
+    """
+    return _rules_versions.get(str(user_id), 0)
+
+def validate_rule(rule: Dict) -> None:
+    """
+    Check that a rule can be compiled.
+    
+    Args:
+        rule: Rule dictionary
+    
+    Raises:
+        ValueError: If the rule is malformed
+    """
+    if rule.get("type") not in RULE_TYPES:
+        raise ValueError(f"Rule type must be one of {', '.join(RULE_TYPES)}")
+    if not isinstance(rule.get("pattern"), str):
+        raise ValueError("Rule pattern must be a string")
+    if not isinstance(rule.get("categoryId"), int) or isinstance(rule["categoryId"], bool):
+        raise ValueError("Rule categoryId must be an integer")
+    if rule["type"] == "regex":
+        try:
+            re.compile(rule["pattern"])
+        except re.error as e:
+            raise ValueError(f"Invalid regex: {e}")
+        # Rules are compiled into one combined pattern, where backreferences
+        # would point to the wrong groups
+        if re.search(r"\\[1-9]|\(\?P=", rule["pattern"]):
+            raise ValueError("Backreferences are not supported in rules")
+    for bound in ("min_amount", "max_amount"):
+        value = rule.get(bound)
+        if value is not None and (not isinstance(value, (int, float)) or isinstance(value, bool)
+                                  or not math.isfinite(value)):
+            raise ValueError(f"Rule {bound} must be a number")
+
+def add_rule(rule: Dict, user_id: int = 1) -> Dict:
+    """
+    Add a categorization rule with the lowest priority.
+    
+    Args:
+        rule: Dictionary with type ('substring' or 'regex'), pattern,
+            categoryId and optional min_amount/max_amount
+        user_id: User identifier (default: 1)
+    
+    Returns:
+        The created rule
+    
+    Raises:
+        ValueError: If the rule is malformed
+    """
+    validate_rule(rule)
+    rules = rules_data["users"].setdefault(str(user_id), {"rules": []})["rules"]
+    
+    temp = {
+        "id": max((existing["id"] for existing in rules), default=0) + 1,
+        "type": rule["type"],
+        "pattern": rule["pattern"],
+        "categoryId": rule["categoryId"],
+        "min_amount": rule.get("min_amount"),
+        "max_amount": rule.get("max_amount")
+    }
+    rules.append(temp)
+    _rules_versions[str(user_id)] = get_rules_version(user_id) + 1
+    save_rules_data()
+    return temp
+
+def remove_rule(id: int, user_id: int = 1) -> bool:
+    """
+    Remove a categorization rule by ID.
+    
+    Args:
+        id: Rule ID
+        user_id: User identifier (default: 1)
+    
+    Returns:
+        True if the rule was removed, False if not found
+    """
+    rules = get_rules(user_id)
+    for rule in rules:
+        if rule["id"] == id:
+            rules.remove(rule)
+            _rules_versions[str(user_id)] = get_rules_version(user_id) + 1
+            save_rules_data()
+            return True
+    return False
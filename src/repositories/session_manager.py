@@ -1,9 +1,17 @@
 """
 User session management module.
-Stores information about the currently logged-in user.
+Stores information about the currently logged-in user and issues signed,
+short-lived session tokens that API clients can reuse instead of sending
+their password with every request.
 """
+import os
+import hmac
+import time
+import hashlib
 import logging
-from typing import Optional
+import secrets
+import threading
+from typing import Dict, Optional
 
 # Configure logger
 logger = logging.getLogger(__name__)
@@ -11,6 +19,15 @@ logger = logging.getLogger(__name__)
 # Default: no user is logged in (user_id = None)
 current_user_id = None
 
+# Token settings
+TOKEN_TTL_SECONDS = int(os.environ.get("SESSION_TOKEN_TTL", "3600"))
+# Without a configured secret, tokens are valid only for the lifetime of the process
+_token_secret = os.environ.get("SESSION_TOKEN_SECRET", "").encode('utf-8') or secrets.token_bytes(32)
+
+# Revoked token nonces mapped to their expiry time
+_revoked_tokens: Dict[str, int] = {}
+_revoked_lock = threading.Lock()
+
 def login_user(user_id: int) -> None:
     """
     Log in a user by storing their ID in the session.
@@ -47,4 +64,83 @@ def is_logged_in() -> bool:
     Returns:
         bool: True if a user is logged in, False otherwise
     """
-    return current_user_id is not None
\ No newline at end of file
+    return current_user_id is not None
+
+def _sign(payload: str) -> str:
+    return hmac.new(_token_secret, payload.encode('utf-8'), hashlib.sha256).hexdigest()
+
+def issue_token(user_id: int, ttl: Optional[int] = None) -> str:
+    """
+    Issue a signed session token for a user.
+    
+    Args:
+        user_id: The ID of the authenticated user
+        ttl: Lifetime in seconds (default: TOKEN_TTL_SECONDS)
+        
+    Returns:
+        str: Token in the form "<user_id>.<expires>.<nonce>.<signature>"
+    """
+    expires = int(time.time()) + (TOKEN_TTL_SECONDS if ttl is None else ttl)
+    payload = f"{int(user_id)}.{expires}.{secrets.token_hex(8)}"
+    logger.info(f"Session token issued: ID {user_id}")
+    return f"{payload}.{_sign(payload)}"
+
+def _parse_token(token: str) -> Optional[tuple]:
+    """
+    Check a token's signature and expiry.
+    
+    Returns:
+        tuple: (user_id, expires, nonce) or None if the token is invalid
+    """
+    try:
+        user_id, expires, nonce, signature = token.split('.')
+        payload = f"{user_id}.{expires}.{nonce}"
+        # Bytes, so a non-ASCII signature is a mismatch rather than a TypeError
+        if not hmac.compare_digest(signature.encode('utf-8'), _sign(payload).encode('utf-8')):
+            return None
+        if int(expires) < time.time():
+            return None
+        return int(user_id), int(expires), nonce
+    except (AttributeError, ValueError):
+        return None
+
+def verify_token(token: str) -> Optional[int]:
+    """
+    Validate a session token.
+    
+    Args:
+        token: Token returned by issue_token
+        
+    Returns:
+        int: User ID the token was issued for, or None if it is invalid,
+            expired or revoked
+    """
+    parsed = _parse_token(token)
+    if parsed is None or parsed[2] in _revoked_tokens:
+        return None
+    return parsed[0]
+
+def revoke_token(token: str) -> bool:
+    """
+    Revoke a session token before it expires.
+    
+    Args:
+        token: Token returned by issue_token
+        
+    Returns:
+        bool: True if a valid token was revoked, False otherwise
+    """
+    parsed = _parse_token(token)
+    if parsed is None:
+        return False
+    
+    user_id, expires, nonce = parsed
+    now = time.time()
+    with _revoked_lock:
+        # Expired tokens fail verification anyway, so their entries can go
+        for revoked_nonce, revoked_expires in list(_revoked_tokens.items()):
+            if revoked_expires < now:
+                del _revoked_tokens[revoked_nonce]
+        _revoked_tokens[nonce] = expires
+    logger.info(f"Session token revoked: ID {user_id}")
+    return True
@@ -2,15 +2,25 @@ import json
 import os
 import logging
 import bcrypt
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from typing import Dict, List, Optional, Union, Any
 
-from src.repositories.session_manager import login_user, logout_user
+from src.repositories.session_manager import login_user, logout_user, issue_token
 
 # Configure logger
 logger = logging.getLogger(__name__)
 
 # Constants
 USER_PATH = "data/users.json"
+BCRYPT_ROUNDS = int(os.environ.get("BCRYPT_ROUNDS", "12"))  # bcrypt cost factor for new hashes
+PASSWORD_WORKERS = int(os.environ.get("PASSWORD_WORKERS", "2"))
+
+# bcrypt releases the GIL while hashing. The pool caps how many CPU cores
+# authentication can take; hash_password and check_password still block the
+# calling request thread until the result is ready (the ASGI login in
+# src/asgi.py awaits the future instead)
+_password_executor = ThreadPoolExecutor(max_workers=PASSWORD_WORKERS, thread_name_prefix="bcrypt")
 
 # Check if file exists, if not - create it with empty list of users
 if not os.path.exists(USER_PATH):
@@ -27,6 +37,120 @@ except (json.JSONDecodeError, FileNotFoundError) as e:
     logger.error(f"Error loading user data: {e}")
     users_data = {"users": []}
 
+# Lookup indexes over users_data['users'], kept in sync by every mutation
+users_by_login: Dict[str, Dict] = {}
+users_by_id: Dict[int, Dict] = {}
+
+# Serializes changes to users_data, so concurrent registrations get distinct IDs
+_users_lock = threading.RLock()
+
+def _initial_user_id_sequence() -> int:
+    """
+    Compute the next free user ID for data saved before IDs were sequenced.
+    
+    Finances and categories of deleted users may still be stored under
+    their IDs, so those IDs are never handed out again either.
+    
+    Returns:
+        int: Next user ID
+    """
+    used = [user.get('user_id', 0) for user in users_data['users']]
+    for path in ("data/finances.json", "data/user_categories.json"):
+        try:
+            with open(path, "r") as file:
+                used.extend(int(key) for key in json.load(file).get("users", {}) if key.isdigit())
+        except (OSError, ValueError, AttributeError) as e:
+            logger.debug(f"Skipping {path} while sequencing user IDs: {e}")
+    return max(used, default=0) + 1
+
+if "next_user_id" not in users_data:
+    users_data["next_user_id"] = _initial_user_id_sequence()
+
+def allocate_user_id() -> int:
+    """
+    Take the next ID from the persisted user ID sequence.
+    
+    IDs only ever increase, so a new user never reuses the ID (and with it
+    the finances and categories) of a deleted one. The sequence is saved
+    together with the user data.
+    
+    Returns:
+        int: New user ID
+    """
+    with _users_lock:
+        user_id = users_data["next_user_id"]
+        users_data["next_user_id"] = user_id + 1
+        return user_id
+
+def rebuild_user_indexes() -> None:
+    """
+    Rebuild the login and user ID indexes from users_data.
+    """
+    users_by_login.clear()
+    users_by_id.clear()
+    for user in users_data['users']:
+        # Keep the first entry on duplicates, as a linear scan would
+        users_by_login.setdefault(user['login'], user)
+        if 'user_id' in user:
+            users_by_id.setdefault(user['user_id'], user)
+
+rebuild_user_indexes()
+
+def submit_hash_password(password: str) -> Future:
+    """
+    Hash a password on the password worker pool.
+    
+    Args:
+        password: Plain text password
+        
+    Returns:
+        Future resolving to the bcrypt hash as a string
+    """
+    password_bytes = password.encode('utf-8')
+    return _password_executor.submit(
+        lambda: bcrypt.hashpw(password_bytes, bcrypt.gensalt(rounds=BCRYPT_ROUNDS)).decode('utf-8')
+    )
+
+def submit_check_password(password: str, hashed_password: str) -> Future:
+    """
+    Verify a password against a bcrypt hash on the password worker pool.
+    
+    Args:
+        password: Plain text password
+        hashed_password: Stored bcrypt hash
+        
+    Returns:
+        Future resolving to True if the password matches
+    """
+    return _password_executor.submit(
+        bcrypt.checkpw, password.encode('utf-8'), hashed_password.encode('utf-8')
+    )
+
+def hash_password(password: str) -> str:
+    """
+    Hash a password with the configured cost factor.
+    
+    Args:
+        password: Plain text password
+        
+    Returns:
+        str: bcrypt hash
+    """
+    return submit_hash_password(password).result()
+
+def check_password(password: str, hashed_password: str) -> bool:
+    """
+    Verify a password against a bcrypt hash.
+    
+    Args:
+        password: Plain text password
+        hashed_password: Stored bcrypt hash
+        
+    Returns:
+        bool: True if the password matches
+    """
+    return submit_check_password(password, hashed_password).result()
+
 def save_users_data() -> None:
     """
     Save user data to JSON file.
@@ -68,10 +192,19 @@ def get_user_by_login(login: str) -> Optional[Dict]:
     Returns:
         User dictionary or None if not found
     """
-    for user in users_data['users']:
-        if user['login'] == login:
-            return user
-    return None
+    return users_by_login.get(login)
+
+def get_user_by_id(user_id: int) -> Optional[Dict]:
+    """
+    Find a user by ID.
+    
+    Args:
+        user_id: User identifier
+        
+    Returns:
+        User dictionary or None if not found
+    """
+    return users_by_id.get(user_id)
 
 def register(data: Dict) -> Dict:
     """
@@ -96,18 +229,28 @@ def register(data: Dict) -> Dict:
         return {"success": False, "error": f"User with login '{data['login']}' already exists"}
     
     try:
-        password_bytes = data['password'].encode('utf-8')
-        user = {
-            "login": data['login'],
-            "name": data['name'],
-            "last_name": data['last_name'],
-            "email": data['email'],
-            "password": bcrypt.hashpw(password_bytes, bcrypt.gensalt()).decode('utf-8'),
-            "user_id": len(users_data['users']) + 1  # Simple ID generation
-        }
+        # Hash outside the lock; it is the slow part of registration
+        password_hash = hash_password(data['password'])
         
-        users_data['users'].append(user)
-        save_users_data()
+        with _users_lock:
+            # Another registration may have taken the login meanwhile
+            if get_user_by_login(data['login']):
+                logger.warning(f"Registration failed: User with login '{data['login']}' already exists")
+                return {"success": False, "error": f"User with login '{data['login']}' already exists"}
+            
+            user = {
+                "login": data['login'],
+                "name": data['name'],
+                "last_name": data['last_name'],
+                "email": data['email'],
+                "password": password_hash,
+                "user_id": allocate_user_id()
+            }
+            
+            users_data['users'].append(user)
+            users_by_login[user['login']] = user
+            users_by_id[user['user_id']] = user
+            save_users_data()
         logger.info(f"User registered successfully: {data['login']}")
         return {"success": True}
     except Exception as e:
@@ -131,10 +274,7 @@ def login(login: str, password: str) -> bool:
         return False
 
     try:
-        password_bytes = password.encode('utf-8')
-        hashed_password = user['password'].encode('utf-8')
-
-        if not bcrypt.checkpw(password_bytes, hashed_password):
+        if not check_password(password, user['password']):
             logger.warning(f"Login failed: Invalid password for user '{login}'")
             return False
 
@@ -146,6 +286,24 @@ def login(login: str, password: str) -> bool:
         logger.error(f"Login error: {str(e)}")
         return False
 
+def login_with_token(login_name: str, password: str) -> Optional[str]:
+    """
+    Authenticate user, create session and issue a session token.
+    
+    The token lets API clients authenticate later requests with a cheap
+    signature check instead of a bcrypt verification.
+    
+    Args:
+        login_name: User's login name
+        password: User's password
+        
+    Returns:
+        str: Session token, or None if login failed
+    """
+    if not login(login_name, password):
+        return None
+    return issue_token(get_user_by_login(login_name).get('user_id', 1))
+
 def update_user(login: str, data: Dict) -> bool:
     """
     Update user information.
@@ -168,8 +326,7 @@ def update_user(login: str, data: Dict) -> bool:
                 user[key] = value
                 
         if 'password' in data and data['password']:
-            password_bytes = data['password'].encode('utf-8')
-            user['password'] = bcrypt.hashpw(password_bytes, bcrypt.gensalt()).decode('utf-8')
+            user['password'] = hash_password(data['password'])
             
         save_users_data()
         logger.info(f"User updated: {login}")
@@ -194,8 +351,10 @@ def delete_user(login: str) -> bool:
         return False
     
     try:    
-        users_data['users'].remove(user)
-        save_users_data()
+        with _users_lock:
+            users_data['users'].remove(user)
+            rebuild_user_indexes()
+            save_users_data()
         logger.info(f"User deleted: {login}")
         return True
     except Exception as e:
@@ -212,11 +371,12 @@ def migrate_legacy_user() -> None:
             with open(legacy_path, "r") as file:
                 legacy_data = json.load(file)
                 
-            if "user" in legacy_data and legacy_data["user"] and not any(user["login"] == legacy_data["user"]["login"] for user in users_data["users"]):
+            if "user" in legacy_data and legacy_data["user"] and legacy_data["user"]["login"] not in users_by_login:
                 user_data = legacy_data["user"].copy()
                 # Add ID to old user
                 user_data["user_id"] = 1
                 users_data["users"].append(user_data)
+                rebuild_user_indexes()
                 save_users_data()
                 logger.info("Migrated user data from old format")
         except Exception as e:
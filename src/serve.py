@@ -0,0 +1,117 @@
+"""
+Headless production server for the budget API.
+
+Serves src.server.app with waitress, a production WSGI server, without the
+desktop window, so several devices in the household can use the same
+instance:
+
+    python -m src.serve [--host 0.0.0.0] [--port 5000] [--threads 8] [--asgi]
+
+Requests are handled by a pool of threads in a single process. The
+repositories keep their data and indexes in process memory and write whole
+JSON files, so several worker processes would each see different data and
+overwrite each other's changes; scale with --threads instead. Other WSGI
+servers can load src.wsgi:application under the same constraint (one
+worker process, several threads).
+
+With --asgi the ASGI application of src/asgi.py is served with uvicorn
+instead: login, the streamed PDF report and the live event streams then
+wait on the event loop without holding a thread, and the other requests
+run on its thread pool (ASGI_THREADS).
+"""
+import os
+import sys
+import logging
+import argparse
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Configure logger
+logger = logging.getLogger(__name__)
+
+# Constants
+SERVER_HOST = os.environ.get("SERVER_HOST", "0.0.0.0")
+SERVER_PORT = int(os.environ.get("SERVER_PORT", "5000"))
+SERVER_THREADS = int(os.environ.get("SERVER_THREADS", "8"))
+SERVER_CONNECTION_LIMIT = int(os.environ.get("SERVER_CONNECTION_LIMIT", "100"))
+SERVER_CHANNEL_TIMEOUT = int(os.environ.get("SERVER_CHANNEL_TIMEOUT", "30"))
+
+
+def run_server(
+    host: str = SERVER_HOST,
+    port: int = SERVER_PORT,
+    threads: int = SERVER_THREADS,
+    connection_limit: int = SERVER_CONNECTION_LIMIT,
+    channel_timeout: int = SERVER_CHANNEL_TIMEOUT,
+    use_asgi: bool = False
+) -> None:
+    """
+    Serve the application until the process is stopped.
+
+    Args:
+        host: Interface to listen on
+        port: Port to listen on
+        threads: Number of request handling threads (WSGI only; the ASGI
+            application sizes its pool with ASGI_THREADS)
+        connection_limit: Maximum number of simultaneous connections
+        channel_timeout: Seconds an idle keep-alive connection, or a request
+            that stopped sending data, is kept open
+        use_asgi: Serve src.asgi:application with uvicorn
+    """
+    if use_asgi:
+        try:
+            import uvicorn
+        except ImportError:
+            logger.warning("uvicorn is not installed, serving the WSGI application instead")
+        else:
+            logger.info(f"Serving the ASGI application on http://{host}:{port}")
+            uvicorn.run(
+                "src.asgi:application",
+                host=host,
+                port=port,
+                workers=1,
+                limit_concurrency=connection_limit,
+                timeout_keep_alive=channel_timeout,
+                server_header=False
+            )
+            return
+
+    from src.server import app
+
+    try:
+        from waitress import serve
+    except ImportError:
+        logger.warning("waitress is not installed, falling back to the threaded development server")
+        app.run(host=host, port=port, debug=False, threaded=True, use_reloader=False)
+        return
+
+    logger.info(f"Serving on http://{host}:{port} with {threads} threads")
+    serve(
+        app,
+        host=host,
+        port=port,
+        threads=threads,
+        connection_limit=connection_limit,
+        channel_timeout=channel_timeout,
+        ident="budget-assistant"
+    )
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description="Serve the budget API without the desktop window")
+    parser.add_argument('--host', default=SERVER_HOST, help=f"Interface to listen on (default: {SERVER_HOST})")
+    parser.add_argument('--port', type=int, default=SERVER_PORT, help=f"Port (default: {SERVER_PORT})")
+    parser.add_argument('--threads', type=int, default=SERVER_THREADS,
+                        help=f"Request handling threads (default: {SERVER_THREADS})")
+    parser.add_argument('--connection-limit', type=int, default=SERVER_CONNECTION_LIMIT,
+                        help=f"Maximum simultaneous connections (default: {SERVER_CONNECTION_LIMIT})")
+    parser.add_argument('--timeout', type=int, default=SERVER_CHANNEL_TIMEOUT,
+                        help=f"Idle keep-alive and stalled request timeout in seconds (default: {SERVER_CHANNEL_TIMEOUT})")
+    parser.add_argument('--asgi', action='store_true',
+                        help="Serve the ASGI application (src.asgi:application) with uvicorn")
+    args = parser.parse_args()
+
+    run_server(args.host, args.port, args.threads, args.connection_limit, args.timeout, args.asgi)
@@ -1,8 +1,10 @@
 import os
 import sys
+import time
 import logging
-from datetime import datetime, timedelta
-from typing import Dict, Any, Optional, Union
+import secrets
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, Callable, Optional, Tuple, Union
 
 from flask import (
     Flask, 
@@ -14,7 +16,9 @@ from flask import (
     url_for, 
     session, 
     make_response,
-    request
+    request,
+    Response,
+    g
 )
 
 # Set up paths
@@ -34,15 +38,55 @@ from src.repositories.finance_repository import (
     get_month_spending, 
     get_all_spending, 
     get_all_incomes, 
-    remove_spending_by_id
+    remove_spending_by_id,
+    get_month_category_rollups,
+    add_spending_batch,
+    get_user_finance_data,
+    search_spending,
+    get_dashboard_summary,
+    get_finance_version,
+    get_finance_last_modified,
+    apply_spending_batch,
+    apply_income_batch,
+    BatchError,
+    update_spending,
+    update_income
+)
+from src.repositories.categories_repository import (
+    get_all_categories, add_category, remove_category_by_name,
+    get_category_by_name, get_category_by_id, remove_category, merge_categories, set_category_parent,
+    get_categories_version, get_categories_last_modified
+)
+from src.repositories.recurring_repository import (
+    get_recurring_rules, add_recurring_rule, remove_recurring_rule
+)
+from src.repositories.rules_repository import get_rules, add_rule, remove_rule, get_rules_version
+from src.repositories.users_repository import is_user, login_with_token, register
+from src.repositories.session_manager import (
+    get_current_user_id,
+    is_logged_in,
+    logout_user,
+    verify_token,
+    revoke_token,
+    TOKEN_TTL_SECONDS
 )
-from src.repositories.categories_repository import get_all_categories, add_category, remove_category_by_name
-from src.repositories.users_repository import is_user, login, register
-from src.repositories.session_manager import get_current_user_id, is_logged_in, logout_user
 from src.repositories.raport_repository import get_report_link
 
 # Utility imports
-from src.utils.generate_pdf import generate_pdf
+from src.utils.validation.validate_date import validate_date
+from src.utils.budget_alerts import get_alerts, get_budget_status
+from src.utils.event_stream import open_stream, RECONNECT_MILLISECONDS
+from src.utils.http_output import init_output
+from src.utils.static_assets import asset_path, send_asset, send_fingerprinted
+from src.utils.rate_limit import auth_limit, report_limit
+from src.utils.auto_categorize import categorize, propose_rules
+from src.utils.report_jobs import submit_report, submit_batch, get_job
+from src.utils.generate_pdf import (
+    report_sources,
+    monthly_report_version,
+    render_monthly_report,
+    pdf_to_bytes
+)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -52,15 +96,109 @@ logger = logging.getLogger(__name__)
 app = Flask(__name__, static_folder=os.path.join(BASE_DIR, 'static'), template_folder='templates')
 app.secret_key = 'your_secret_key_here'  # Add a secret key for sessions
 
+# orjson serialization and gzip/brotli compression of responses
+init_output(app)
+
+def bearer_token() -> Optional[str]:
+    """
+    Helper function to get the session token sent with the request
+    
+    Returns:
+        str: Token from the "Authorization: Bearer" header, or None
+    """
+    auth = request.headers.get('Authorization', '')
+    if auth.startswith('Bearer '):
+        return auth[len('Bearer '):].strip()
+    return None
+
+@app.before_request
+def authenticate_token():
+    """Resolve the user of a request that carries a session token"""
+    token = bearer_token()
+    if token is None:
+        return None
+    
+    user_id = verify_token(token)
+    if user_id is None:
+        return jsonify({'success': False, 'error': 'Invalid or expired token'}), 401
+    g.token_user_id = user_id
+    return None
+
 def current_user_id() -> int:
     """
     Helper function to get the current user ID
     
     Returns:
-        int: Current user ID
+        int: User ID of the request's session token, or the current session user
     """
+    token_user_id = g.get('token_user_id')
+    if token_user_id is not None:
+        return token_user_id
     return get_current_user_id()
 
+# Part of every ETag, so validators issued before a restart (when the data
+# version counters started over) never match
+ETAG_EPOCH = secrets.token_hex(4)
+
+def finance_state(user_id: int) -> Tuple[Tuple[int, ...], float]:
+    """
+    Helper function to get the validators of reads of a user's transactions
+    
+    Returns:
+        tuple: ((finance version, categories version), time of the last change)
+    """
+    versions = (get_finance_version(user_id), get_categories_version(user_id))
+    last_modified = max(get_finance_last_modified(user_id), get_categories_last_modified(user_id))
+    return versions, last_modified
+
+def conditional_json(
+    user_id: int,
+    versions: Tuple[int, ...],
+    last_modified: Optional[float],
+    build: Callable[[], Dict],
+    daily: bool = False
+):
+    """
+    Helper function to answer a read with 304 Not Modified when the client's
+    copy is current, building and serializing the payload only otherwise
+    
+    Args:
+        user_id: User the data belongs to
+        versions: Versions of the data the payload is computed from
+        last_modified: Unix time of the data's last change, or None to send
+            only an ETag
+        build: Function returning the payload
+        daily: The payload depends on today's date (e.g. "this month")
+    
+    Returns:
+        Response with ETag, Last-Modified and Cache-Control headers
+    """
+    parts = [ETAG_EPOCH, user_id, *versions]
+    if daily:
+        today = datetime.now().date()
+        parts.append(today.isoformat())
+        if last_modified is not None:
+            last_modified = max(last_modified, datetime.combine(today, datetime.min.time()).timestamp())
+    etag = "-".join(str(part) for part in parts)
+    modified = datetime.fromtimestamp(int(last_modified), timezone.utc) if last_modified is not None else None
+    
+    if request.if_none_match:
+        # Weak comparison: compressed responses carry the ETag as weak
+        not_modified = request.if_none_match.contains_weak(etag)
+    else:
+        # HTTP dates have whole seconds, so a change in the current second
+        # could still be followed by another one with the same date
+        since = request.if_modified_since
+        not_modified = (modified is not None and since is not None and modified <= since
+                        and int(last_modified) < int(time.time()))
+    
+    response = make_response('', 304) if not_modified else make_response(jsonify(build()))
+    response.set_etag(etag)
+    if modified is not None:
+        response.last_modified = modified
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
 #
 # Page Routes
 #
@@ -96,15 +234,33 @@ def categories():
 # Static Assets Routes
 #
 
+@app.template_global()
+def asset_url(filename: str) -> str:
+    """
+    Fingerprinted URL of a static file, for templates
+    
+    Args:
+        filename: Path relative to the static folder, e.g. "css/style.css"
+        
+    Returns:
+        str: URL under /assets that can be cached as immutable
+    """
+    return asset_path(app.static_folder, filename)
+
+@app.route('/assets/<path:filename>')
+def fingerprinted_files(filename):
+    """Serve static files by fingerprinted URL, cached for a year as immutable"""
+    return send_fingerprinted(app.static_folder, filename)
+
 @app.route('/favicon.ico')
 def favicon():
     """Serve the favicon"""
-    return send_from_directory(app.static_folder, 'favicon.ico', mimetype='image/vnd.microsoft.icon')
+    return send_asset(app.static_folder, 'favicon.ico', mimetype='image/vnd.microsoft.icon')
 
 @app.route('/<path:filename>')
 def static_files(filename):
-    """Serve static files"""
-    return send_from_directory(app.static_folder, filename)
+    """Serve static files (revalidated on each use; pages link them through asset_url)"""
+    return send_asset(app.static_folder, filename)
 
 #
 # API Routes - Income
@@ -125,6 +281,29 @@ def delete_income(id):
         logger.error(f"Error deleting income {id}: {e}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/api/incomes/<int:id>', methods=['PATCH'])
+def patch_income(id):
+    """
+    Change some fields of an income record
+    
+    Expected JSON: any of {"amount", "date", "currency", "note"}
+    
+    Args:
+        id: Income ID to change
+    """
+    try:
+        data = request.json
+        if not data:
+            raise ValueError("No fields to change")
+        user_id = current_user_id()
+        income = update_income(id, data, user_id)
+        if income is None:
+            return jsonify({"success": False, "message": "Income not found"}), 404
+        return jsonify({"success": True, "income": income, "version": get_finance_version(user_id)})
+    except Exception as e:
+        logger.error(f"Error updating income {id}: {e}")
+        return jsonify({"success": False, "message": str(e)}), 400
+
 @app.route('/api/incomes', methods=['POST'])
 def add_income_route():
     """Add a new income record"""
@@ -145,24 +324,52 @@ def add_income_route():
         logger.error(f"Error adding income: {e}")
         return jsonify({"success": False, "message": str(e)}), 400
 
+@app.route('/api/incomes/batch', methods=['POST'])
+def income_batch_route():
+    """
+    Create, update and delete income records in one atomic request with a single write
+    
+    Expected JSON: {"operations": [{"op": "create", "data": {"amount", "date", "currency"?, "note"?}},
+                                   {"op": "update", "id": number, "data": {changed fields}},
+                                   {"op": "delete", "id": number}]}
+    
+    If any operation is invalid nothing is applied and the errors are
+    returned per operation index.
+    """
+    try:
+        data = request.json
+        if not data or not isinstance(data.get("operations"), list):
+            raise ValueError("A list of operations is required")
+        results = apply_income_batch(data["operations"], current_user_id())
+        return jsonify({"success": True, "results": results})
+    except BatchError as e:
+        return jsonify({"success": False, "message": str(e), "errors": e.errors}), 400
+    except Exception as e:
+        logger.error(f"Error applying income batch: {e}")
+        return jsonify({"success": False, "message": str(e)}), 400
+
 @app.route('/api/incomes/this_month', methods=['GET'])
 def get_incomes_this_month():
     """
     Get the total sum of incomes for the current month
     """
     try:
-        all_incomes = get_all_incomes(current_user_id())
-        today = datetime.now()
-        current_month_start = today.replace(day=1)
-        
-        monthly_incomes = [
-            income for income in all_incomes
-            if datetime.strptime(income['date'], "%Y-%m-%d") >= current_month_start
-        ]
+        user_id = current_user_id()
         
-        total = sum(income['amount'] for income in monthly_incomes)
+        def build():
+            all_incomes = get_all_incomes(user_id)
+            today = datetime.now()
+            current_month_start = today.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+            
+            monthly_incomes = [
+                income for income in all_incomes
+                if datetime.strptime(income['date'], "%Y-%m-%d") >= current_month_start
+            ]
+            
+            total = sum(income['amount'] for income in monthly_incomes)
+            return {"success": True, "total": total}
         
-        return jsonify({"success": True, "total": total})
+        return conditional_json(user_id, *finance_state(user_id), build, daily=True)
     except Exception as e:
         logger.error(f"Error calculating income: {e}")
         return jsonify({"success": False, "message": str(e)}), 500
@@ -173,12 +380,13 @@ def get_incomes_this_month_list():
     Get a list of all income records for the current month
     """
     try:
+        user_id = current_user_id()
         now = datetime.now()
-        current_year = now.year
-        current_month = now.month
-        incomes = get_month_income(current_month, current_year, current_user_id())  
-        
-        return jsonify({'incomes': incomes})
+        return conditional_json(
+            user_id, *finance_state(user_id),
+            lambda: {'incomes': get_month_income(now.month, now.year, user_id)},
+            daily=True
+        )
     except Exception as e:
         logger.error(f"Error retrieving incomes: {e}")
         return jsonify({"error": str(e)}), 500
@@ -195,11 +403,18 @@ def add_expense_route():
         if not data:
             raise ValueError("No data provided")
 
+        category = data.get("category")
+        if category is None:
+            # Without an explicit category, use the user's categorization rules
+            category = categorize([data], current_user_id())[0]
+            if category is None:
+                raise ValueError("Category is required, no categorization rule matched")
+
         new_expense = add_spending({
             "name": data["name"],
             "amount": float(data["amount"]),
             "currency": "PLN",
-            "category": int(data["category"]),
+            "category": int(category),
             "date": data["date"],
             "note": data.get("description", "")
         }, current_user_id())
@@ -209,6 +424,88 @@ def add_expense_route():
         logger.error(f"Error adding expense: {e}")
         return jsonify({"success": False, "message": str(e)}), 400
 
+@app.route('/api/expenses/import', methods=['POST'])
+def import_expenses_route():
+    """
+    Import many expenses at once, e.g. from a bank statement
+    
+    Expected JSON: {"expenses": [{"name", "amount", "date", "description"?, "category"?}],
+                    "defaultCategory": id (optional)}
+    
+    Expenses without a category are categorized by the user's rules; those
+    no rule matches get defaultCategory, or the "Inne" category.
+    """
+    try:
+        data = request.json
+        if not data or not isinstance(data.get("expenses"), list):
+            raise ValueError("A list of expenses is required")
+        user_id = current_user_id()
+        expenses = data["expenses"]
+
+        pending = [expense for expense in expenses if expense.get("category") is None]
+        suggested = iter(categorize(pending, user_id))
+        default_category = data.get("defaultCategory")
+        if default_category is None:
+            fallback = get_category_by_name("Inne", user_id)
+            default_category = fallback["id"] if fallback else None
+
+        rows = []
+        auto_categorized = defaulted = 0
+        for position, expense in enumerate(expenses):
+            category = expense.get("category")
+            if category is None:
+                category = next(suggested)
+                if category is not None:
+                    auto_categorized += 1
+                elif default_category is not None:
+                    category = default_category
+                    defaulted += 1
+                else:
+                    raise ValueError(f"No category for row {position + 1}")
+            rows.append({
+                "name": expense["name"],
+                "amount": float(expense["amount"]),
+                "currency": expense.get("currency", "PLN"),
+                "category": int(category),
+                "date": expense["date"],
+                "note": expense.get("description", "")
+            })
+
+        created = add_spending_batch(rows, user_id)
+        return jsonify({
+            "success": True,
+            "imported": len(created),
+            "auto_categorized": auto_categorized,
+            "defaulted": defaulted
+        })
+    except Exception as e:
+        logger.error(f"Error importing expenses: {e}")
+        return jsonify({"success": False, "message": str(e)}), 400
+
+@app.route('/api/expenses/batch', methods=['POST'])
+def expense_batch_route():
+    """
+    Create, update and delete expenses in one atomic request with a single write
+    
+    Expected JSON: {"operations": [{"op": "create", "data": {"name", "amount", "category", "date", "currency"?, "note"?}},
+                                   {"op": "update", "id": number, "data": {changed fields}},
+                                   {"op": "delete", "id": number}]}
+    
+    If any operation is invalid nothing is applied and the errors are
+    returned per operation index.
+    """
+    try:
+        data = request.json
+        if not data or not isinstance(data.get("operations"), list):
+            raise ValueError("A list of operations is required")
+        results = apply_spending_batch(data["operations"], current_user_id())
+        return jsonify({"success": True, "results": results})
+    except BatchError as e:
+        return jsonify({"success": False, "message": str(e), "errors": e.errors}), 400
+    except Exception as e:
+        logger.error(f"Error applying expense batch: {e}")
+        return jsonify({"success": False, "message": str(e)}), 400
+
 @app.route('/api/expenses/<int:expense_id>', methods=['DELETE'])
 def delete_expense(expense_id):
     """
@@ -224,18 +521,45 @@ def delete_expense(expense_id):
         logger.error(f"Error deleting expense {expense_id}: {e}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/api/expenses/<int:expense_id>', methods=['PATCH'])
+def patch_expense(expense_id):
+    """
+    Change some fields of an expense
+    
+    Expected JSON: any of {"name", "amount", "category", "date", "currency",
+                           "note" (or "description", as for POST /api/expenses)}
+    
+    Args:
+        expense_id: Expense ID to change
+    """
+    try:
+        data = request.json
+        if not data:
+            raise ValueError("No fields to change")
+        if "description" in data:
+            data["note"] = data.pop("description")
+        user_id = current_user_id()
+        expense = update_spending(expense_id, data, user_id)
+        if expense is None:
+            return jsonify({"success": False, "message": "Expense not found"}), 404
+        return jsonify({"success": True, "expense": expense, "version": get_finance_version(user_id)})
+    except Exception as e:
+        logger.error(f"Error updating expense {expense_id}: {e}")
+        return jsonify({"success": False, "message": str(e)}), 400
+
 @app.route('/api/expenses/this_month/list', methods=['GET'])
 def get_expenses_this_month_list():
     """
     Get a list of all expense records for the current month
     """
     try:
+        user_id = current_user_id()
         now = datetime.now()
-        current_year = now.year
-        current_month = now.month
-        expenses = get_month_spending(current_month, current_year, current_user_id())  
-
-        return jsonify({'expenses': expenses})
+        return conditional_json(
+            user_id, *finance_state(user_id),
+            lambda: {'expenses': get_month_spending(now.month, now.year, user_id)},
+            daily=True
+        )
     except Exception as e:
         logger.error(f"Error retrieving expenses: {e}")
         return jsonify({"error": str(e)}), 500
@@ -246,23 +570,85 @@ def get_expenses_last_30_days():
     Get the total sum of expenses for the last 30 days
     """
     try:
-        all_expenses = get_all_spending(current_user_id())
+        user_id = current_user_id()
         
-        today = datetime.now()
-        thirty_days_ago = today - timedelta(days=30)
-        
-        recent_expenses = [
-            expense for expense in all_expenses
-            if datetime.strptime(expense['date'], "%Y-%m-%d") >= thirty_days_ago
-        ]
+        def build():
+            all_expenses = get_all_spending(user_id)
+            
+            today = datetime.now()
+            thirty_days_ago = today - timedelta(days=30)
+            
+            recent_expenses = [
+                expense for expense in all_expenses
+                if datetime.strptime(expense['date'], "%Y-%m-%d") >= thirty_days_ago
+            ]
+            
+            total = sum(expense['amount'] for expense in recent_expenses)
+            return {"success": True, "total": total}
         
-        total = sum(expense['amount'] for expense in recent_expenses)
-        
-        return jsonify({"success": True, "total": total})
+        return conditional_json(user_id, *finance_state(user_id), build, daily=True)
     except Exception as e:
         logger.error(f"Error calculating expenses: {e}")
         return jsonify({"success": False, "message": str(e)}), 500
 
+@app.route('/api/search', methods=['GET'])
+def search_expenses():
+    """
+    Search expenses by words of their name or note
+    
+    Query parameters:
+        q: Words to look for; each also matches longer words it starts
+        from, to: Date range (YYYY-MM-DD), inclusive
+        category: Category ID, including its subcategories
+        limit: Maximum number of results (default: 100)
+    """
+    try:
+        query = request.args.get('q', '').strip()
+        if not query:
+            raise ValueError("Query parameter q is required")
+        for name in ('from', 'to'):
+            value = request.args.get(name)
+            if value and not validate_date(value):
+                raise ValueError(f"Invalid date in parameter {name}")
+        
+        user_id = current_user_id()
+        return conditional_json(user_id, *finance_state(user_id), lambda: {
+            "success": True,
+            "expenses": search_spending(
+                query,
+                user_id,
+                date_from=request.args.get('from'),
+                date_to=request.args.get('to'),
+                category_id=request.args.get('category', type=int),
+                limit=request.args.get('limit', default=100, type=int)
+            )
+        })
+    except Exception as e:
+        logger.error(f"Error searching expenses: {e}")
+        return jsonify({"success": False, "message": str(e)}), 400
+
+#
+# API Routes - Dashboard
+#
+
+@app.route('/api/dashboard', methods=['GET'])
+def get_dashboard():
+    """
+    Get the data of the expense and income pages in one request: the
+    month's incomes total and list, the month's expenses, the last 30 days'
+    expense total and the categories
+    """
+    try:
+        user_id = current_user_id()
+        return conditional_json(user_id, *finance_state(user_id), lambda: {
+            "success": True,
+            **get_dashboard_summary(user_id),
+            "categories": get_all_categories(user_id)
+        }, daily=True)
+    except Exception as e:
+        logger.error(f"Error building dashboard: {e}")
+        return jsonify({"success": False, "message": str(e)}), 500
+
 #
 # API Routes - Categories
 #
@@ -270,8 +656,13 @@ def get_expenses_last_30_days():
 @app.route('/api/categories', methods=['GET'])
 def get_categories():
     """Get all available expense categories"""
-    categories = get_all_categories(current_user_id())
-    return jsonify({"categories": categories})
+    user_id = current_user_id()
+    return conditional_json(
+        user_id,
+        (get_categories_version(user_id),),
+        get_categories_last_modified(user_id),
+        lambda: {"categories": get_all_categories(user_id)}
+    )
 
 @app.route('/api/categories', methods=['POST'])
 def api_add_category():
@@ -280,7 +671,8 @@ def api_add_category():
         data = request.json
         if not data or "name" not in data:
             raise ValueError("Category name is required")
-        add_category(data["name"], current_user_id())
+        parent_id = data.get("parentId")
+        add_category(data["name"], current_user_id(), int(parent_id) if parent_id is not None else None)
         return jsonify({"success": True, "message": "Category added successfully"})
     except Exception as e:
         logger.error(f"Error adding category: {e}")
@@ -293,19 +685,267 @@ def api_remove_category(name):
     
     Args:
         name: Category name to delete
+        
+    Query parameters:
+        reassign_to: ID of the category that takes over the expenses
     """
     try:
-        remove_category_by_name(name, current_user_id())
+        reassign_to = request.args.get('reassign_to', type=int)
+        if reassign_to is None:
+            remove_category_by_name(name, current_user_id())
+        else:
+            category = get_category_by_name(name, current_user_id())
+            if category is None:
+                return jsonify({"success": False, "message": "Category not found"}), 404
+            remove_category(category['id'], current_user_id(), reassign_to=reassign_to)
         return jsonify({"success": True, "message": "Category removed successfully"})
     except Exception as e:
         logger.error(f"Error removing category: {e}")
         return jsonify({"success": False, "message": str(e)}), 400
 
+@app.route('/api/categories/<int:id>/parent', methods=['PUT'])
+def api_set_category_parent(id):
+    """
+    Move a category under another one
+    
+    Expected JSON: {"parentId": 5} or {"parentId": null} for a top-level category
+    """
+    try:
+        data = request.json
+        if not data or "parentId" not in data:
+            raise ValueError("parentId is required")
+        parent_id = int(data["parentId"]) if data["parentId"] is not None else None
+        if not set_category_parent(id, parent_id, current_user_id()):
+            return jsonify({"success": False, "message": "Category not found"}), 404
+        return jsonify({"success": True, "message": "Category moved successfully"})
+    except Exception as e:
+        logger.error(f"Error moving category: {e}")
+        return jsonify({"success": False, "message": str(e)}), 400
+
+@app.route('/api/categories/rollups', methods=['GET'])
+def api_category_rollups():
+    """
+    Get the month's spending per category, including subcategories
+    
+    Query parameters:
+        month: Month (1-12), default current month
+        year: Year, default current year
+    """
+    try:
+        today = datetime.now()
+        month = request.args.get('month', default=today.month, type=int)
+        year = request.args.get('year', default=today.year, type=int)
+        if not 1 <= month <= 12:
+            raise ValueError("Invalid month")
+        user_id = current_user_id()
+        
+        def build():
+            rollups = get_month_category_rollups(month, year, user_id)
+            return {"success": True, "month": month, "year": year,
+                    "rollups": {str(id): totals for id, totals in rollups.items()}}
+        
+        # Without an explicit month the payload follows the calendar
+        daily = 'month' not in request.args or 'year' not in request.args
+        return conditional_json(user_id, *finance_state(user_id), build, daily=daily)
+    except Exception as e:
+        logger.error(f"Error computing category rollups: {e}")
+        return jsonify({"success": False, "message": str(e)}), 400
+
+@app.route('/api/categories/merge', methods=['POST'])
+def api_merge_categories():
+    """
+    Merge categories into a target category, moving their expenses
+    
+    Expected JSON: {"source_ids": [2, 3], "target_id": 1}
+    """
+    try:
+        data = request.json
+        if not data or "source_ids" not in data or "target_id" not in data:
+            raise ValueError("source_ids and target_id are required")
+        moved = merge_categories([int(id) for id in data["source_ids"]], int(data["target_id"]),
+                                 current_user_id())
+        return jsonify({"success": True, "moved": moved, "message": "Categories merged successfully"})
+    except Exception as e:
+        logger.error(f"Error merging categories: {e}")
+        return jsonify({"success": False, "message": str(e)}), 400
+
+#
+# API Routes - Categorization Rules
+#
+
+@app.route('/api/rules', methods=['GET'])
+def get_rules_route():
+    """Get the user's categorization rules in priority order"""
+    user_id = current_user_id()
+    return conditional_json(user_id, (get_rules_version(user_id),), None,
+                            lambda: {"rules": get_rules(user_id)})
+
+@app.route('/api/rules', methods=['POST'])
+def add_rule_route():
+    """
+    Add a categorization rule
+    
+    Expected JSON: {"type": "substring" | "regex", "pattern": "string", "categoryId": number,
+                    "min_amount": number (optional), "max_amount": number (optional)}
+    """
+    try:
+        data = request.json
+        if not data:
+            raise ValueError("No data provided")
+        if get_category_by_id(data.get("categoryId"), current_user_id()) is None:
+            raise ValueError("Category not found")
+        rule = add_rule(data, current_user_id())
+        return jsonify({"success": True, "rule": rule})
+    except Exception as e:
+        logger.error(f"Error adding categorization rule: {e}")
+        return jsonify({"success": False, "message": str(e)}), 400
+
+@app.route('/api/rules/<int:id>', methods=['DELETE'])
+def remove_rule_route(id):
+    """
+    Remove a categorization rule
+    
+    Args:
+        id: Rule ID
+    """
+    if not remove_rule(id, current_user_id()):
+        return jsonify({"success": False, "message": "Rule not found"}), 404
+    return jsonify({"success": True, "message": "Rule removed successfully"})
+
+@app.route('/api/rules/proposals', methods=['GET'])
+def propose_rules_route():
+    """
+    Propose rules learned from the user's categorized expenses
+    
+    Query parameters:
+        min_support: Minimum number of expenses with the same name (default: 3)
+        min_confidence: Minimum share of them in one category (default: 0.9)
+    """
+    try:
+        user_id = current_user_id()
+        versions, _ = finance_state(user_id)
+        return conditional_json(user_id, versions + (get_rules_version(user_id),), None, lambda: {
+            "success": True,
+            "proposals": propose_rules(
+                get_user_finance_data(user_id)['spending'],
+                user_id,
+                min_support=request.args.get('min_support', default=3, type=int),
+                min_confidence=request.args.get('min_confidence', default=0.9, type=float)
+            )
+        })
+    except Exception as e:
+        logger.error(f"Error proposing categorization rules: {e}")
+        return jsonify({"success": False, "message": str(e)}), 400
+
+#
+# API Routes - Budget Alerts
+#
+
+@app.route('/api/alerts', methods=['GET'])
+def get_alerts_route():
+    """
+    Get budget alerts raised by recent expenses
+    
+    Query parameters:
+        since: Only alerts with a higher ID, for polling (default: 0)
+        month, year: Also return spending against budget for this month
+    """
+    try:
+        user_id = current_user_id()
+        response = {"success": True, "alerts": get_alerts(user_id, request.args.get('since', default=0, type=int))}
+        
+        month = request.args.get('month', type=int)
+        year = request.args.get('year', type=int)
+        if month is not None and year is not None:
+            if not 1 <= month <= 12:
+                raise ValueError("Invalid month")
+            response["status"] = get_budget_status(month, year, user_id)
+        return jsonify(response)
+    except Exception as e:
+        logger.error(f"Error getting budget alerts: {e}")
+        return jsonify({"success": False, "message": str(e)}), 400
+
+#
+# API Routes - Live Events
+#
+
+@app.route('/api/events', methods=['GET'])
+def stream_events():
+    """
+    Stream the user's changes as server-sent events: finance.changed,
+    categories.changed and budget.alert, plus resync when events were dropped
+    
+    Query parameters:
+        token: Session token, for clients that cannot send headers (EventSource)
+    """
+    user_id = current_user_id()
+    token = request.args.get('token')
+    if token is not None:
+        user_id = verify_token(token)
+        if user_id is None:
+            return jsonify({'success': False, 'error': 'Invalid or expired token'}), 401
+    
+    stream = open_stream(user_id)
+    if stream is None:
+        response = jsonify({"success": False, "message": "Too many open event streams"})
+        response.status_code = 503
+        response.headers['Retry-After'] = str(RECONNECT_MILLISECONDS // 1000)
+        return response
+    
+    response = Response(stream, mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+#
+# API Routes - Recurring Transactions
+#
+
+@app.route('/api/recurring', methods=['GET'])
+def get_recurring_route():
+    """Get the user's recurring transaction rules"""
+    return jsonify({"rules": get_recurring_rules(current_user_id())})
+
+@app.route('/api/recurring', methods=['POST'])
+def add_recurring_route():
+    """
+    Add a recurring transaction rule
+    
+    Expected JSON: {"kind": "spending" | "income",
+                    "template": {"name", "amount", "category", "currency"?, "note"?},
+                    "schedule": {"freq": "monthly", "day": 1-31, "interval"?}
+                              | {"freq": "weekly", "weekday": 0-6, "interval"?}
+                              | {"freq": "cron", "cron": "day-of-month month day-of-week"},
+                    "start": "YYYY-MM-DD", "end": "YYYY-MM-DD" (optional)}
+    """
+    try:
+        data = request.json
+        if not data:
+            raise ValueError("No data provided")
+        rule = add_recurring_rule(data, current_user_id())
+        return jsonify({"success": True, "rule": rule})
+    except Exception as e:
+        logger.error(f"Error adding recurring rule: {e}")
+        return jsonify({"success": False, "message": str(e)}), 400
+
+@app.route('/api/recurring/<int:id>', methods=['DELETE'])
+def remove_recurring_route(id):
+    """
+    Remove a recurring transaction rule; transactions already created stay
+    
+    Args:
+        id: Rule ID
+    """
+    if not remove_recurring_rule(id, current_user_id()):
+        return jsonify({"success": False, "message": "Rule not found"}), 404
+    return jsonify({"success": True, "message": "Rule removed successfully"})
+
 #
 # API Routes - User Authentication
 #
 
 @app.route('/api/login', methods=['POST'])
+@auth_limit
 def login_user():
     """Handle user login"""
     try:
@@ -314,8 +954,9 @@ def login_user():
         username = data['login']
         password = data['password']
         
-        if login(username, password):
-            return jsonify({'success': True})
+        token = login_with_token(username, password)
+        if token:
+            return jsonify({'success': True, 'token': token, 'expires_in': TOKEN_TTL_SECONDS})
         else:
             return jsonify({'success': False, 'error': 'Invalid username or password'}), 401
     except Exception as e:
@@ -324,11 +965,16 @@ def login_user():
 
 @app.route('/api/logout', methods=['POST'])
 def logout():
-    """Handle user logout"""
-    logout_user()
+    """Handle user logout, revoking the session token if one was sent"""
+    token = bearer_token()
+    if token is not None:
+        revoke_token(token)
+    else:
+        logout_user()
     return jsonify({'success': True})
 
 @app.route('/api/register', methods=['POST'])
+@auth_limit
 def register_user():
     """Handle user registration"""
     try:
@@ -357,10 +1003,12 @@ def register_user():
 #
 
 @app.route('/api/reports', methods=['POST'])
+@report_limit
 def generate_report_api():
     """
-    Generate a PDF report with financial data.
-    Accepts optional month and year parameters, defaults to current month if not provided
+    Queue generation of a PDF report with financial data.
+    Accepts optional month and year parameters, defaults to current month if not provided.
+    The report is rendered in the background; poll the returned status URL for progress.
     """
     try:
         now = datetime.now()
@@ -376,24 +1024,110 @@ def generate_report_api():
         month = int(data.get('month', now.strftime('%m')))
         year = int(data.get('year', now.strftime('%Y')))
         
-        logger.info(f"Generating report for month {month}, year {year}, user {current_user_id()}")
+        logger.info(f"Queueing report for month {month}, year {year}, user {current_user_id()}")
         
-        # Generate the report
-        report_path = generate_pdf(month, year, current_user_id())
+        job = submit_report(month, year, current_user_id())
         
-        # Get the filename for the frontend
-        filename = os.path.basename(report_path)
+        return jsonify({
+            "success": True,
+            "message": "Report generation started",
+            "job_id": job['id'],
+            "status": job['status'],
+            "status_url": f"/api/reports/{job['id']}"
+        }), 202
+    except Exception as e:
+        logger.error(f"Error queueing report: {e}")
+        return jsonify({"success": False, "message": str(e)}), 500
+
+@app.route('/api/reports/batch', methods=['POST'])
+@report_limit
+def generate_batch_report_api():
+    """
+    Queue monthly reports for a whole year plus an annual summary.
+    Accepts a year (defaults to the current one) and an optional list of months.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        year = int(data.get('year', datetime.now().year))
+        months = data.get('months')
+        
+        logger.info(f"Queueing batch report for year {year}, user {current_user_id()}")
         
-        logger.info(f"Report generated successfully: {filename}")
+        job = submit_batch(year, current_user_id(), months)
         
         return jsonify({
-            "success": True, 
-            "message": "Report generated successfully",
-            "report_file": filename,
-            "report_url": f"/download_report/{filename}"
-        })
+            "success": True,
+            "message": "Batch report generation started",
+            "job_id": job['id'],
+            "status": job['status'],
+            "status_url": f"/api/reports/{job['id']}"
+        }), 202
+    except Exception as e:
+        logger.error(f"Error queueing batch report: {e}")
+        return jsonify({"success": False, "message": str(e)}), 400
+
+@app.route('/api/reports/<job_id>', methods=['GET'])
+def get_report_status(job_id):
+    """
+    Get status and progress of a queued report
+    
+    Args:
+        job_id: Report job ID returned by POST /api/reports
+    """
+    job = get_job(job_id, current_user_id())
+    if job is None:
+        return jsonify({"success": False, "message": "Report job not found"}), 404
+    
+    return jsonify({
+        "success": True,
+        "job_id": job['id'],
+        "status": job['status'],
+        "progress": job['progress'],
+        "report_file": job['report_file'],
+        "report_url": job['report_url'],
+        "reports": job['reports'],
+        "error": job['error']
+    })
+
+@app.route('/api/reports/<int:year>/<int:month>/pdf', methods=['GET'])
+@report_limit
+def stream_report(year, month):
+    """
+    Render a monthly report in memory and return it directly in the response.
+    Transactions are streamed from the repository in date order.
+    The ETag is the version of the report's data, so a client holding the
+    current report gets 304 Not Modified without the report being rendered.
+    
+    Args:
+        year: Year
+        month: Month (1-12)
+    """
+    try:
+        if not 1 <= month <= 12:
+            raise ValueError("Invalid month")
+        
+        user_id = current_user_id()
+        spending, income = report_sources(month, year, user_id)
+        version = monthly_report_version(month, year, spending, income)
+        
+        if request.if_none_match.contains(version):
+            response = make_response('', 304)
+            response.set_etag(version)
+            return response
+        
+        content = pdf_to_bytes(render_monthly_report(month, year, spending, income))
+        response = make_response(content)
+        response.mimetype = 'application/pdf'
+        response.set_etag(version)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        response.headers['Content-Disposition'] = (
+            f'attachment; filename=raport_budzetowy_{month}_{year}_user{user_id}.pdf'
+        )
+        return response
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
     except Exception as e:
-        logger.error(f"Error generating report: {e}")
+        logger.error(f"Error streaming report: {e}")
         return jsonify({"success": False, "message": str(e)}), 500
 
 @app.route('/download_report/<filename>', methods=['GET'])
@@ -421,7 +1155,7 @@ def serve_output_files(filename):
         filename: Name of the file to serve
     """
     # Ensure user is logged in before serving potentially sensitive files
-    if not is_logged_in():
+    if not is_logged_in() and g.get('token_user_id') is None:
         return redirect(url_for('home'))
     
     output_dir = os.path.join(BASE_DIR, 'src', 'output')
@@ -450,4 +1184,5 @@ def legacy_generate_report():
     return generate_report_api()
 
 if __name__ == '__main__':
-    app.run(debug=False, port=5000)
+    from src.serve import run_server
+    run_server(host="127.0.0.1")
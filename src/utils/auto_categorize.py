@@ -0,0 +1,277 @@
+"""
+Rule-based categorization of imported expenses.
+
+The substring rules of a user are compiled into one Aho-Corasick automaton
+and the regex rules into one combined pattern, each wrapped in its own
+zero-width lookahead group: at every position the first alternative that
+matches is the highest priority regex rule matching there. One scan of the
+text with each finds the highest priority matching rule overall. Only
+when that rule's amount range excludes the expense are the rules checked
+one by one for that row.
+
+Regex rules that compile on their own can still fail to combine (inline
+global flags such as "(?i)" not at the start, a group name used by two
+rules); the regex rules of such a user are then searched one by one.
+"""
+import re
+import logging
+import threading
+from collections import Counter, defaultdict, deque
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src.repositories.rules_repository import get_rules, get_rules_version
+
+# Configure logger
+logger = logging.getLogger(__name__)
+
+# Compiled rules per user, keyed by user ID and valid for one rules version
+_compiled: Dict[int, Tuple[int, "RuleSet"]] = {}
+_compiled_lock = threading.Lock()
+
+
+class SubstringAutomaton:
+    """
+    Aho-Corasick automaton over the substring rules of a user.
+
+    Each state remembers the highest priority rule whose pattern ends there
+    (directly or through its failure links), so one pass over the text
+    finds the highest priority substring rule it contains.
+    """
+
+    def __init__(self, patterns: Iterable[Tuple[str, int]]):
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.best: List[Optional[int]] = [None]
+
+        for pattern, position in patterns:
+            state = 0
+            for char in pattern.casefold():
+                next_state = self.goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self.goto)
+                    self.goto[state][char] = next_state
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.best.append(None)
+                state = next_state
+            self.best[state] = self._better(self.best[state], position)
+
+        # Breadth-first, so failure targets (shallower states) are final first
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self.goto[state].items():
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(char, 0)
+                self.best[child] = self._better(self.best[child], self.best[self.fail[child]])
+                queue.append(child)
+
+    @staticmethod
+    def _better(current: Optional[int], candidate: Optional[int]) -> Optional[int]:
+        if candidate is None or (current is not None and current <= candidate):
+            return current
+        return candidate
+
+    def search(self, text: str) -> Optional[int]:
+        """
+        Find the highest priority pattern contained in the text.
+
+        Args:
+            text: Text to scan
+
+        Returns:
+            Position of the rule in priority order, or None
+        """
+        goto, fail, best_at = self.goto, self.fail, self.best
+        state = 0
+        best = best_at[0]
+        for char in text.casefold():
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if best_at[state] is not None and (best is None or best_at[state] < best):
+                best = best_at[state]
+        return best
+
+
+class RuleSet:
+    """
+    A user's rules compiled for matching in a single pass.
+    """
+
+    def __init__(self, rules: List[Dict]):
+        self.rules = list(rules)
+        self.patterns = []
+        self.group_to_rule: Dict[int, int] = {}
+        self.regexes: List[Tuple[int, re.Pattern]] = []
+
+        substrings = []
+        alternatives = []
+        group = 1
+        for position, rule in enumerate(self.rules):
+            if rule["type"] == "substring":
+                substrings.append((rule["pattern"], position))
+                self.patterns.append(re.compile(re.escape(rule["pattern"]), re.IGNORECASE))
+                continue
+            pattern = re.compile(rule["pattern"], re.IGNORECASE)
+            self.patterns.append(pattern)
+            self.regexes.append((position, pattern))
+            alternatives.append(f"(?=({rule['pattern']}))")
+            self.group_to_rule[group] = position
+            group += 1 + pattern.groups
+
+        self.automaton = SubstringAutomaton(substrings) if substrings else None
+        self.combined = None
+        if alternatives:
+            try:
+                self.combined = re.compile("|".join(alternatives), re.IGNORECASE)
+            except re.error as e:
+                logger.warning(f"Regex rules cannot be combined ({e}), searching them one by one")
+
+    @staticmethod
+    def _amount_matches(rule: Dict, amount: float) -> bool:
+        if rule.get("min_amount") is not None and amount < rule["min_amount"]:
+            return False
+        if rule.get("max_amount") is not None and amount > rule["max_amount"]:
+            return False
+        return True
+
+    def match(self, text: str, amount: float) -> Optional[Dict]:
+        """
+        Find the highest priority rule matching an expense.
+
+        Args:
+            text: Expense name and note
+            amount: Expense amount
+
+        Returns:
+            The matching rule or None
+        """
+        best = self.automaton.search(text) if self.automaton else None
+        if self.combined is not None and best != 0:
+            for found in self.combined.finditer(text):
+                position = self.group_to_rule[found.lastindex]
+                if best is None or position < best:
+                    best = position
+        elif best != 0:
+            for position, pattern in self.regexes:
+                if best is not None and position > best:
+                    break
+                if pattern.search(text):
+                    best = position
+                    break
+        if best is None:
+            return None
+        if self._amount_matches(self.rules[best], amount):
+            return self.rules[best]
+
+        # The best text match is out of its amount range, so a lower priority
+        # rule may still apply
+        for rule, pattern in zip(self.rules[best + 1:], self.patterns[best + 1:]):
+            if self._amount_matches(rule, amount) and pattern.search(text):
+                return rule
+        return None
+
+
+def get_rule_set(user_id: int = 1) -> RuleSet:
+    """
+    Get the compiled rules of a user, recompiling them after rule changes.
+
+    Args:
+        user_id: User identifier (default: 1)
+
+    Returns:
+        RuleSet of the user
+    """
+    version = get_rules_version(user_id)
+    with _compiled_lock:
+        cached = _compiled.get(int(user_id))
+        if cached is None or cached[0] != version:
+            cached = (version, RuleSet(get_rules(user_id)))
+            logger.debug(f"Compiled {len(cached[1].rules)} categorization rules for user {user_id}")
+            _compiled[int(user_id)] = cached
+        return cached[1]
+
+
+def expense_text(expense: Dict) -> str:
+    return f"{expense.get('name', '')}\n{expense.get('note', '') or expense.get('description', '')}"
+
+
+def categorize(expenses: Iterable[Dict], user_id: int = 1) -> List[Optional[int]]:
+    """
+    Find category IDs for expenses from the user's rules.
+
+    Args:
+        expenses: Expense dictionaries with name, optional note and amount
+        user_id: User identifier (default: 1)
+
+    Returns:
+        Category ID for each expense, None where no rule matches
+    """
+    rule_set = get_rule_set(user_id)
+    categories = []
+    for expense in expenses:
+        rule = rule_set.match(expense_text(expense), float(expense.get("amount", 0)))
+        categories.append(rule["categoryId"] if rule else None)
+    return categories
+
+
+def _normalize_name(name: str) -> str:
+    """
+    Reduce an expense name to a stable key: lower case, without digits such
+    as dates and receipt numbers, with single spaces.
+    """
+    return " ".join(re.sub(r"\d+", " ", name.casefold()).split())
+
+
+def propose_rules(
+    spending: Iterable[Dict],
+    user_id: int = 1,
+    min_support: int = 3,
+    min_confidence: float = 0.9
+) -> List[Dict]:
+    """
+    Propose substring rules from past name -> category assignments.
+
+    Names assigned to one category consistently enough are proposed,
+    unless the current rules already put them in that category.
+
+    Args:
+        spending: Past expenses with name and categoryId
+        user_id: User identifier (default: 1)
+        min_support: Minimum number of expenses with the name
+        min_confidence: Minimum share of them in the proposed category
+
+    Returns:
+        List of proposed rules with their support and confidence, most
+        frequent names first
+    """
+    assignments: Dict[str, Counter] = defaultdict(Counter)
+    for expense in spending:
+        key = _normalize_name(expense.get("name", ""))
+        if key:
+            assignments[key][expense["categoryId"]] += 1
+
+    rule_set = get_rule_set(user_id)
+    proposals = []
+    for key, counts in assignments.items():
+        support = sum(counts.values())
+        category_id, hits = counts.most_common(1)[0]
+        confidence = hits / support
+        if support < min_support or confidence < min_confidence:
+            continue
+        current = rule_set.match(key, 0.0)
+        if current and current["categoryId"] == category_id:
+            continue
+        proposals.append({
+            "type": "substring",
+            "pattern": key,
+            "categoryId": category_id,
+            "support": support,
+            "confidence": round(confidence, 3)
+        })
+
+    proposals.sort(key=lambda proposal: (-proposal["support"], proposal["pattern"]))
+    return proposals
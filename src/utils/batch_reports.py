@@ -0,0 +1,182 @@
+"""
+Batch generation of monthly and annual PDF reports.
+
+Transactions are read once into a snapshot grouped by user and month. The
+snapshot is handed to each worker process when the pool starts, so tasks
+only carry a (user, month) pair, and the annual report reuses the same
+monthly groups instead of reading transactions again.
+
+Worker processes are spawned rather than forked: the API runs batches from
+a thread of a multithreaded server, and a forked child inherits the locks
+other threads held at that moment.
+"""
+import os
+import sys
+import logging
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from src.repositories import finance_repository as fr
+from src.repositories.users_repository import get_users
+from src.utils.generate_pdf import generate_pdf, generate_annual_pdf
+from src.utils.report_cache import prune_report_cache
+
+# Configure logger
+logger = logging.getLogger(__name__)
+
+# Snapshot of the worker process, set by _init_worker
+_snapshot: Dict = {}
+
+
+def build_snapshot(year: int, user_ids: Iterable[int]) -> Dict:
+    """
+    Read the transactions of a year for several users in a single pass.
+
+    Args:
+        year: Year
+        user_ids: Users to include
+
+    Returns:
+        dict: user_id -> month (1-12) -> {'spending': [...], 'income': [...]}
+    """
+    year_prefix = f"{year}-"
+    snapshot = {}
+    for user_id in user_ids:
+        months = {month: {'spending': [], 'income': []} for month in range(1, 13)}
+        for entry in fr.get_all_spending(user_id):
+            if entry['date'].startswith(year_prefix):
+                months[int(entry['date'][5:7])]['spending'].append(entry)
+        for entry in fr.get_all_incomes(user_id):
+            if entry['date'].startswith(year_prefix):
+                months[int(entry['date'][5:7])]['income'].append(dict(entry))
+        for data in months.values():
+            data['spending'].sort(key=lambda k: k['date'])
+            data['income'].sort(key=lambda k: k['date'])
+        snapshot[int(user_id)] = months
+    return snapshot
+
+
+def _init_worker(snapshot: Dict) -> None:
+    global _snapshot
+    _snapshot = snapshot
+
+
+def _render(task: Tuple[int, int, Optional[int]]) -> str:
+    """
+    Render one report from the worker snapshot.
+
+    Args:
+        task: (user_id, year, month); month None renders the annual report
+
+    Returns:
+        str: Path to the generated PDF file
+    """
+    user_id, year, month = task
+    months = _snapshot[user_id]
+    if month is None:
+        return generate_annual_pdf(year, user_id, months)
+    return generate_pdf(month, year, user_id,
+                        spending=months[month]['spending'],
+                        income=months[month]['income'])
+
+
+def generate_batch(
+    year: int,
+    user_ids: Optional[Iterable[int]] = None,
+    months: Optional[Iterable[int]] = None,
+    annual: bool = True,
+    workers: Optional[int] = None,
+    progress: Optional[Callable[[int], None]] = None
+) -> List[str]:
+    """
+    Generate monthly reports (and optionally the annual summary) for many users.
+
+    Args:
+        year: Year
+        user_ids: Users to include (default: all registered users)
+        months: Months to render (default: 1-12)
+        annual: Whether to also render the annual summary for each user
+        workers: Number of worker processes (default: number of CPU cores)
+        progress: Called with the percentage of reports finished (0-100)
+            each time a report is done
+
+    Returns:
+        List of paths to the generated PDF files, in task order
+    """
+    if user_ids is None:
+        user_ids = [user['user_id'] for user in get_users()]
+    user_ids = [int(user_id) for user_id in user_ids]
+    months = sorted(set(months)) if months is not None else list(range(1, 13))
+    for month in months:
+        if not 1 <= month <= 12:
+            raise ValueError(f"Invalid month: {month}")
+
+    tasks = [(user_id, year, month) for user_id in user_ids for month in months]
+    if annual:
+        tasks.extend((user_id, year, None) for user_id in user_ids)
+    if not tasks:
+        return []
+
+    snapshot = build_snapshot(year, user_ids)
+    workers = min(workers or os.cpu_count() or 1, len(tasks))
+    logger.info(f"Generating {len(tasks)} reports for year {year} with {workers} workers")
+
+    def report_done(done: int) -> None:
+        if progress:
+            progress(done * 100 // len(tasks))
+
+    if workers == 1:
+        _init_worker(snapshot)
+        paths = []
+        for task in tasks:
+            paths.append(_render(task))
+            report_done(len(paths))
+        return paths
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                             initializer=_init_worker, initargs=(snapshot,)) as executor:
+        futures = [executor.submit(_render, task) for task in tasks]
+        for done, future in enumerate(as_completed(futures), 1):
+            future.result()
+            report_done(done)
+        return [future.result() for future in futures]
+
+
+def _parse_months(value: str) -> List[int]:
+    """
+    Parse a month list such as "1-3,7,12".
+    """
+    months = []
+    for part in value.split(','):
+        if '-' in part:
+            start, end = part.split('-', 1)
+            months.extend(range(int(start), int(end) + 1))
+        else:
+            months.append(int(part))
+    return months
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description="Generate monthly and annual budget reports in bulk")
+    parser.add_argument('--year', type=int, required=True, help="Year to report on")
+    parser.add_argument('--user', type=int, action='append', dest='users',
+                        help="User ID to include (repeatable, default: all users)")
+    parser.add_argument('--months', type=_parse_months, default=None,
+                        help="Months to render, e.g. 1-12 or 1,4,7 (default: all)")
+    parser.add_argument('--no-annual', action='store_true', help="Skip the annual summary")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Number of worker processes (default: CPU count)")
+    args = parser.parse_args()
+
+    paths = generate_batch(args.year, args.users, args.months,
+                           annual=not args.no_annual, workers=args.workers)
+    for path in paths:
+        print(path)
+    prune_report_cache()
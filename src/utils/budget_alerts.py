@@ -0,0 +1,192 @@
+"""
+Budget alerts evaluated on every expense write.
+
+The engine keeps a running total per user, budget period and category,
+together with what each expense contributed to it. A write only moves one
+expense's contribution between totals and compares the affected total with
+the budget thresholds, so no month is ever rescanned. Crossing a threshold
+upwards records an alert and publishes it on the event hub as
+"budget.alert".
+"""
+import os
+import time
+import logging
+import itertools
+import threading
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+from src.repositories import finance_repository as fr
+from src.repositories.categories_repository import get_category_by_id, get_category_by_name
+from src.repositories.raport_repository import load_budgets
+from src.utils.event_hub import publish, subscribe
+
+# Configure logger
+logger = logging.getLogger(__name__)
+
+# Constants
+ALERT_THRESHOLDS = tuple(sorted(float(value) for value in
+                                os.environ.get("BUDGET_ALERT_THRESHOLDS", "0.8,1.0").split(",")))
+MAX_ALERTS_PER_USER = 100
+
+# user ID -> expense ID -> (period, category ID, amount) counted in the totals
+_contributions: Dict[int, Dict[int, Tuple[str, int, float]]] = {}
+# user ID -> (period, category ID) -> running total
+_totals: Dict[int, Dict[Tuple[str, int], float]] = {}
+_alerts: Dict[int, Deque[Dict]] = {}
+_alert_ids = itertools.count(1)
+_budgets: Optional[Dict] = None
+_lock = threading.RLock()
+
+
+def budget_period(date: str) -> str:
+    """
+    Budget period of a date, in the "YYYY-M" form used by budget.json.
+    """
+    return f"{int(date[:4])}-{int(date[5:7])}"
+
+
+def _get_budgets() -> Dict:
+    global _budgets
+    if _budgets is None:
+        _budgets = load_budgets().get('budgets', {})
+    return _budgets
+
+
+def _on_budgets_changed(topic: str, payload) -> None:
+    global _budgets
+    with _lock:
+        _budgets = None
+
+
+def _ensure_user(user_id: int, changed_id: Optional[int] = None, old: Optional[Dict] = None) -> None:
+    """
+    Build the running totals of a user on first use, in one pass.
+
+    The pass runs after the triggering write was saved, so the changed
+    expense is counted as it was before the write (or not at all if it was
+    just added); the write itself is then applied like any later one.
+    Caller must hold _lock.
+    """
+    if user_id in _contributions:
+        return
+    contributions, totals = {}, {}
+    for row in fr.get_user_finance_data(user_id)['spending']:
+        if row['id'] == changed_id:
+            if old is None:
+                continue
+            row = old
+        key = (budget_period(row['date']), row['categoryId'])
+        contributions[row['id']] = (key[0], key[1], row['amount'])
+        totals[key] = totals.get(key, 0.0) + row['amount']
+    _contributions[user_id] = contributions
+    _totals[user_id] = totals
+
+
+def _crossed_threshold(before: float, after: float, budget: float) -> Optional[float]:
+    """
+    Highest threshold the total crossed upwards, if any.
+    """
+    crossed = None
+    for threshold in ALERT_THRESHOLDS:
+        if before < threshold * budget <= after:
+            crossed = threshold
+    return crossed
+
+
+def _on_spending_changed(user_id: int, old: Optional[Dict], new: Optional[Dict]) -> None:
+    user_id = int(user_id)
+    with _lock:
+        expense_id = (new or old)['id']
+        _ensure_user(user_id, expense_id, old)
+        contributions, totals = _contributions[user_id], _totals[user_id]
+
+        previous = contributions.pop(expense_id, None)
+        if previous is not None:
+            key = (previous[0], previous[1])
+            totals[key] = totals.get(key, 0.0) - previous[2]
+        if new is None:
+            return
+
+        key = (budget_period(new['date']), new['categoryId'])
+        before = totals.get(key, 0.0)
+        if previous is not None and (previous[0], previous[1]) == key:
+            before += previous[2]
+        totals[key] = after = totals.get(key, 0.0) + new['amount']
+        contributions[expense_id] = (key[0], key[1], new['amount'])
+
+        category = get_category_by_id(new['categoryId'], user_id)
+        if category is None:
+            return
+        budget = _get_budgets().get(key[0], {}).get(category['name'])
+        if not budget or budget <= 0:
+            return
+        threshold = _crossed_threshold(before, after, budget)
+        if threshold is None:
+            return
+
+        alert = {
+            'id': next(_alert_ids),
+            'user_id': user_id,
+            'period': key[0],
+            'categoryId': key[1],
+            'category': category['name'],
+            'threshold': threshold,
+            'spent': round(after, 2),
+            'budget': budget,
+            'expense_id': expense_id,
+            'created_at': time.time()
+        }
+        _alerts.setdefault(user_id, deque(maxlen=MAX_ALERTS_PER_USER)).append(alert)
+
+    logger.info(f"Budget alert for user {user_id}: '{alert['category']}' at "
+                f"{alert['spent']}/{budget} in {alert['period']}")
+    publish("budget.alert", dict(alert))
+
+
+def get_alerts(user_id: int = 1, since_id: int = 0) -> List[Dict]:
+    """
+    Get a user's recent budget alerts.
+
+    Args:
+        user_id: User identifier (default: 1)
+        since_id: Only alerts with a higher ID (for polling)
+
+    Returns:
+        List of alerts, oldest first
+    """
+    with _lock:
+        return [dict(alert) for alert in _alerts.get(int(user_id), ()) if alert['id'] > since_id]
+
+
+def get_budget_status(month: int, year: int, user_id: int = 1) -> List[Dict]:
+    """
+    Get spending against budget for each budgeted category of a month.
+
+    Args:
+        month: Month (1-12)
+        year: Year
+        user_id: User identifier (default: 1)
+
+    Returns:
+        List of {'category', 'budget', 'spent', 'ratio'} dictionaries
+    """
+    period = f"{year}-{month}"
+    status = []
+    with _lock:
+        _ensure_user(int(user_id))
+        totals = _totals[int(user_id)]
+        for name, budget in _get_budgets().get(period, {}).items():
+            category = get_category_by_name(name, user_id)
+            spent = totals.get((period, category['id']), 0.0) if category else 0.0
+            status.append({
+                'category': name,
+                'budget': budget,
+                'spent': round(spent, 2),
+                'ratio': round(spent / budget, 3) if budget else None
+            })
+    return status
+
+
+fr.on_spending_changed(_on_spending_changed)
+subscribe("budgets.changed", _on_budgets_changed)
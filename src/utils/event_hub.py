@@ -0,0 +1,63 @@
+"""
+In-process publish/subscribe of application events.
+
+Publishers do not know their subscribers: repositories and engines publish
+events by topic ("budget.alert", "budgets.changed", ...) and any part of
+the application can subscribe to them. Callbacks run synchronously in the
+publishing thread, so they must be quick; a failing subscriber is logged
+and does not affect the publisher or other subscribers.
+"""
+import logging
+import threading
+from typing import Any, Callable, Dict, List
+
+# Configure logger
+logger = logging.getLogger(__name__)
+
+_subscribers: Dict[str, List[Callable[[str, Any], None]]] = {}
+_lock = threading.Lock()
+
+
+def subscribe(topic: str, callback: Callable[[str, Any], None]) -> Callable[[], None]:
+    """
+    Subscribe to events of a topic.
+
+    Args:
+        topic: Event topic, or "*" for every topic
+        callback: Called with (topic, payload) for each event
+
+    Returns:
+        Function that cancels the subscription
+    """
+    with _lock:
+        _subscribers.setdefault(topic, []).append(callback)
+
+    def unsubscribe() -> None:
+        with _lock:
+            callbacks = _subscribers.get(topic, [])
+            if callback in callbacks:
+                callbacks.remove(callback)
+
+    return unsubscribe
+
+
+def publish(topic: str, payload: Any = None) -> int:
+    """
+    Deliver an event to the subscribers of its topic.
+
+    Args:
+        topic: Event topic
+        payload: Event data
+
+    Returns:
+        int: Number of subscribers called
+    """
+    with _lock:
+        callbacks = list(_subscribers.get(topic, ())) + list(_subscribers.get("*", ()))
+
+    for callback in callbacks:
+        try:
+            callback(topic, payload)
+        except Exception as e:
+            logger.error(f"Subscriber of '{topic}' failed: {e}")
+    return len(callbacks)
@@ -0,0 +1,206 @@
+"""
+Live change notifications for a user as server-sent events.
+
+An EventStream subscribes to the event hub topics the repositories and the
+budget alert engine publish, keeps the events of its user in a bounded
+queue and yields them as SSE messages, so open clients learn about changes
+without polling. Each open stream holds a request thread, so the number of
+streams is capped below the server's thread count and every stream ends
+after a while; browsers reconnect by themselves (EventSource).
+
+AsyncEventStream is the same stream for the ASGI entry point (src/asgi.py):
+events are handed to the event loop and the messages are consumed with
+"async for", so an open stream holds no thread and many more of them can
+be open at once.
+"""
+import os
+import json
+import time
+import queue
+import asyncio
+import logging
+import threading
+from typing import Any, AsyncIterator, Iterator, Optional
+
+from src.utils.event_hub import subscribe
+
+# Configure logger
+logger = logging.getLogger(__name__)
+
+# Constants
+STREAM_TOPICS = ("finance.changed", "categories.changed", "budget.alert")
+EVENTS_MAX_STREAMS = int(os.environ.get("EVENTS_MAX_STREAMS", "4"))
+EVENTS_MAX_ASYNC_STREAMS = int(os.environ.get("EVENTS_MAX_ASYNC_STREAMS", "100"))
+EVENTS_HEARTBEAT_SECONDS = float(os.environ.get("EVENTS_HEARTBEAT_SECONDS", "15"))
+EVENTS_STREAM_SECONDS = float(os.environ.get("EVENTS_STREAM_SECONDS", "300"))
+EVENTS_QUEUE_SIZE = 100
+RECONNECT_MILLISECONDS = 3000
+
+_slots = threading.BoundedSemaphore(EVENTS_MAX_STREAMS)
+_async_slots = threading.BoundedSemaphore(EVENTS_MAX_ASYNC_STREAMS)
+_CLOSED = object()
+
+
+def format_event(topic: str, payload: Any) -> str:
+    """
+    Format one server-sent event message.
+    """
+    return f"event: {topic}\ndata: {json.dumps(payload, default=str)}\n\n"
+
+
+class EventStream:
+    """
+    Server-sent events of one user's changes, for one client.
+
+    Iterating yields the SSE messages; close() (called by the WSGI server
+    when the response ends or the client goes away) ends the subscription
+    and frees the stream's slot.
+    """
+
+    slots = _slots
+
+    def __init__(self, user_id: int, heartbeat: float = EVENTS_HEARTBEAT_SECONDS,
+                 duration: float = EVENTS_STREAM_SECONDS):
+        self.user_id = int(user_id)
+        self.heartbeat = heartbeat
+        self.duration = duration
+        self._queue = self._new_queue()
+        self._overflowed = False
+        self._closed = False
+        self._unsubscribes = [subscribe(topic, self._deliver) for topic in STREAM_TOPICS]
+
+    def _new_queue(self):
+        return queue.Queue(maxsize=EVENTS_QUEUE_SIZE)
+
+    def _deliver(self, topic: str, payload: Any) -> None:
+        if not isinstance(payload, dict) or payload.get("user_id") != self.user_id:
+            return
+        self._put((topic, payload))
+
+    def _put(self, item: Any) -> None:
+        try:
+            self._queue.put_nowait(item)
+        except (queue.Full, asyncio.QueueFull):
+            # The client is not keeping up; it gets a single "resync" instead
+            self._overflowed = True
+
+    def _message(self, item: Any) -> Optional[str]:
+        """
+        SSE message for an item taken from the queue, None once closed.
+        """
+        if item is _CLOSED:
+            return None
+        if self._overflowed:
+            self._overflowed = False
+            while not self._queue.empty():
+                self._queue.get_nowait()
+            return format_event("resync", {"user_id": self.user_id})
+        return format_event(*item)
+
+    def __iter__(self) -> Iterator[str]:
+        yield f"retry: {RECONNECT_MILLISECONDS}\n\n"
+        deadline = time.monotonic() + self.duration
+        while not self._closed:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            try:
+                item = self._queue.get(timeout=min(self.heartbeat, remaining))
+            except queue.Empty:
+                yield ": keep-alive\n\n"
+                continue
+            message = self._message(item)
+            if message is None:
+                return
+            yield message
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        for unsubscribe in self._unsubscribes:
+            unsubscribe()
+        try:
+            self._queue.put_nowait(_CLOSED)
+        except (queue.Full, asyncio.QueueFull):
+            pass
+        self.slots.release()
+
+
+class AsyncEventStream(EventStream):
+    """
+    Server-sent events of one user's changes, for one ASGI client.
+
+    Created and consumed on the event loop; events published from other
+    threads are passed to the loop. Iterate with "async for"; close() must
+    be called on the loop.
+    """
+
+    slots = _async_slots
+
+    def __init__(self, user_id: int, heartbeat: float = EVENTS_HEARTBEAT_SECONDS,
+                 duration: float = EVENTS_STREAM_SECONDS):
+        self._loop = asyncio.get_running_loop()
+        super().__init__(user_id, heartbeat, duration)
+
+    def _new_queue(self):
+        return asyncio.Queue(maxsize=EVENTS_QUEUE_SIZE)
+
+    def _deliver(self, topic: str, payload: Any) -> None:
+        if not isinstance(payload, dict) or payload.get("user_id") != self.user_id:
+            return
+        self._loop.call_soon_threadsafe(self._put, (topic, payload))
+
+    def __iter__(self) -> Iterator[str]:
+        raise TypeError("AsyncEventStream is consumed with 'async for'")
+
+    async def __aiter__(self) -> AsyncIterator[str]:
+        yield f"retry: {RECONNECT_MILLISECONDS}\n\n"
+        deadline = time.monotonic() + self.duration
+        while not self._closed:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            try:
+                item = await asyncio.wait_for(self._queue.get(), timeout=min(self.heartbeat, remaining))
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            message = self._message(item)
+            if message is None:
+                return
+            yield message
+
+
+def open_stream(user_id: int) -> Optional[EventStream]:
+    """
+    Open an event stream for a user if a stream slot is free.
+
+    Args:
+        user_id: User whose changes are streamed
+
+    Returns:
+        EventStream, or None when EVENTS_MAX_STREAMS streams are already open
+    """
+    if not _slots.acquire(blocking=False):
+        logger.warning(f"Event stream refused for user {user_id}: {EVENTS_MAX_STREAMS} streams open")
+        return None
+    return EventStream(user_id)
+
+
+def open_async_stream(user_id: int) -> Optional[AsyncEventStream]:
+    """
+    Open an event stream for an ASGI client if a stream slot is free; call
+    it on the event loop.
+
+    Args:
+        user_id: User whose changes are streamed
+
+    Returns:
+        AsyncEventStream, or None when EVENTS_MAX_ASYNC_STREAMS streams are
+        already open
+    """
+    if not _async_slots.acquire(blocking=False):
+        logger.warning(f"Event stream refused for user {user_id}: {EVENTS_MAX_ASYNC_STREAMS} async streams open")
+        return None
+    return AsyncEventStream(user_id)
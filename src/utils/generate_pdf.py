@@ -3,6 +3,7 @@ import os
 import sys
 import calendar
 import logging
+import threading
 from datetime import datetime
 from pathlib import Path
 
@@ -14,12 +15,71 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')
 
 # Local imports
 from src.repositories import finance_repository as fr
+from src.utils.report_cache import (
+    OUTPUT_DIR,
+    report_version,
+    rows_version,
+    cached_report_path
+)
 
 # Configure logger
 logger = logging.getLogger(__name__)
 
 # Font path using pathlib for better cross-platform compatibility
 FONT_PATH = Path(__file__).parent.parent.parent / "static" / "fonts" / "DejaVuSans.ttf"
+FONT_FAMILY = 'dejavu'
+
+# Table layouts shared by every report: (headers, column widths)
+INCOME_TABLE = (["Data", "Kwota (PLN)", "Opis"], [40, 40, 110])
+EXPENSE_TABLE = (["Data", "Kategoria", "Nazwa", "Kwota (PLN)"], [30, 50, 70, 40])
+DAILY_TABLE = (["Data", "Liczba transakcji", "Kwota (PLN)"], [50, 50, 90])
+CATEGORY_TABLE = (["Kategoria", "Liczba transakcji", "Kwota (PLN)"], [90, 50, 50])
+ROW_HEIGHT = 8
+
+# Months with more rows than this get per-day and per-category subtotals instead of details
+DETAIL_THRESHOLD = int(os.environ.get("REPORT_DETAIL_THRESHOLD", "2000"))
+
+# add_font writes fpdf's font metric cache (.pkl next to the TTF) on first use
+_add_font_lock = threading.Lock()
+
+
+class CharSubset(list):
+    """List of used code points that ignores repeated characters
+    
+    fpdf appends every drawn character to the font subset and later checks
+    membership for each glyph of the font, which is quadratic in the number of
+    table cells. Keeping only unique code points bounds both the memory and
+    the embedding time by the size of the alphabet actually used.
+    """
+    
+    def __init__(self, iterable=()):
+        super().__init__()
+        self._seen = set()
+        for uni in iterable:
+            self.append(uni)
+    
+    def append(self, uni):
+        if uni not in self._seen:
+            self._seen.add(uni)
+            super().append(uni)
+    
+    def __contains__(self, uni):
+        return uni in self._seen
+
+
+def register_report_fonts(pdf):
+    """Register the report font on a document, tracking its used characters as a set
+    
+    Relies on the font entry layout of fpdf 1.7.2 (pinned in requirements.txt).
+    
+    Args:
+        pdf (FPDF): Document to register the font on
+    """
+    with _add_font_lock:
+        pdf.add_font(FONT_FAMILY, '', str(FONT_PATH), uni=True)
+    font = pdf.fonts[FONT_FAMILY]
+    font['subset'] = CharSubset(font['subset'])
+
 
 class BudgetPDF(FPDF):
     """Extended PDF class with header and footer for budget reports"""
@@ -30,6 +90,7 @@ class BudgetPDF(FPDF):
         self.core_fonts_encoding = 'utf-8'
         self.WIDTH = 210  # A4 width in mm
         self.title = "Raport Budżetu Domowego"
+        self.generated_at = datetime.now().strftime('%d-%m-%Y %H:%M')
     
     def sanitize_text(self, text):
         """Sanitize text to ensure it's compatible with PDF encoding"""
@@ -61,8 +122,15 @@ class BudgetPDF(FPDF):
         self.cell(0, 10, f'Strona {self.page_no()}/{{nb}}', 0, 0, 'C')
         
         # Add generation date
-        date_str = datetime.now().strftime('%d-%m-%Y %H:%M')
-        self.cell(0, 10, f'Wygenerowano: {date_str}', 0, 0, 'R')
+        self.cell(0, 10, f'Wygenerowano: {self.generated_at}', 0, 0, 'R')
+    
+    def set_font(self, family, style='', size=0):
+        """Select a font; bold and italic DejaVu share the regular font file"""
+        if family.lower() == FONT_FAMILY:
+            # Only DejaVuSans.ttf is shipped, so every style renders the same
+            # glyphs; keep a single embedded font instead of one per style
+            style = 'U' if 'U' in style.upper() else ''
+        super().set_font(family, style, size)
         
     def section_title(self, title):
         """Add a section title"""
@@ -97,10 +165,105 @@ class BudgetPDF(FPDF):
             safe_text = self.sanitize_text(text)
             self.cell(widths[i], 8, safe_text, 1, 0, 'L')
         self.ln()
+    
+    def table_rows(self, rows, widths, headers=None):
+        """Add table rows from an iterable, selecting the row font only once
+        
+        Rows are consumed one at a time. When a row does not fit on the page,
+        a new page is started and the table header is repeated if given.
+        Page breaks keep the current font, since add_page restores it after
+        drawing the page header and footer.
+        """
+        self.set_font('DejaVu', '', 10)
+        cell = self.cell
+        for data in rows:
+            if headers is not None and self.get_y() + ROW_HEIGHT > self.page_break_trigger:
+                self.add_page()
+                self.table_header(headers, widths)
+                self.set_font('DejaVu', '', 10)
+            for width, value in zip(widths, data):
+                if isinstance(value, (int, float)):
+                    text = f"{value:.2f}"
+                else:
+                    text = str(value)
+                cell(width, ROW_HEIGHT, text, 1, 0, 'L')
+            self.ln()
+    
+    def table(self, layout, rows):
+        """Add a paginated table with the given (headers, widths) layout"""
+        headers, widths = layout
+        self.table_header(headers, widths)
+        self.table_rows(rows, widths, headers)
 
 
-def generate_pdf(month, year, user_id=1):
-    """Generate a PDF report with financial data
+def create_report_pdf(title):
+    """Create a report document with fonts registered and page aliasing enabled
+    
+    Args:
+        title (str): Title shown in the page header
+        
+    Returns:
+        BudgetPDF: Empty report document
+    """
+    pdf = BudgetPDF()
+    pdf.alias_nb_pages()
+    register_report_fonts(pdf)
+    pdf.title = title
+    return pdf
+
+
+def pdf_to_bytes(pdf):
+    """Render a finished report into an in-memory PDF file
+    
+    Args:
+        pdf (BudgetPDF): Finished report document
+        
+    Returns:
+        bytes: Content of the PDF file
+    """
+    content = pdf.output(dest='S')  # 'S' returns the document as a string
+    try:
+        return content.encode('latin-1')
+    except UnicodeEncodeError as e:
+        logger.error(f"Encoding error during PDF generation: {e}")
+        # Drop characters that cannot be stored in the latin-1 document buffer
+        return content.encode('latin-1', 'ignore')
+
+
+def write_report_pdf(pdf, filename):
+    """Write a finished report to the output directory
+    
+    The file is written under a temporary name and moved into place, so
+    concurrent downloads never see a partially written report. The cache is
+    not pruned here: batch workers run in other processes, which do not see
+    the pins of report jobs, so the caller prunes it (see report_jobs).
+    
+    Args:
+        pdf (BudgetPDF): Finished report document
+        filename (str): Name of the file inside the output directory
+        
+    Returns:
+        str: Path to the written PDF file
+    """
+    # Create output directory if it doesn't exist
+    OUTPUT_DIR.mkdir(exist_ok=True)
+    
+    output_path = OUTPUT_DIR / filename
+    temp_path = OUTPUT_DIR / f".{filename}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(temp_path, 'wb') as f:
+            f.write(pdf_to_bytes(pdf))
+        os.replace(temp_path, output_path)
+    finally:
+        if temp_path.exists():
+            temp_path.unlink()
+    
+    logger.info(f"Report generated: {output_path}")
+    return str(output_path)
+
+
+def report_sources(month, year, user_id=1):
+    """Row sources a monthly report is rendered from
     
     Args:
         month (int): Month number (1-12)
@@ -108,43 +271,115 @@ def generate_pdf(month, year, user_id=1):
         user_id (int, optional): User ID
         
     Returns:
-        str: Path to the generated PDF file
+        tuple: (spending, income) callables, each returning a fresh
+            date-ordered iterator over the month's records
     """
-    logger.info(f"Generating report for month {month}, year {year}, user {user_id}")
+    return (lambda: fr.iter_month_spending(month, year, user_id),
+            lambda: fr.iter_month_income(month, year, user_id))
+
+
+def _as_source(rows):
+    """Turn a list of rows into a callable returning date-ordered iterators"""
+    if callable(rows):
+        return rows
+    ordered = sorted(rows, key=lambda x: x['date'])
+    return lambda: iter(ordered)
+
+
+def monthly_report_version(month, year, spending, income, detail_threshold=None):
+    """Version of a monthly report, changing whenever its data changes
     
-    # Fetch financial data
-    try:
-        spending = fr.get_month_spending(month, year, user_id)
-        income = fr.get_month_income(month, year, user_id)
+    Args:
+        spending, income: Lists of rows or callables returning row iterators
         
-        # Calculate summary data
-        income_summary = sum(i['amount'] for i in income)
-        spending_summary = sum(i['amount'] for i in spending)
-        balance = income_summary - spending_summary
-    except Exception as e:
-        logger.error(f"Error fetching financial data: {e}")
-        raise
+    Returns:
+        str: Hex digest usable as an ETag
+    """
+    threshold = DETAIL_THRESHOLD if detail_threshold is None else detail_threshold
+    return rows_version(['month', month, year, threshold],
+                        _as_source(spending)(), _as_source(income)())
+
+
+def _summarize_rows(rows):
+    """Count and total rows in one pass, with per-category totals
+    
+    Returns:
+        tuple: (count, total, {category: [count, total]})
+    """
+    count, total, by_category = 0, 0, {}
+    for entry in rows:
+        count += 1
+        total += entry['amount']
+        category = entry.get('category')
+        if category is not None:
+            subtotal = by_category.setdefault(category, [0, 0])
+            subtotal[0] += 1
+            subtotal[1] += entry['amount']
+    return count, total, by_category
+
+
+def _daily_subtotals(rows):
+    """Collapse date-ordered rows into (date, count, total) per day"""
+    current, count, total = None, 0, 0
+    for entry in rows:
+        if entry['date'] != current:
+            if current is not None:
+                yield (current, count, total)
+            current, count, total = entry['date'], 0, 0
+        count += 1
+        total += entry['amount']
+    if current is not None:
+        yield (current, count, total)
+
+
+def render_monthly_report(month, year, spending, income, progress=None, detail_threshold=None):
+    """Lay out the monthly report for a month's transactions
+    
+    Transactions are read in two streaming passes: one for the totals and
+    one for the tables. A section with more rows than the detail threshold
+    is rendered as per-day (and for expenses per-category) subtotals.
+    
+    Args:
+        month (int): Month number (1-12)
+        year (int): Year
+        spending: Expenses of the month, as a list or a callable returning a
+            date-ordered iterator
+        income: Incomes of the month, as a list or a callable returning a
+            date-ordered iterator
+        progress (callable, optional): Called with a completion percentage (0-100)
+        detail_threshold (int, optional): Maximum number of detail rows per
+            section (default: REPORT_DETAIL_THRESHOLD)
+        
+    Returns:
+        BudgetPDF: The finished, not yet written document
+    """
+    def report_progress(value):
+        if progress is not None:
+            progress(value)
+    
+    threshold = DETAIL_THRESHOLD if detail_threshold is None else detail_threshold
+    spending_rows = _as_source(spending)
+    income_rows = _as_source(income)
+    
+    # Calculate summary data
+    income_count, income_summary, _ = _summarize_rows(income_rows())
+    spending_count, spending_summary, spending_by_category = _summarize_rows(spending_rows())
+    balance = income_summary - spending_summary
+    
+    report_progress(10)
     
     # Get month name for better report title
     month_name = calendar.month_name[month]
     
     # Create PDF document
-    pdf = BudgetPDF()
-    pdf.alias_nb_pages()
-    font_path_str = str(FONT_PATH)
-    pdf.add_font('DejaVu', '', font_path_str, uni=True)
-    pdf.add_font('DejaVu', 'B', font_path_str, uni=True)
-    pdf.add_font('DejaVu', 'I', font_path_str, uni=True)
-    
-    # Set document title
-    pdf.title = f"Raport Budżetu Domowego - {month_name} {year}"
+    pdf = create_report_pdf(f"Raport Budżetu Domowego - {month_name} {year}")
     
     # Add first page
     pdf.add_page()
     
     # Main title
     pdf.set_font('DejaVu', 'B', 16)
-    pdf.cell(0, 10, f"Raport Budżetu Domowego", ln=True, align='C')
+    pdf.cell(0, 10, "Raport Budżetu Domowego", ln=True, align='C')
     pdf.set_font('DejaVu', 'B', 14)
     pdf.cell(0, 10, f"{month_name} {year}", ln=True, align='C')
     pdf.ln(10)
@@ -184,80 +419,207 @@ def generate_pdf(month, year, user_id=1):
     pdf.section_title("2. Szczegóły przychodów")
     
     # Income details table
-    if income:
+    if income_count:
         pdf.ln(5)
         pdf.set_font('DejaVu', '', 11)
         pdf.cell(0, 8, f"Łączna kwota przychodów: {income_summary:.2f} PLN", ln=1)
         
-        # Create income table
-        income_headers = ["Data", "Kwota (PLN)", "Opis"]
-        income_widths = [40, 40, 110]
-        
-        pdf.table_header(income_headers, income_widths)
-        
-        # Sort income by date
-        sorted_income = sorted(income, key=lambda x: x['date'])
-        
-        for entry in sorted_income:
-            note = entry.get('note', '')
-            if not note:
-                note = "-"
-                
-            pdf.table_row([
-                entry['date'],
-                entry['amount'],
-                note
-            ], income_widths)
+        if income_count > threshold:
+            pdf.cell(0, 8, f"Liczba przychodów: {income_count} - przedstawiono sumy dzienne.", ln=1)
+            pdf.table(DAILY_TABLE, (
+                (day, str(count), total) for day, count, total in _daily_subtotals(income_rows())
+            ))
+        else:
+            pdf.table(INCOME_TABLE, (
+                (entry['date'], entry['amount'], entry.get('note', '') or "-")
+                for entry in income_rows()
+            ))
     else:
         pdf.cell(0, 10, "Brak zarejestrowanych przychodów w wybranym okresie.", ln=1)
     
+    report_progress(40)
+    
     # Expenses detailed section
     pdf.add_page()
     pdf.section_title("3. Szczegóły wydatków")
     
     # Expenses details table
-    if spending:
+    if spending_count:
         pdf.ln(5)
         pdf.set_font('DejaVu', '', 11)
         pdf.cell(0, 8, f"Łączna kwota wydatków: {spending_summary:.2f} PLN", ln=1)
         
-        # Create expenses table
-        expense_headers = ["Data", "Kategoria", "Nazwa", "Kwota (PLN)"]
-        expense_widths = [30, 50, 70, 40]
-        
-        pdf.table_header(expense_headers, expense_widths)
-        
-        # Sort expenses by date
-        sorted_spending = sorted(spending, key=lambda x: x['date'])
-        
-        for entry in sorted_spending:
-            pdf.table_row([
-                entry['date'],
-                entry.get('category', 'Brak kategorii'),
-                entry.get('name', ''),
-                entry['amount']
-            ], expense_widths)
+        if spending_count > threshold:
+            pdf.cell(0, 8, f"Liczba wydatków: {spending_count} - przedstawiono sumy według kategorii i dni.", ln=1)
+            pdf.table(CATEGORY_TABLE, (
+                (category, str(count), total)
+                for category, (count, total) in sorted(spending_by_category.items(), key=lambda x: -x[1][1])
+            ))
+            pdf.ln(5)
+            pdf.table(DAILY_TABLE, (
+                (day, str(count), total) for day, count, total in _daily_subtotals(spending_rows())
+            ))
+        else:
+            pdf.table(EXPENSE_TABLE, (
+                (entry['date'], entry.get('category', 'Brak kategorii'), entry.get('name', ''), entry['amount'])
+                for entry in spending_rows()
+            ))
     else:
         pdf.cell(0, 10, "Brak zarejestrowanych wydatków w wybranym okresie.", ln=1)
 
-    # Create output directory if it doesn't exist
-    output_dir = Path(__file__).parent.parent / 'output'
-    output_dir.mkdir(exist_ok=True)
+    report_progress(80)
     
-    # Generate the PDF file
-    output_path = output_dir / f"raport_budzetowy_{month}_{year}_user{user_id}.pdf"
+    return pdf
+
+
+def generate_pdf(month, year, user_id=1, progress=None, spending=None, income=None, detail_threshold=None):
+    """Generate a PDF report with financial data
+    
+    Args:
+        month (int): Month number (1-12)
+        year (int): Year
+        user_id (int, optional): User ID
+        progress (callable, optional): Called with a completion percentage (0-100)
+            as the report is built
+        spending (list, optional): Pre-fetched expenses of the month; streamed
+            from the repository when omitted
+        income (list, optional): Pre-fetched incomes of the month; streamed
+            from the repository when omitted
+        detail_threshold (int, optional): Maximum number of detail rows per
+            section before subtotals are used (default: REPORT_DETAIL_THRESHOLD)
+        
+    Returns:
+        str: Path to the generated PDF file
+    """
+    logger.info(f"Generating report for month {month}, year {year}, user {user_id}")
+    
+    # Fetch financial data
+    spending_source, income_source = report_sources(month, year, user_id)
+    spending = spending_source if spending is None else spending
+    income = income_source if income is None else income
+    
+    # Reuse the cached file when the report's data has not changed
     try:
-        # Use a try/except block to catch and handle encoding errors
-        pdf.output(str(output_path), 'F')  # 'F' means output to file
-    except UnicodeEncodeError as e:
-        logger.error(f"Encoding error during PDF generation: {e}")
-        # If encoding fails, try with a different approach
-        pdf_content = pdf.output(dest='S').encode('latin-1', 'ignore')  # 'S' returns string
-        with open(output_path, 'wb') as f:
-            f.write(pdf_content)
+        version = monthly_report_version(month, year, spending, income, detail_threshold)
+    except Exception as e:
+        logger.error(f"Error fetching financial data: {e}")
+        raise
+    filename = f"raport_budzetowy_{month}_{year}_user{user_id}_{version[:12]}.pdf"
+    cached_path = cached_report_path(filename)
+    if cached_path is not None:
+        logger.info(f"Report served from cache: {cached_path}")
+        return str(cached_path)
     
-    logger.info(f"Report generated: {output_path}")
-    return str(output_path)
+    pdf = render_monthly_report(month, year, spending, income, progress, detail_threshold)
+
+    # Generate the PDF file
+    return write_report_pdf(pdf, filename)
+
+
+def summarize_year(months):
+    """Aggregate per-month transactions into yearly totals
+    
+    Args:
+        months (dict): Month number (1-12) mapped to a dict with 'spending'
+            and 'income' lists for that month
+        
+    Returns:
+        dict: Per-month totals, per-category expense totals and yearly totals
+    """
+    monthly = []
+    categories = {}
+    for month in range(1, 13):
+        data = months.get(month, {})
+        income_total = sum(i['amount'] for i in data.get('income', []))
+        spending_total = 0
+        for entry in data.get('spending', []):
+            spending_total += entry['amount']
+            category = entry.get('category', 'Brak kategorii')
+            categories[category] = categories.get(category, 0) + entry['amount']
+        monthly.append({
+            'month': month,
+            'income': income_total,
+            'spending': spending_total,
+            'balance': income_total - spending_total
+        })
+    
+    income_total = sum(m['income'] for m in monthly)
+    spending_total = sum(m['spending'] for m in monthly)
+    return {
+        'monthly': monthly,
+        'categories': categories,
+        'income': income_total,
+        'spending': spending_total,
+        'balance': income_total - spending_total
+    }
+
+
+def generate_annual_pdf(year, user_id, months):
+    """Generate a yearly summary report from already grouped monthly data
+    
+    Args:
+        year (int): Year
+        user_id (int): User ID
+        months (dict): Month number (1-12) mapped to a dict with 'spending'
+            and 'income' lists for that month
+        
+    Returns:
+        str: Path to the generated PDF file
+    """
+    logger.info(f"Generating annual report for year {year}, user {user_id}")
+    
+    version = report_version('annual', year, months)
+    filename = f"raport_roczny_{year}_user{user_id}_{version[:12]}.pdf"
+    cached_path = cached_report_path(filename)
+    if cached_path is not None:
+        logger.info(f"Report served from cache: {cached_path}")
+        return str(cached_path)
+    
+    summary = summarize_year(months)
+    
+    pdf = create_report_pdf(f"Raport Budżetu Domowego - {year}")
+    pdf.add_page()
+    
+    # Main title
+    pdf.set_font('DejaVu', 'B', 16)
+    pdf.cell(0, 10, "Roczny Raport Budżetu Domowego", ln=True, align='C')
+    pdf.set_font('DejaVu', 'B', 14)
+    pdf.cell(0, 10, str(year), ln=True, align='C')
+    pdf.ln(10)
+    
+    # Yearly summary section
+    pdf.section_title("1. Podsumowanie roku")
+    for label, value in (("Przychody:", summary['income']),
+                         ("Wydatki:", summary['spending']),
+                         ("Bilans:", summary['balance'])):
+        pdf.set_font('DejaVu', 'B', 11)
+        pdf.cell(40, 8, label, 0, 0)
+        if label == "Bilans:":
+            if value >= 0:
+                pdf.set_text_color(0, 128, 0)  # Green for positive balance
+            else:
+                pdf.set_text_color(255, 0, 0)  # Red for negative balance
+        pdf.set_font('DejaVu', '', 11)
+        pdf.cell(60, 8, f"{value:.2f} PLN", 0, 1)
+        pdf.set_text_color(0, 0, 0)
+    
+    # Month by month table
+    pdf.section_title("2. Zestawienie miesięczne")
+    pdf.table((["Miesiąc", "Przychody (PLN)", "Wydatki (PLN)", "Bilans (PLN)"], [50, 45, 45, 50]), (
+        (calendar.month_name[row['month']], row['income'], row['spending'], row['balance'])
+        for row in summary['monthly']
+    ))
+    
+    # Expenses by category
+    pdf.add_page()
+    pdf.section_title("3. Wydatki według kategorii")
+    if summary['categories']:
+        pdf.table((["Kategoria", "Kwota (PLN)"], [120, 70]),
+                  sorted(summary['categories'].items(), key=lambda x: -x[1]))
+    else:
+        pdf.cell(0, 10, "Brak zarejestrowanych wydatków w wybranym roku.", ln=1)
+    
+    return write_report_pdf(pdf, filename)
 
 
 if __name__ == "__main__":
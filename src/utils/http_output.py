@@ -0,0 +1,149 @@
+"""
+Output layer of the API: fast JSON serialization and response compression.
+
+OrjsonProvider serializes JSON responses with orjson when it is installed,
+producing the same JSON as Flask's default provider (sorted keys, compact
+separators, Flask's handling of dates and other types) several times
+faster; without orjson, or for values orjson rejects, the default provider
+is used.
+
+compress_response negotiates Content-Encoding for compressible responses
+above COMPRESS_MIN_BYTES: brotli when the client accepts it and the brotli
+package is installed, gzip otherwise. Streamed responses (event streams,
+files) are left alone.
+
+    python benchmarks/json_output.py   # serialization time and payload sizes
+"""
+import os
+import gzip
+import logging
+from typing import Any
+
+from flask import Flask, Response, request
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Configure logger
+logger = logging.getLogger(__name__)
+
+# Constants
+COMPRESS_MIN_BYTES = int(os.environ.get("COMPRESS_MIN_BYTES", "1024"))
+COMPRESS_GZIP_LEVEL = int(os.environ.get("COMPRESS_GZIP_LEVEL", "6"))
+COMPRESS_BROTLI_QUALITY = int(os.environ.get("COMPRESS_BROTLI_QUALITY", "5"))
+COMPRESSIBLE_MIMETYPES = {
+    "application/json", "application/javascript", "text/html", "text/css",
+    "text/plain", "text/csv", "text/javascript", "image/svg+xml"
+}
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    JSON provider serializing with orjson, falling back to the stdlib json
+    of DefaultJSONProvider when orjson is missing or rejects a value.
+    """
+
+    def _orjson_options(self, indent: bool) -> int:
+        # Dates go through Flask's default() so they keep its HTTP date format
+        options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        if indent:
+            options |= orjson.OPT_INDENT_2
+        return options
+
+    def dumps_bytes(self, obj: Any, indent: bool = False) -> bytes:
+        """
+        Serialize to UTF-8 JSON bytes.
+
+        Args:
+            obj: Value to serialize
+            indent: Indent with two spaces instead of compact output
+
+        Returns:
+            bytes: JSON document
+        """
+        if orjson is not None:
+            try:
+                return orjson.dumps(obj, default=self.default, option=self._orjson_options(indent))
+            except TypeError as e:
+                logger.debug(f"orjson could not serialize the value, using json: {e}")
+        kwargs = {"indent": 2} if indent else {"separators": (",", ":")}
+        return super().dumps(obj, **kwargs).encode("utf-8")
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if orjson is not None and set(kwargs) <= {"indent", "separators"}:
+            return self.dumps_bytes(obj, indent=bool(kwargs.get("indent"))).decode("utf-8")
+        return super().dumps(obj, **kwargs)
+
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        return self._app.response_class(self.dumps_bytes(obj, indent) + b"\n", mimetype=self.mimetype)
+
+
+def _choose_encoding() -> str:
+    accepted = request.accept_encodings
+    if brotli is not None and accepted["br"] and accepted["br"] >= accepted["gzip"]:
+        return "br"
+    if accepted["gzip"]:
+        return "gzip"
+    return ""
+
+
+def compress_response(response: Response) -> Response:
+    """
+    Compress a response body if the client accepts it and it is worth it.
+
+    Args:
+        response: Response about to be sent
+
+    Returns:
+        The same response, compressed when applicable
+    """
+    if (response.direct_passthrough or response.is_streamed
+            or response.status_code < 200 or response.status_code >= 300 or response.status_code == 204
+            or "Content-Encoding" in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+
+    response.vary.add("Accept-Encoding")
+    encoding = _choose_encoding()
+    if not encoding:
+        return response
+    data = response.get_data()
+    if len(data) < COMPRESS_MIN_BYTES:
+        return response
+
+    if encoding == "br":
+        body = brotli.compress(data, quality=COMPRESS_BROTLI_QUALITY)
+    else:
+        body = gzip.compress(data, compresslevel=COMPRESS_GZIP_LEVEL, mtime=0)
+    response.set_data(body)
+    response.headers["Content-Encoding"] = encoding
+    # The compressed body is a different representation of the same data
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def init_output(app: Flask) -> None:
+    """
+    Install the JSON provider and response compression on an app.
+
+    Args:
+        app: Flask application
+    """
+    app.json = OrjsonProvider(app)
+    app.after_request(compress_response)
+    logger.info(f"JSON serialization: {'orjson' if orjson is not None else 'json'}; "
+                f"compression: {'br, gzip' if brotli is not None else 'gzip'}")
@@ -0,0 +1,173 @@
+"""
+Admission control for expensive API endpoints.
+
+A RequestLimit combines two checks that run before a view does any work:
+
+- a token bucket per client (the user of the session token, otherwise the
+  remote address) that allows short bursts and a steady request rate;
+- a bounded semaphore on the number of requests of the limit in progress
+  at once, shared by all clients.
+
+A request that fails either check is answered with 429 Too Many Requests
+and a Retry-After header right away, so retry loops against bcrypt or PDF
+rendering cannot take all request threads and cheap endpoints keep their
+latency.
+"""
+import os
+import math
+import time
+import logging
+import threading
+from collections import OrderedDict
+from functools import wraps
+from typing import Callable, Optional, Tuple
+
+from flask import g, jsonify, request
+
+# Configure logger
+logger = logging.getLogger(__name__)
+
+# Constants
+MAX_TRACKED_CLIENTS = 10000
+AUTH_RATE_PER_MINUTE = float(os.environ.get("AUTH_RATE_PER_MINUTE", "10"))
+AUTH_CONCURRENCY = int(os.environ.get("AUTH_CONCURRENCY", "4"))
+REPORT_RATE_PER_MINUTE = float(os.environ.get("REPORT_RATE_PER_MINUTE", "12"))
+REPORT_CONCURRENCY = int(os.environ.get("REPORT_CONCURRENCY", "2"))
+
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at a fixed rate.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        """
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum number of tokens (the burst size)
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def take(self, cost: float = 1.0) -> float:
+        """
+        Take tokens if enough are available.
+
+        Returns:
+            float: 0 if the tokens were taken, otherwise seconds until they
+                will be available
+        """
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return 0.0
+        return (cost - self.tokens) / self.rate
+
+
+def client_key() -> str:
+    """
+    Key of the client of the current request: its token's user, otherwise its address.
+    """
+    user_id = g.get('token_user_id')
+    if user_id is not None:
+        return f"user:{user_id}"
+    return f"ip:{request.remote_addr}"
+
+
+class RequestLimit:
+    """
+    Rate and concurrency limit shared by the views it decorates.
+    """
+
+    def __init__(self, name: str, per_minute: float, burst: int, concurrency: int):
+        """
+        Args:
+            name: Name used in logs
+            per_minute: Sustained requests per minute per client
+            burst: Requests a client can make at once before being limited
+            concurrency: Requests of this limit in progress at once, for all clients
+        """
+        self.name = name
+        self.rate = per_minute / 60.0
+        self.burst = burst
+        self.concurrency = concurrency
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(concurrency)
+
+    def _wait_time(self, key: str) -> float:
+        with self._lock:
+            bucket = self._buckets.pop(key, None)
+            if bucket is None:
+                bucket = TokenBucket(self.rate, self.burst)
+            # Most recently used last; the least recently used clients are forgotten
+            self._buckets[key] = bucket
+            if len(self._buckets) > MAX_TRACKED_CLIENTS:
+                self._buckets.popitem(last=False)
+            return bucket.take()
+
+    def acquire(self, key: str) -> Optional[Tuple[float, str]]:
+        """
+        Admit a request of a client; an admitted request holds a slot until
+        release() is called.
+
+        Args:
+            key: Client key, see client_key()
+
+        Returns:
+            None if the request may run, otherwise (seconds to wait, message)
+        """
+        wait = self._wait_time(key)
+        if wait > 0:
+            logger.warning(f"Rate limit '{self.name}' exceeded by {key}")
+            return wait, "Too many requests, try again later"
+        if not self._slots.acquire(blocking=False):
+            logger.warning(f"Limit '{self.name}' at capacity ({self.concurrency} in progress)")
+            return 1.0, "Server busy, try again later"
+        return None
+
+    def release(self) -> None:
+        """
+        Free the slot of a request admitted by acquire().
+        """
+        self._slots.release()
+
+    def _admit(self) -> Tuple[bool, object]:
+        """
+        Returns:
+            (True, None) if the request may run and holds a slot, otherwise
+            (False, 429 response)
+        """
+        refused = self.acquire(client_key())
+        if refused is not None:
+            return False, self._too_many(*refused)
+        return True, None
+
+    @staticmethod
+    def _too_many(wait: float, message: str):
+        response = jsonify({"success": False, "message": message})
+        response.status_code = 429
+        response.headers['Retry-After'] = str(max(1, math.ceil(wait)))
+        return response
+
+    def __call__(self, view: Callable) -> Callable:
+        @wraps(view)
+        def limited(*args, **kwargs):
+            admitted, response = self._admit()
+            if not admitted:
+                return response
+            try:
+                return view(*args, **kwargs)
+            finally:
+                self.release()
+        return limited
+
+
+# Login and registration (bcrypt)
+auth_limit = RequestLimit("auth", AUTH_RATE_PER_MINUTE, burst=5, concurrency=AUTH_CONCURRENCY)
+# Report generation (PDF layout)
+report_limit = RequestLimit("reports", REPORT_RATE_PER_MINUTE, burst=5, concurrency=REPORT_CONCURRENCY)
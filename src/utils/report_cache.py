@@ -0,0 +1,167 @@
+"""
+Versioning and on-disk caching of generated PDF reports.
+
+A report's version is a digest of the data it is rendered from, so it works
+both as an HTTP ETag for streamed reports and as part of the cached file
+name: a report whose data did not change is served from disk instead of
+being rendered again, and reports of different data never overwrite each
+other. The output directory is kept bounded by age and total size; files
+pinned by finished report jobs are kept until their pin expires, so a
+report_url handed to a client stays downloadable.
+"""
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Configure logger
+logger = logging.getLogger(__name__)
+
+# Constants
+OUTPUT_DIR = Path(__file__).parent.parent / 'output'
+CACHE_MAX_BYTES = int(float(os.environ.get("REPORT_CACHE_MAX_MB", "100")) * 1024 * 1024)
+CACHE_MAX_AGE_SECONDS = int(float(os.environ.get("REPORT_CACHE_MAX_AGE_HOURS", str(7 * 24))) * 3600)
+CACHED_REPORT_PATTERNS = ("raport_budzetowy_*.pdf", "raport_roczny_*.pdf")
+
+# Bump when the report layout changes so cached files are not reused
+LAYOUT_VERSION = 1
+
+# Report file name -> time until which it must not be evicted
+_pinned: Dict[str, float] = {}
+_pinned_lock = threading.Lock()
+
+
+def report_version(*parts: Any) -> str:
+    """
+    Compute the version of a report from the data it is rendered from.
+
+    Args:
+        parts: JSON-serializable values the report depends on
+
+    Returns:
+        str: Hex digest identifying this exact report content
+    """
+    payload = json.dumps([LAYOUT_VERSION, parts], sort_keys=True, default=str, separators=(',', ':'))
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def rows_version(header: Any, *row_sources: Iterable[Dict]) -> str:
+    """
+    Compute a report version incrementally from streams of rows.
+
+    Args:
+        header: JSON-serializable parameters of the report
+        row_sources: Iterables of rows the report is rendered from
+
+    Returns:
+        str: Hex digest identifying this exact report content
+    """
+    digest = hashlib.sha1(json.dumps([LAYOUT_VERSION, header], sort_keys=True, default=str).encode('utf-8'))
+    for rows in row_sources:
+        digest.update(b'\x1e')  # Separate the streams so rows cannot shift between them
+        for row in rows:
+            digest.update(json.dumps(row, sort_keys=True, default=str, separators=(',', ':')).encode('utf-8'))
+            digest.update(b'\n')
+    return digest.hexdigest()
+
+
+def cached_report_path(filename: str, directory: Optional[Path] = None) -> Optional[Path]:
+    """
+    Return the path of a cached report if it exists, marking it as recently used.
+
+    Args:
+        filename: Report file name
+        directory: Cache directory (default: src/output)
+
+    Returns:
+        Path to the cached file or None on a cache miss
+    """
+    path = Path(directory or OUTPUT_DIR) / filename
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        return None
+    return path
+
+
+def pin_report(filename: str, seconds: float) -> None:
+    """
+    Keep a report file out of cache eviction for a while.
+
+    Args:
+        filename: Report file name
+        seconds: How long the file must stay
+    """
+    with _pinned_lock:
+        _pinned[filename] = max(_pinned.get(filename, 0), time.time() + seconds)
+
+
+def _pinned_files() -> set:
+    """
+    Names of the currently pinned files, forgetting expired pins.
+    """
+    now = time.time()
+    with _pinned_lock:
+        for filename in [name for name, until in _pinned.items() if until <= now]:
+            del _pinned[filename]
+        return set(_pinned)
+
+
+def _cached_files(directory: Path) -> List[Tuple[Path, os.stat_result]]:
+    files = []
+    for pattern in CACHED_REPORT_PATTERNS:
+        for path in directory.glob(pattern):
+            try:
+                files.append((path, path.stat()))
+            except FileNotFoundError:
+                continue
+    return files
+
+
+def prune_report_cache(
+    directory: Optional[Path] = None,
+    max_bytes: Optional[int] = None,
+    max_age_seconds: Optional[int] = None
+) -> int:
+    """
+    Evict generated reports older than the age limit, then the least recently
+    used ones until the total size fits the size limit. Pinned reports are
+    never evicted.
+
+    Args:
+        directory: Cache directory (default: src/output)
+        max_bytes: Size limit (default: REPORT_CACHE_MAX_MB)
+        max_age_seconds: Age limit (default: REPORT_CACHE_MAX_AGE_HOURS)
+
+    Returns:
+        int: Number of files removed
+    """
+    directory = Path(directory or OUTPUT_DIR)
+    max_bytes = CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    max_age_seconds = CACHE_MAX_AGE_SECONDS if max_age_seconds is None else max_age_seconds
+
+    files = sorted(_cached_files(directory), key=lambda item: item[1].st_mtime)
+    cutoff = time.time() - max_age_seconds
+    total = sum(stat.st_size for _, stat in files)
+    pinned = _pinned_files()
+    removed = 0
+
+    for path, stat in files:
+        if stat.st_mtime >= cutoff and total <= max_bytes:
+            break
+        if path.name in pinned:
+            continue
+        try:
+            path.unlink()
+            removed += 1
+        except FileNotFoundError:
+            pass  # Already removed by a concurrent prune
+        total -= stat.st_size
+
+    if removed:
+        logger.info(f"Evicted {removed} cached report(s) from {directory}")
+    return removed
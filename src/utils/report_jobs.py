@@ -0,0 +1,219 @@
+"""
+Background PDF report generation.
+
+Reports are rendered on a small worker pool, so the request thread only
+enqueues a job and returns its ID. Identical requests (same user, month
+and year, or the same yearly batch) that arrive while a job is still queued
+or running share that job.
+"""
+import os
+import time
+import uuid
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+from src.utils.generate_pdf import generate_pdf
+from src.utils.batch_reports import generate_batch
+from src.utils.report_cache import pin_report, prune_report_cache
+
+# Configure logger
+logger = logging.getLogger(__name__)
+
+# Constants
+REPORT_WORKERS = int(os.environ.get("REPORT_WORKERS", "2"))
+# Worker processes of one batch job (the command line uses all cores)
+BATCH_REPORT_WORKERS = int(os.environ.get("BATCH_REPORT_WORKERS", "2"))
+JOB_TTL_SECONDS = 60 * 60  # Finished jobs are forgotten after an hour
+
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+_executor = ThreadPoolExecutor(max_workers=REPORT_WORKERS, thread_name_prefix="report")
+_jobs: Dict[str, Dict] = {}
+_inflight: Dict[Tuple, str] = {}
+_lock = threading.Lock()
+
+
+def _prune_finished_jobs() -> None:
+    """
+    Drop finished jobs older than JOB_TTL_SECONDS. Caller must hold _lock.
+    """
+    cutoff = time.time() - JOB_TTL_SECONDS
+    expired = [job_id for job_id, job in _jobs.items()
+               if job['finished_at'] is not None and job['finished_at'] < cutoff]
+    for job_id in expired:
+        del _jobs[job_id]
+
+
+def _set_progress(job_id: str, progress: int) -> None:
+    with _lock:
+        job = _jobs.get(job_id)
+        if job:
+            job['progress'] = progress
+
+
+def _report_entry(path: str) -> Dict:
+    filename = os.path.basename(path)
+    return {'report_file': filename, 'report_url': f"/download_report/{filename}"}
+
+
+def _run_job(job_id: str, key: Tuple, render: Callable[[Callable[[int], None]], Union[str, List[str]]]) -> None:
+    """
+    Render the report(s) for a queued job and record the outcome.
+
+    Args:
+        job_id: ID of the job to run
+        key: Deduplication key of the job
+        render: Called with a progress callback, returns the path of the
+            generated file or a list of paths for batch jobs
+    """
+    with _lock:
+        job = _jobs[job_id]
+        job['status'] = STATUS_RUNNING
+        job['started_at'] = time.time()
+
+    try:
+        result = render(lambda value: _set_progress(job_id, value))
+        paths = result if isinstance(result, list) else [result]
+        reports = [_report_entry(path) for path in paths]
+        # The files must outlive the job that hands out their URLs; the cache
+        # is pruned only here, in the server process that holds the pins
+        for report in reports:
+            pin_report(report['report_file'], JOB_TTL_SECONDS)
+        prune_report_cache()
+        with _lock:
+            job.update({
+                'status': STATUS_DONE,
+                'progress': 100,
+                'reports': reports
+            })
+            # The last file is the main one: the monthly report, or the annual summary of a batch
+            if reports:
+                job.update(reports[-1])
+        logger.info(f"Report job {job_id} finished: {len(reports)} file(s)")
+    except Exception as e:
+        logger.error(f"Report job {job_id} failed: {e}")
+        with _lock:
+            job.update({'status': STATUS_FAILED, 'error': str(e)})
+    finally:
+        with _lock:
+            job['finished_at'] = time.time()
+            _inflight.pop(key, None)
+
+
+def _submit(key: Tuple, user_id: int, fields: Dict,
+            render: Callable[[Callable[[int], None]], Union[str, List[str]]]) -> Dict:
+    """
+    Enqueue a job unless one with the same key is already queued or running.
+
+    Returns:
+        dict: Snapshot of the new or existing job
+    """
+    with _lock:
+        _prune_finished_jobs()
+
+        job_id = _inflight.get(key)
+        if job_id is not None:
+            logger.info(f"Report job {job_id} already in progress, reusing it")
+            return dict(_jobs[job_id])
+
+        job_id = uuid.uuid4().hex
+        job = {
+            'id': job_id,
+            'user_id': int(user_id),
+            'status': STATUS_QUEUED,
+            'progress': 0,
+            'report_file': None,
+            'report_url': None,
+            'reports': [],
+            'error': None,
+            'created_at': time.time(),
+            'started_at': None,
+            'finished_at': None
+        }
+        job.update(fields)
+        _jobs[job_id] = job
+        _inflight[key] = job_id
+        snapshot = dict(job)
+
+    _executor.submit(_run_job, job_id, key, render)
+    return snapshot
+
+
+def submit_report(month: int, year: int, user_id: int = 1) -> Dict:
+    """
+    Enqueue generation of a monthly PDF report.
+
+    If an identical report is already queued or running, the existing job
+    is returned instead of starting a new one.
+
+    Args:
+        month: Month (1-12)
+        year: Year
+        user_id: User identifier (default: 1)
+
+    Returns:
+        dict: Snapshot of the job
+
+    Raises:
+        ValueError: If month is out of range
+    """
+    if not 1 <= int(month) <= 12:
+        raise ValueError("Invalid month")
+
+    month, year, user_id = int(month), int(year), int(user_id)
+    job = _submit(('month', user_id, year, month), user_id,
+                  {'kind': 'month', 'month': month, 'year': year},
+                  lambda progress: generate_pdf(month, year, user_id, progress=progress))
+    logger.info(f"Report job {job['id']} queued for month {month}, year {year}, user {user_id}")
+    return job
+
+
+def submit_batch(year: int, user_id: int = 1, months: Optional[Iterable[int]] = None) -> Dict:
+    """
+    Enqueue generation of several monthly reports plus the annual summary.
+
+    Args:
+        year: Year
+        user_id: User identifier (default: 1)
+        months: Months to render (default: 1-12)
+
+    Returns:
+        dict: Snapshot of the job
+
+    Raises:
+        ValueError: If a month is out of range
+    """
+    months = sorted({int(month) for month in months}) if months else list(range(1, 13))
+    if any(not 1 <= month <= 12 for month in months):
+        raise ValueError("Invalid month")
+
+    year, user_id = int(year), int(user_id)
+    job = _submit(('batch', user_id, year, tuple(months)), user_id,
+                  {'kind': 'batch', 'month': None, 'year': year, 'months': months},
+                  lambda progress: generate_batch(year, [user_id], months, workers=BATCH_REPORT_WORKERS,
+                                                 progress=progress))
+    logger.info(f"Batch report job {job['id']} queued for year {year}, user {user_id}")
+    return job
+
+
+def get_job(job_id: str, user_id: Optional[int] = None) -> Optional[Dict]:
+    """
+    Get the current state of a report job.
+
+    Args:
+        job_id: Job identifier
+        user_id: If given, only return the job when it belongs to this user
+
+    Returns:
+        dict: Snapshot of the job or None if not found
+    """
+    with _lock:
+        job = _jobs.get(job_id)
+        if job is None or (user_id is not None and job['user_id'] != int(user_id)):
+            return None
+        return dict(job)
@@ -0,0 +1,247 @@
+"""
+Fingerprinted static assets with long-lived cache headers.
+
+asset_path(folder, "css/style.css") returns "/assets/css/style.<hash>.css",
+where <hash> is a prefix of the SHA-256 of the file's content (templates
+call it as asset_url("css/style.css")). Since the URL
+changes whenever the content does, responses for it can be cached for a
+year and marked immutable: browsers and the webview stop revalidating
+the stylesheet, scripts and icons on every page load. Digests are cached
+per file and recomputed only when its mtime or size changes.
+
+A request for a fingerprint that no longer matches the file (a page
+rendered before a deploy) still gets the current content, but with a
+revalidating Cache-Control instead of the immutable one.
+
+send_asset serves a precompressed sibling (<file>.br or <file>.gz) when
+the client accepts its encoding and it is at least as new as the file.
+The siblings are written by:
+
+    python -m src.utils.static_assets [static folder]
+"""
+import os
+import re
+import sys
+import gzip
+import hashlib
+import mimetypes
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from flask import Response, request, send_from_directory
+from werkzeug.security import safe_join
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Configure logger
+logger = logging.getLogger(__name__)
+
+# Constants
+ASSETS_URL_PREFIX = "/assets"
+FINGERPRINT_LENGTH = 12
+IMMUTABLE_MAX_AGE = int(os.environ.get("STATIC_IMMUTABLE_MAX_AGE", str(365 * 24 * 3600)))
+REVALIDATE_CACHE_CONTROL = "public, no-cache"
+PRECOMPRESS_SUFFIXES = (".css", ".js", ".svg", ".ico", ".ttf", ".json", ".txt")
+# Encoding -> suffix of the precompressed sibling, in order of preference
+PRECOMPRESSED = (("br", ".br"), ("gzip", ".gz"))
+
+_FINGERPRINTED = re.compile(rf"^(?P<stem>.+)\.(?P<digest>[0-9a-f]{{{FINGERPRINT_LENGTH}}})(?P<ext>\.[^./]+)?$")
+
+# (folder, relative path) -> (mtime_ns, size, digest)
+_digests: Dict[Tuple[str, str], Tuple[int, int, str]] = {}
+_digests_lock = threading.Lock()
+
+
+def fingerprint(folder: str, filename: str) -> Optional[str]:
+    """
+    Content digest of a static file.
+
+    Args:
+        folder: Static folder
+        filename: Path of the file relative to the folder
+
+    Returns:
+        str: First FINGERPRINT_LENGTH hex digits of the file's SHA-256, or
+            None if the file does not exist
+    """
+    path = safe_join(folder, filename)
+    if path is None:
+        return None
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    key = (folder, filename)
+    with _digests_lock:
+        cached = _digests.get(key)
+    if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+        return cached[2]
+
+    sha = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(65536), b""):
+            sha.update(chunk)
+    digest = sha.hexdigest()[:FINGERPRINT_LENGTH]
+    with _digests_lock:
+        _digests[key] = (stat.st_mtime_ns, stat.st_size, digest)
+    return digest
+
+
+def asset_path(folder: str, filename: str) -> str:
+    """
+    URL of a static file with its fingerprint.
+
+    Args:
+        folder: Static folder
+        filename: Path of the file relative to the folder, e.g. "css/style.css"
+
+    Returns:
+        str: "/assets/css/style.<hash>.css", or "/<filename>" (served
+            without fingerprint) if the file does not exist
+    """
+    filename = filename.lstrip("/")
+    digest = fingerprint(folder, filename)
+    if digest is None:
+        logger.warning(f"Static asset not found: {filename}")
+        return f"/{filename}"
+    stem, ext = os.path.splitext(filename)
+    return f"{ASSETS_URL_PREFIX}/{stem}.{digest}{ext}"
+
+
+def parse_fingerprinted(path: str) -> Optional[Tuple[str, str]]:
+    """
+    Split a fingerprinted path into the file name and the fingerprint.
+
+    Args:
+        path: Path under /assets, e.g. "css/style.<hash>.css"
+
+    Returns:
+        (filename, digest), e.g. ("css/style.css", "<hash>"), or None if
+        the path has no fingerprint
+    """
+    match = _FINGERPRINTED.match(path)
+    if match is None:
+        return None
+    return match.group("stem") + (match.group("ext") or ""), match.group("digest")
+
+
+def _precompressed_variants(folder: str, filename: str) -> List[Tuple[str, str]]:
+    """
+    Returns:
+        (Content-Encoding, file name) of the precompressed siblings of a
+        file that are at least as new as it, in order of preference
+    """
+    path = safe_join(folder, filename)
+    if path is None:
+        return []
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return []
+    variants = []
+    for encoding, suffix in PRECOMPRESSED:
+        try:
+            if os.stat(path + suffix).st_mtime_ns >= mtime:
+                variants.append((encoding, filename + suffix))
+        except OSError:
+            continue
+    return variants
+
+
+def send_asset(folder: str, filename: str, cache_control: str = REVALIDATE_CACHE_CONTROL,
+               mimetype: Optional[str] = None) -> Response:
+    """
+    Send a static file, or its precompressed sibling if the client accepts it.
+
+    Args:
+        folder: Static folder
+        filename: Path of the file relative to the folder
+        cache_control: Cache-Control header of the response
+        mimetype: Content type, guessed from the file name when omitted
+
+    Returns:
+        Response (404 if the file does not exist)
+    """
+    variants = _precompressed_variants(folder, filename)
+    accepted = request.accept_encodings
+    encoding, send_name = next(((e, name) for e, name in variants if accepted[e]), ("", filename))
+    if encoding:
+        # The content type is the original file's, not the sibling's
+        mimetype = mimetype or mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    response = send_from_directory(folder, send_name, mimetype=mimetype)
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    if variants:
+        response.vary.add("Accept-Encoding")
+    response.headers["Cache-Control"] = cache_control
+    return response
+
+
+def send_fingerprinted(folder: str, path: str) -> Response:
+    """
+    Send a file requested by its fingerprinted URL.
+
+    Args:
+        folder: Static folder
+        path: Path under /assets, e.g. "css/style.<hash>.css"
+
+    Returns:
+        Response, cacheable for IMMUTABLE_MAX_AGE seconds when the
+        fingerprint matches the file
+    """
+    parsed = parse_fingerprinted(path)
+    if parsed is None:
+        return send_asset(folder, path)
+    filename, digest = parsed
+    if fingerprint(folder, filename) != digest:
+        # Stale URL from a page rendered before the file changed
+        return send_asset(folder, filename)
+    return send_asset(folder, filename, f"public, max-age={IMMUTABLE_MAX_AGE}, immutable")
+
+
+def precompress(folder: str) -> int:
+    """
+    Write .gz (and .br, if brotli is installed) siblings of the compressible
+    static files whose sibling is missing or older than the file.
+
+    Args:
+        folder: Static folder
+
+    Returns:
+        int: Number of files written
+    """
+    written = 0
+    for root, _, files in os.walk(folder):
+        for name in files:
+            if not name.endswith(PRECOMPRESS_SUFFIXES):
+                continue
+            path = os.path.join(root, name)
+            with open(path, "rb") as file:
+                data = file.read()
+            compressors = [(".gz", lambda d: gzip.compress(d, compresslevel=9, mtime=0))]
+            if brotli is not None:
+                compressors.append((".br", lambda d: brotli.compress(d, quality=11)))
+            for suffix, compress in compressors:
+                target = path + suffix
+                if os.path.exists(target) and os.stat(target).st_mtime_ns >= os.stat(path).st_mtime_ns:
+                    continue
+                body = compress(data)
+                if len(body) >= len(data):
+                    continue
+                with open(target, "wb") as file:
+                    file.write(body)
+                written += 1
+                logger.info(f"Precompressed {os.path.relpath(target, folder)}: {len(data)} -> {len(body)} bytes")
+    return written
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    static_folder = sys.argv[1] if len(sys.argv) > 1 else os.path.join(
+        os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "static"
+    )
+    print(f"{precompress(static_folder)} files written")
@@ -0,0 +1,125 @@
+"""
+In-memory inverted index for searching records by words.
+
+Text is folded before tokenizing: case and diacritics are removed, so
+"Żabka", "zabka" and "ŻABKA" are the same word. Query words match every
+indexed word they are a prefix of; the distinct words are kept sorted, so
+a prefix maps to a contiguous range found by binary search.
+"""
+import re
+import bisect
+import unicodedata
+from typing import Dict, FrozenSet, Hashable, Iterable, List, Set
+
+# Letters that do not decompose into a base letter and a combining mark
+_FOLD_TABLE = str.maketrans({"ł": "l", "ø": "o", "đ": "d", "ß": "ss"})
+_WORD = re.compile(r"\w+")
+
+
+def fold_text(text: str) -> str:
+    """
+    Lower-case text and strip diacritics ("Żółć" -> "zolc").
+
+    Args:
+        text: Text to fold
+
+    Returns:
+        str: Folded text
+    """
+    decomposed = unicodedata.normalize("NFKD", text.casefold().translate(_FOLD_TABLE))
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into folded words.
+
+    Args:
+        text: Text to tokenize
+
+    Returns:
+        List of words
+    """
+    return _WORD.findall(fold_text(text or ""))
+
+
+class InvertedIndex:
+    """
+    Word -> record IDs index, updated one record at a time.
+    """
+
+    def __init__(self):
+        self.postings: Dict[str, Set[Hashable]] = {}
+        self.doc_words: Dict[Hashable, FrozenSet[str]] = {}
+        self._sorted_words: List[str] = []
+        self._sorted_dirty = False
+
+    def __len__(self) -> int:
+        return len(self.doc_words)
+
+    def add(self, doc_id: Hashable, text: str) -> None:
+        """
+        Index a record, replacing its previous text if it was indexed.
+
+        Args:
+            doc_id: Record ID
+            text: Searchable text of the record
+        """
+        self.remove(doc_id)
+        words = frozenset(tokenize(text))
+        self.doc_words[doc_id] = words
+        for word in words:
+            ids = self.postings.get(word)
+            if ids is None:
+                self.postings[word] = ids = set()
+                self._sorted_dirty = True
+            ids.add(doc_id)
+
+    def remove(self, doc_id: Hashable) -> None:
+        """
+        Drop a record from the index.
+
+        Args:
+            doc_id: Record ID
+        """
+        for word in self.doc_words.pop(doc_id, ()):
+            ids = self.postings[word]
+            ids.discard(doc_id)
+            if not ids:
+                del self.postings[word]
+                self._sorted_dirty = True
+
+    def _words_with_prefix(self, prefix: str) -> Iterable[str]:
+        if self._sorted_dirty:
+            self._sorted_words = sorted(self.postings)
+            self._sorted_dirty = False
+        words = self._sorted_words
+        position = bisect.bisect_left(words, prefix)
+        while position < len(words) and words[position].startswith(prefix):
+            yield words[position]
+            position += 1
+
+    def search(self, query: str, prefix: bool = True) -> Set[Hashable]:
+        """
+        Find records containing every word of the query.
+
+        Args:
+            query: Words to look for
+            prefix: Whether query words also match longer words ("zab" finds "Żabka")
+
+        Returns:
+            Set of matching record IDs; empty for a query without words
+        """
+        result = None
+        # Rarer-looking (longer) words first, so the intersection shrinks early
+        for word in sorted(set(tokenize(query)), key=len, reverse=True):
+            if prefix:
+                matches = set()
+                for indexed in self._words_with_prefix(word):
+                    matches |= self.postings[indexed]
+            else:
+                matches = self.postings.get(word, set())
+            result = matches if result is None else result & matches
+            if not result:
+                return set()
+        return set(result) if result else set()
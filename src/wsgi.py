@@ -0,0 +1,14 @@
+"""
+WSGI entry point: src.wsgi:application.
+
+Run it with a single worker process and several threads, e.g.
+"gunicorn --workers 1 --threads 8 src.wsgi:application"; see src/serve.py
+for why the data cannot be shared between worker processes.
+"""
+import os
+import sys
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.server import app as application
@@ -0,0 +1,40 @@
+import sys
+import os
+from unittest.mock import patch
+import pytest
+sys.path.append(os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+from src.repositories import finance_repository as fr
+from src.repositories import categories_repository as cr
+from src.repositories import recurring_repository as rr
+from src.utils import budget_alerts as ba
+
+# User whose data the repository tests create; it only ever lives in memory
+TEST_USER = 9999
+
+@pytest.fixture
+def test_user(request):
+    """
+    Keep TEST_USER in memory only.
+
+    Repository writes are patched out for the test, the user starts with no
+    spending or incomes, and its data and per-user caches are dropped
+    afterwards. Test classes use it with @pytest.mark.usefixtures("test_user");
+    the patched save functions are set on them as saved_finance and
+    saved_categories.
+    """
+    with patch.object(fr, 'save_finance_data') as saved_finance, \
+            patch.object(cr, 'save_categories_data') as saved_categories, \
+            patch.object(rr, 'save_recurring_data'):
+        fr.finance_data["users"][str(TEST_USER)] = {"spending": [], "incomes": []}
+        if request.instance is not None:
+            request.instance.saved_finance = saved_finance
+            request.instance.saved_categories = saved_categories
+        try:
+            yield TEST_USER
+        finally:
+            for data in (fr.finance_data, cr.categories_data, rr.recurring_data):
+                data["users"].pop(str(TEST_USER), None)
+            for cache in (fr._spending_indexes, fr._income_indexes, cr._category_indexes, rr._schedules):
+                cache.pop(str(TEST_USER), None)
+            for cache in (ba._contributions, ba._totals, ba._alerts):
+                cache.pop(TEST_USER, None)
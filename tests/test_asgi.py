@@ -0,0 +1,129 @@
+import unittest
+import sys
+import os
+import json
+import time
+import asyncio
+import threading
+import bcrypt
+from unittest.mock import patch
+import pytest
+sys.path.append(os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+from conftest import TEST_USER
+from src import asgi
+from src.repositories import finance_repository as fr
+from src.repositories import users_repository as ur
+from src.repositories import session_manager
+from src.repositories.session_manager import issue_token, verify_token
+from src.utils import event_stream
+from src.utils.event_hub import publish
+
+async def call(path, method="GET", headers=(), body=b"", query=b"", messages=None, disconnected=None):
+    """Run one request through the ASGI app and return the messages it sent"""
+    sent = [] if messages is None else messages
+    disconnected = disconnected or asyncio.Event()
+    received = []
+
+    async def receive():
+        if not received:
+            received.append(True)
+            return {"type": "http.request", "body": body, "more_body": False}
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+        if message["type"] == "http.response.body" and not message.get("more_body"):
+            disconnected.set()
+
+    scope = {"type": "http", "http_version": "1.1", "method": method, "path": path, "root_path": "",
+             "query_string": query, "client": ("10.0.0.1", 50000), "server": ("testserver", 80),
+             "headers": [(name.lower().encode(), value.encode()) for name, value in headers]}
+    await asgi.application(scope, receive, send)
+    return sent
+
+def response_of(messages):
+    start = messages[0]
+    headers = {name.decode(): value.decode() for name, value in start["headers"]}
+    body = b"".join(message.get("body", b"") for message in messages[1:])
+    return start["status"], headers, body
+
+@pytest.mark.usefixtures("test_user")
+class TestAsgi(unittest.TestCase):
+    def setUp(self):
+        fr.finance_data["users"][str(TEST_USER)]["spending"] = [
+            {"id": 1, "name": "Obiad", "currency": "PLN", "amount": 50.0, "categoryId": 5,
+             "date": "2025-04-01", "note": ""}
+        ]
+        self.auth = [("Authorization", f"Bearer {issue_token(TEST_USER)}")]
+
+    def test_other_requests_go_to_the_flask_app(self):
+        status, headers, body = response_of(asyncio.run(call("/api/categories", headers=self.auth)))
+        self.assertEqual(status, 200)
+        self.assertIn("etag", headers)
+        self.assertTrue(json.loads(body))
+        status, _, _ = response_of(asyncio.run(call("/api/categories", headers=[("Authorization", "Bearer x.y")])))
+        self.assertEqual(status, 401)
+
+    def test_flask_requests_run_concurrently(self):
+        async def both():
+            return await asyncio.gather(call("/api/categories", headers=self.auth),
+                                        call("/api/recurring", headers=self.auth))
+        threads = set()
+        real_wsgi_app = asgi.app.wsgi_app
+
+        def record(environ, start_response):
+            threads.add(threading.current_thread().name)
+            time.sleep(0.1)
+            return real_wsgi_app(environ, start_response)
+
+        with patch.object(asgi.app, "wsgi_app", record):
+            responses = asyncio.run(both())
+        self.assertEqual([response_of(messages)[0] for messages in responses], [200, 200])
+        self.assertEqual(len(threads), 2, "Each request runs on its own pool thread")
+
+    def test_login_awaits_the_password_check(self):
+        user = {"login": "asgi_test", "password": bcrypt.hashpw(b"tajne", bcrypt.gensalt(rounds=4)).decode(), "user_id": TEST_USER}
+        with patch.dict(ur.users_by_login, {"asgi_test": user}), patch.object(session_manager, "current_user_id", None):
+            body = json.dumps({"login": "asgi_test", "password": "tajne"}).encode()
+            status, _, content = response_of(asyncio.run(call("/api/login", "POST", body=body)))
+            self.assertEqual(status, 200)
+            self.assertEqual(verify_token(json.loads(content)["token"]), TEST_USER)
+            body = json.dumps({"login": "asgi_test", "password": "zle"}).encode()
+            self.assertEqual(response_of(asyncio.run(call("/api/login", "POST", body=body)))[0], 401)
+
+    def test_report_is_rendered_on_the_render_pool(self):
+        status, headers, content = response_of(asyncio.run(call("/api/reports/2025/4/pdf", headers=self.auth)))
+        self.assertEqual(status, 200)
+        self.assertEqual(headers["content-type"], "application/pdf")
+        self.assertTrue(content.startswith(b"%PDF"))
+        again = asyncio.run(call("/api/reports/2025/4/pdf", headers=self.auth + [("If-None-Match", headers["etag"])]))
+        self.assertEqual(response_of(again)[0], 304)
+        self.assertEqual(response_of(asyncio.run(call("/api/reports/2025/13/pdf", headers=self.auth)))[0], 400)
+
+    def test_event_stream_ends_when_the_client_goes_away(self):
+        async def stream():
+            messages = []
+            disconnected = asyncio.Event()
+            task = asyncio.ensure_future(call("/api/events", query=f"token={issue_token(TEST_USER)}".encode(),
+                                              messages=messages, disconnected=disconnected))
+            while len(messages) < 2:
+                await asyncio.sleep(0.01)
+            publish("finance.changed", {"user_id": TEST_USER + 1, "kind": "spending"})
+            publish("finance.changed", {"user_id": TEST_USER, "kind": "income"})
+            while len(messages) < 3:
+                await asyncio.sleep(0.01)
+            disconnected.set()
+            await asyncio.wait_for(task, 1)
+            return messages
+
+        free_slots = event_stream._async_slots._value
+        messages = asyncio.run(stream())
+        self.assertEqual(messages[0]["status"], 200)
+        self.assertTrue(messages[1]["body"].startswith(b"retry:"))
+        self.assertTrue(messages[2]["body"].startswith(b"event: finance.changed\n"))
+        self.assertIn(b'"kind": "income"', messages[2]["body"])
+        self.assertEqual(event_stream._async_slots._value, free_slots, "The stream's slot is freed")
+
+if __name__ == '__main__':
+    unittest.main()
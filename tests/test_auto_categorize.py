@@ -0,0 +1,62 @@
+import unittest
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+from src.utils.auto_categorize import RuleSet, propose_rules
+from src.repositories.rules_repository import validate_rule
+
+RULES = [
+    {"id": 1, "type": "substring", "pattern": "uber", "categoryId": 1, "min_amount": None, "max_amount": 50},
+    {"id": 2, "type": "regex", "pattern": r"(biedronka|lidl)\s*(\d+)?", "categoryId": 5},
+    {"id": 3, "type": "substring", "pattern": "Uber Eats", "categoryId": 5},
+    {"id": 4, "type": "substring", "pattern": "apteka", "categoryId": 2},
+]
+
+class TestAutoCategorize(unittest.TestCase):
+    def setUp(self):
+        self.rules = RuleSet(RULES)
+
+    def category(self, text, amount=10.0):
+        rule = self.rules.match(text, amount)
+        return rule["categoryId"] if rule else None
+
+    def test_first_matching_rule_wins(self):
+        self.assertEqual(self.category("UBER EATS order"), 1)
+        self.assertEqual(self.category("Zakupy LIDL 123\\napteka"), 5)
+        self.assertEqual(self.category("Apteka Gemini"), 2)
+        self.assertIsNone(self.category("Kino"))
+
+    def test_amount_range_falls_back_to_later_rules(self):
+        self.assertEqual(self.category("UBER EATS order", amount=80.0), 5)
+        self.assertIsNone(self.category("uber trip", amount=80.0))
+
+    def test_rules_that_cannot_be_combined(self):
+        rules = RuleSet([
+            {"id": 1, "type": "regex", "pattern": "(?P<shop>zabka)", "categoryId": 5},
+            {"id": 2, "type": "substring", "pattern": "kino", "categoryId": 6},
+            {"id": 3, "type": "regex", "pattern": "(?i)biedronka", "categoryId": 5},
+            {"id": 4, "type": "regex", "pattern": "(?P<shop>orlen)", "categoryId": 1},
+        ])
+        self.assertIsNone(rules.combined)
+        self.assertEqual(rules.match("Kino i Biedronka", 10.0)["id"], 2)
+        self.assertEqual(rules.match("BIEDRONKA 12", 10.0)["id"], 3)
+        self.assertEqual(rules.match("Orlen, potem Żabka", 10.0)["id"], 4)
+        self.assertIsNone(rules.match("Apteka", 10.0))
+
+    def test_rule_fields_must_have_their_types(self):
+        rule = {"type": "substring", "pattern": "uber", "categoryId": 1}
+        validate_rule(dict(rule, min_amount=10, max_amount=50.5))
+        for invalid in ({"min_amount": True}, {"max_amount": False}, {"max_amount": "50"},
+                        {"min_amount": float("nan")}, {"categoryId": True}, {"categoryId": "1"}):
+            with self.assertRaises(ValueError, msg=invalid):
+                validate_rule(dict(rule, **invalid))
+
+    def test_proposals_from_history(self):
+        history = [{"name": f"Spotify {n}", "categoryId": 7} for n in range(4)]
+        history += [{"name": "Orlen", "categoryId": 1}, {"name": "Orlen", "categoryId": 4},
+                    {"name": "Orlen", "categoryId": 1}]
+        proposals = propose_rules(history, user_id=9999)
+        self.assertEqual([(p["pattern"], p["categoryId"]) for p in proposals], [("spotify", 7)])
+
+if __name__ == '__main__':
+    unittest.main()
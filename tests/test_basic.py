@@ -2,7 +2,8 @@ import unittest
 import sys
 import os
 sys.path.append(os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
-from src.repositories.users_repository import get_user_by_login, register
+from src.repositories import users_repository
+from src.repositories.users_repository import get_user_by_login, get_user_by_id, register, login, check_password
 
 class TestBasicFunctionality(unittest.TestCase):
     def setUp(self):
@@ -14,6 +15,12 @@ class TestBasicFunctionality(unittest.TestCase):
             "email": "test@example.com",
             "password": "password123"
         }
+        # Test users must not advance the persisted ID sequence
+        self.next_user_id = users_repository.users_data["next_user_id"]
+    
+    def tearDown(self):
+        users_repository.users_data["next_user_id"] = self.next_user_id
+        users_repository.save_users_data()
         
     def test_user_registration(self):
         # Check if test_user exists and delete if necessary
@@ -35,6 +42,34 @@ class TestBasicFunctionality(unittest.TestCase):
         # Cleanup
         from src.repositories.users_repository import delete_user
         delete_user("test_user")
+    def test_user_indexes_follow_mutations(self):
+        from src.repositories.users_repository import delete_user
+        if get_user_by_login("test_user"):
+            delete_user("test_user")
+            
+        register(self.test_user_data)
+        user = get_user_by_login("test_user")
+        self.assertIs(get_user_by_id(user["user_id"]), user, "User should be indexed by ID")
+        self.assertTrue(check_password("password123", user["password"]))
+        self.assertFalse(login("test_user", "wrong password"))
+        
+        delete_user("test_user")
+        self.assertIsNone(get_user_by_login("test_user"), "Deleted user should leave the login index")
+        self.assertIsNone(get_user_by_id(user["user_id"]), "Deleted user should leave the ID index")
+    def test_deleted_user_id_is_not_reused(self):
+        from src.repositories.users_repository import delete_user
+        if get_user_by_login("test_user"):
+            delete_user("test_user")
+            
+        register(self.test_user_data)
+        first_id = get_user_by_login("test_user")["user_id"]
+        delete_user("test_user")
+        
+        register(self.test_user_data)
+        second_id = get_user_by_login("test_user")["user_id"]
+        delete_user("test_user")
+        
+        self.assertGreater(second_id, first_id, "A new registration should get a fresh ID")
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,50 @@
+import unittest
+import sys
+import os
+from unittest.mock import patch
+import pytest
+sys.path.append(os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+from conftest import TEST_USER
+from src.repositories import finance_repository as fr
+from src.utils import budget_alerts as ba
+from src.utils.event_hub import subscribe
+
+@pytest.mark.usefixtures("test_user")
+class TestBudgetAlerts(unittest.TestCase):
+    def setUp(self):
+        self.budgets = patch.object(ba, '_budgets', {"2025-4": {"Jedzenie": 100.0}})
+        self.budgets.start()
+        fr.finance_data["users"][str(TEST_USER)] = {"spending": [
+            {"id": 1, "name": "Obiad", "currency": "PLN", "amount": 50.0, "categoryId": 5,
+             "date": "2025-04-01", "note": ""}
+        ], "incomes": []}
+        self.events = []
+        self.unsubscribe = subscribe("budget.alert", lambda topic, alert: self.events.append(alert))
+
+    def tearDown(self):
+        self.unsubscribe()
+        self.budgets.stop()
+
+    def add(self, amount, date="2025-04-10"):
+        return fr.add_spending({"name": "Zakupy", "currency": "PLN", "amount": amount,
+                                "category": 5, "date": date}, TEST_USER)
+
+    def test_thresholds_raise_alerts_once(self):
+        self.add(20.0)
+        self.assertEqual(self.events, [])
+        expense = self.add(15.0)                       # 85%
+        self.assertEqual([alert['threshold'] for alert in self.events], [0.8])
+        self.add(1.0, date="2025-05-01")               # Other period
+        fr.update_spending(expense['id'], {"amount": 40.0}, TEST_USER)   # 110%
+        self.assertEqual([alert['threshold'] for alert in self.events], [0.8, 1.0])
+        self.add(5.0)                                  # Already over budget
+        self.assertEqual(len(ba.get_alerts(TEST_USER)), 2)
+        self.assertEqual(ba.get_alerts(TEST_USER, since_id=self.events[0]['id'])[0]['spent'], 110.0)
+
+    def test_status_follows_removals(self):
+        expense = self.add(30.0)
+        fr.remove_spending_by_id(expense['id'], TEST_USER)
+        self.assertEqual(ba.get_budget_status(4, 2025, TEST_USER)[0]['spent'], 50.0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import unittest
+import sys
+import os
+from unittest.mock import patch
+import pytest
+sys.path.append(os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+from conftest import TEST_USER
+from src.repositories import categories_repository as cr
+from src.repositories import finance_repository as fr
+
+@pytest.mark.usefixtures("test_user")
+class TestCategoryIndex(unittest.TestCase):
+    def setUp(self):
+        cr.categories_data["users"][str(TEST_USER)] = {
+            "categories": [{"id": 1, "name": "Transport"}, {"id": 2, "name": "Jedzenie"}]
+        }
+
+    def test_index_follows_mutations(self):
+        version = cr.get_categories_version(TEST_USER)
+        new_id = cr.add_category("Kino", TEST_USER)
+        self.assertEqual(new_id, 3)
+        self.assertEqual(cr.get_category_by_name("Kino", TEST_USER)["id"], 3)
+
+        renamed = []
+        with patch.object(cr, '_rename_listeners', [lambda *args: renamed.append(args)]):
+            self.assertTrue(cr.update_category_by_name("Kino", "Film", TEST_USER))
+        self.assertIsNone(cr.get_category_by_name("Kino", TEST_USER))
+        self.assertEqual(cr.get_category_by_id(3, TEST_USER)["name"], "Film")
+        self.assertEqual(renamed, [("Kino", "Film", TEST_USER)])
+
+        self.assertTrue(cr.remove_category_by_id(1, TEST_USER))
+        self.assertIsNone(cr.get_category_by_name("Transport", TEST_USER))
+        self.assertEqual(cr.get_categories_version(TEST_USER), version + 3)
+    def test_removed_category_ids_are_not_reused(self):
+        kino = cr.add_category("Kino", TEST_USER)
+        self.assertEqual(kino, 3)
+        fr.add_spending({"name": "x", "currency": "PLN", "amount": 1.0, "category": kino,
+                         "date": "2025-04-01"}, TEST_USER)
+        self.assertTrue(cr.remove_category(kino, TEST_USER))
+        self.assertEqual(cr.add_category("Teatr", TEST_USER), 4)
+        self.assertEqual(fr.get_all_spending(TEST_USER)[0]['category'], "Unknown")
+
+        # Data saved before the sequence existed starts after the IDs expenses use
+        fr.finance_data["users"][str(TEST_USER)]["spending"][0]["categoryId"] = 9
+        del cr.get_user_categories_data(TEST_USER)["next_category_id"]
+        self.assertEqual(cr.add_category("Opera", TEST_USER), 10)
+    def test_merge_moves_expenses(self):
+        cr.add_category("Kino", TEST_USER)
+        for category_id in (1, 3, 3, 2):
+            fr.add_spending({"name": "x", "currency": "PLN", "amount": 1.0,
+                             "category": category_id, "date": "2025-04-01"}, TEST_USER)
+
+        self.assertEqual(cr.merge_categories([1, 3], 2, TEST_USER), 3)
+        self.assertEqual(fr.save_finance_data.call_count, 5)  # 4 adds and one merge write
+        self.assertEqual(fr.get_spending_ids_by_category(2, TEST_USER), {1, 2, 3, 4})
+        self.assertNotIn("Unknown", [row['category'] for row in fr.get_all_spending(TEST_USER)])
+        self.assertIsNone(cr.get_category_by_id(1, TEST_USER))
+
+        with self.assertRaises(ValueError):
+            cr.remove_category(2, TEST_USER, reassign_to=1)
+    def test_subtree_rollups(self):
+        restaurants = cr.add_category("Restauracje", TEST_USER, parent_id=2)
+        groceries = cr.add_category("Zakupy spożywcze", TEST_USER, parent_id=2)
+        cafes = cr.add_category("Kawiarnie", TEST_USER, parent_id=restaurants)
+        for category_id, amount in ((cafes, 10.0), (restaurants, 20.0), (groceries, 5.0), (1, 7.0)):
+            fr.add_spending({"name": "x", "currency": "PLN", "amount": amount,
+                             "category": category_id, "date": "2025-04-01"}, TEST_USER)
+
+        self.assertEqual(cr.get_category_ancestors(cafes, TEST_USER), (cafes, restaurants, 2))
+        rollups = fr.get_month_category_rollups(4, 2025, TEST_USER)
+        self.assertEqual(rollups[2], {'spent': 0.0, 'total': 35.0})
+        self.assertEqual(rollups[restaurants], {'spent': 20.0, 'total': 30.0})
+        self.assertEqual(rollups[1]['total'], 7.0)
+
+        with self.assertRaises(ValueError):
+            cr.set_category_parent(2, cafes, TEST_USER)
+        cr.remove_category_by_id(restaurants, TEST_USER)
+        self.assertEqual(cr.get_category_ancestors(cafes, TEST_USER), (cafes, 2))
+
+if __name__ == '__main__':
+    unittest.main()
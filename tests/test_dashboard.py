@@ -0,0 +1,57 @@
+import unittest
+import sys
+import os
+from datetime import date, timedelta
+from unittest.mock import patch
+import pytest
+sys.path.append(os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+from conftest import TEST_USER
+from src.repositories import finance_repository as fr
+from src.repositories.session_manager import issue_token
+from src import server
+from src.server import app
+
+@pytest.mark.usefixtures("test_user")
+class TestDashboard(unittest.TestCase):
+    def setUp(self):
+        today = date.today()
+        days = [today, today.replace(day=1), today - timedelta(days=29), today - timedelta(days=30),
+                today - timedelta(days=400)]
+        fr.finance_data["users"][str(TEST_USER)] = {
+            "spending": [{"id": i, "name": f"Wydatek {i}", "currency": "PLN", "amount": 10.0 * i,
+                          "categoryId": 5, "date": day.isoformat(), "note": ""}
+                         for i, day in enumerate(days, 1)],
+            "incomes": [{"id": i, "amount": 100.0 * i, "currency": "PLN", "date": day.isoformat(), "note": ""}
+                        for i, day in enumerate(days, 1)]
+        }
+        self.client = app.test_client()
+        self.headers = {"Authorization": f"Bearer {issue_token(TEST_USER)}"}
+
+    def get(self, url):
+        return self.client.get(url, headers=self.headers).get_json()
+
+    def test_dashboard_matches_separate_endpoints(self):
+        dashboard = self.get("/api/dashboard")
+        self.assertTrue(dashboard["success"])
+        self.assertEqual(dashboard["incomes_total"], self.get("/api/incomes/this_month")["total"])
+        self.assertEqual(dashboard["incomes"], self.get("/api/incomes/this_month/list")["incomes"])
+        self.assertEqual(dashboard["expenses"], self.get("/api/expenses/this_month/list")["expenses"])
+        self.assertEqual(dashboard["expenses_last_30_days"], self.get("/api/expenses/last_30_days")["total"])
+        self.assertEqual(dashboard["categories"], self.get("/api/categories")["categories"])
+
+    def test_unchanged_dashboard_is_not_modified(self):
+        first = self.client.get("/api/dashboard", headers=self.headers)
+        etag = first.headers["ETag"]
+        with patch.object(server, 'get_dashboard_summary') as summary:
+            again = self.client.get("/api/dashboard", headers=dict(self.headers, **{"If-None-Match": etag}))
+            summary.assert_not_called()
+        self.assertEqual(again.status_code, 304)
+
+        fr.add_spending({"name": "Kawa", "currency": "PLN", "amount": 12.0, "category": 5,
+                         "date": date.today().isoformat()}, TEST_USER)
+        changed = self.client.get("/api/dashboard", headers=dict(self.headers, **{"If-None-Match": etag}))
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed.headers["ETag"], etag)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,39 @@
+import unittest
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+from conftest import TEST_USER
+from src.utils import event_stream
+from src.utils.event_hub import publish
+
+class TestEventStream(unittest.TestCase):
+    def test_stream_yields_only_its_users_events(self):
+        stream = event_stream.open_stream(TEST_USER)
+        messages = iter(stream)
+        try:
+            self.assertTrue(next(messages).startswith("retry:"))
+            publish("finance.changed", {"user_id": TEST_USER + 1, "kind": "spending"})
+            publish("finance.changed", {"user_id": TEST_USER, "kind": "income"})
+            message = next(messages)
+            self.assertTrue(message.startswith("event: finance.changed\n"))
+            self.assertIn('"kind": "income"', message)
+        finally:
+            stream.close()
+
+    def test_streams_are_limited(self):
+        streams = []
+        try:
+            for _ in range(event_stream.EVENTS_MAX_STREAMS):
+                streams.append(event_stream.open_stream(TEST_USER))
+            self.assertNotIn(None, streams)
+            self.assertIsNone(event_stream.open_stream(TEST_USER))
+            streams.pop().close()
+            streams.append(event_stream.open_stream(TEST_USER))
+            self.assertIsNotNone(streams[-1], "Closing a stream frees its slot")
+        finally:
+            for stream in streams:
+                if stream is not None:
+                    stream.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+import unittest
+import sys
+import os
+import pytest
+sys.path.append(os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+from conftest import TEST_USER
+from src.repositories import finance_repository as fr
+
+@pytest.mark.usefixtures("test_user")
+class TestFinanceBatch(unittest.TestCase):
+    def setUp(self):
+        fr.finance_data["users"][str(TEST_USER)] = {"spending": [
+            {"id": i, "name": f"Wydatek {i}", "currency": "PLN", "amount": 10.0, "categoryId": 5,
+             "date": "2025-04-01", "note": ""} for i in range(1, 6)
+        ], "incomes": [{"id": 1, "amount": 100.0, "currency": "PLN", "date": "2025-04-01", "note": ""}]}
+
+    def test_mixed_operations_are_applied_with_one_write(self):
+        results = fr.apply_spending_batch([
+            {"op": "delete", "id": 2},
+            {"op": "delete", "id": 3},
+            {"op": "update", "id": 4, "data": {"amount": 12.5, "category": 1}},
+            {"op": "create", "data": {"name": "Kawa", "amount": 9, "category": 5, "date": "2025-04-02"}}
+        ], TEST_USER)
+        self.assertEqual(self.saved_finance.call_count, 1)
+        self.assertEqual([result["id"] for result in results], [2, 3, 4, 6])
+        self.assertEqual(results[2]["record"]["categoryId"], 1)
+        self.assertEqual(results[2]["record"]["amount"], 12.5)
+        self.assertEqual(sorted(fr.get_spending_ids_by_category(5, TEST_USER)), [1, 5, 6])
+        self.assertIsNone(fr.get_spending_by_id(2, TEST_USER))
+
+    def test_invalid_batch_applies_nothing(self):
+        before = [dict(row) for row in fr.get_user_finance_data(TEST_USER)["spending"]]
+        with self.assertRaises(fr.BatchError) as raised:
+            fr.apply_spending_batch([
+                {"op": "delete", "id": 1},
+                {"op": "update", "id": 1, "data": {"amount": 1}},
+                {"op": "create", "data": {"name": "Kawa", "amount": 9, "category": 5, "date": "2025-13-02"}},
+                {"op": "update", "id": 5, "data": {"colour": "red"}}
+            ], TEST_USER)
+        self.assertEqual([error["index"] for error in raised.exception.errors], [1, 2, 3])
+        self.assertEqual(fr.get_user_finance_data(TEST_USER)["spending"], before)
+        self.saved_finance.assert_not_called()
+
+    def test_values_of_the_wrong_type_are_rejected(self):
+        invalid = [{"name": None}, {"name": {"a": 1}}, {"amount": True}, {"amount": "12.5"},
+                   {"amount": float("nan")}, {"amount": float("inf")}, {"amount": None},
+                   {"category": 5.9}, {"category": "5"}, {"note": None}, {"date": None}]
+        with self.assertRaises(fr.BatchError) as raised:
+            fr.apply_spending_batch([{"op": "update", "id": 1, "data": data} for data in invalid], TEST_USER)
+        self.assertEqual(len(raised.exception.errors), len(invalid))
+        with self.assertRaises(fr.BatchError):
+            fr.apply_income_batch([{"op": "create", "data": {"amount": "nan", "date": "2025-04-03"}}], TEST_USER)
+        self.saved_finance.assert_not_called()
+
+    def test_ids_must_be_integers(self):
+        with self.assertRaises(fr.BatchError) as raised:
+            fr.apply_spending_batch([{"op": "delete", "id": [1]}, {"op": "delete", "id": "1"},
+                                     {"op": "update", "id": True, "data": {"amount": 1}},
+                                     {"op": "delete"}], TEST_USER)
+        self.assertEqual([error["index"] for error in raised.exception.errors], [0, 1, 2, 3])
+        with self.assertRaises(fr.BatchError):
+            fr.apply_income_batch([{"op": "delete", "id": {"id": 1}}], TEST_USER)
+        self.saved_finance.assert_not_called()
+
+    def test_failed_save_restores_the_records(self):
+        spending = [dict(row) for row in fr.get_user_finance_data(TEST_USER)["spending"]]
+        incomes = [dict(row) for row in fr.get_user_finance_data(TEST_USER)["incomes"]]
+        version = fr.get_finance_version(TEST_USER)
+        self.saved_finance.side_effect = OSError("disk full")
+        with self.assertRaises(OSError):
+            fr.apply_spending_batch([
+                {"op": "update", "id": 2, "data": {"amount": 1, "category": 1}},
+                {"op": "delete", "id": 2},
+                {"op": "update", "id": 4, "data": {"note": "x"}},
+                {"op": "create", "data": {"name": "Kawa", "amount": 9, "category": 5, "date": "2025-04-02"}}
+            ], TEST_USER)
+        with self.assertRaises(OSError):
+            fr.apply_income_batch([{"op": "update", "id": 1, "data": {"amount": 5}},
+                                   {"op": "create", "data": {"amount": 50, "date": "2025-04-03"}}], TEST_USER)
+        data = fr.get_user_finance_data(TEST_USER)
+        self.assertEqual((data["spending"], data["incomes"]), (spending, incomes))
+        self.assertEqual(sorted(fr.get_spending_ids_by_category(5, TEST_USER)), [1, 2, 3, 4, 5])
+        self.assertEqual(fr.get_spending_by_id(2, TEST_USER)["amount"], 10.0)
+        self.assertIsNone(fr.get_income_by_id(2, TEST_USER))
+        self.assertEqual(fr.get_finance_version(TEST_USER), version)
+
+    def test_partial_update_changes_only_given_fields(self):
+        expense = fr.update_spending(3, {"category": 1, "note": "karta"}, TEST_USER)
+        self.assertEqual((expense["categoryId"], expense["note"], expense["amount"]), (1, "karta", 10.0))
+        self.assertNotIn(3, fr.get_spending_ids_by_category(5, TEST_USER))
+        self.assertEqual(self.saved_finance.call_count, 1)
+        with self.assertRaises(ValueError):
+            fr.update_spending(3, {"categoryId": 2}, TEST_USER)
+        self.assertIsNone(fr.update_spending(99, {"amount": 1}, TEST_USER))
+
+    def test_income_batch(self):
+        results = fr.apply_income_batch([
+            {"op": "create", "data": {"amount": 50, "date": "2025-04-03"}},
+            {"op": "delete", "id": 1}
+        ], TEST_USER)
+        self.assertEqual([result["id"] for result in results], [2, 1])
+        self.assertEqual([row["id"] for row in fr.get_user_finance_data(TEST_USER)["incomes"]], [2])
+        self.assertIsNone(fr.get_income_by_id(1, TEST_USER))
+        self.assertEqual(fr.update_income(2, {"note": "premia"}, TEST_USER)["note"], "premia")
+        self.assertTrue(fr.remove_income_by_id(2, TEST_USER))
+        self.assertIsNone(fr.update_income(2, {"note": "x"}, TEST_USER))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,42 @@
+import unittest
+import sys
+import os
+import gzip
+import json
+sys.path.append(os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+from flask import Flask, jsonify
+from src.utils.http_output import init_output, COMPRESS_MIN_BYTES
+
+class TestHttpOutput(unittest.TestCase):
+    def setUp(self):
+        app = Flask(__name__)
+        init_output(app)
+        self.rows = [{"id": i, "name": "Żabka", "amount": 12.5} for i in range(COMPRESS_MIN_BYTES)]
+
+        @app.route('/large')
+        def large():
+            response = jsonify({"expenses": self.rows})
+            response.set_etag("v1")
+            return response
+
+        @app.route('/small')
+        def small():
+            return jsonify({"success": True})
+
+        self.client = app.test_client()
+
+    def test_large_response_is_gzipped(self):
+        response = self.client.get('/large', headers={"Accept-Encoding": "gzip"})
+        self.assertEqual(response.headers["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response.headers["Vary"])
+        self.assertEqual(response.headers["ETag"], 'W/"v1"')
+        self.assertEqual(json.loads(gzip.decompress(response.data)), {"expenses": self.rows})
+
+    def test_small_or_unaccepted_responses_are_not_compressed(self):
+        self.assertNotIn("Content-Encoding", self.client.get('/small', headers={"Accept-Encoding": "gzip"}).headers)
+        response = self.client.get('/large')
+        self.assertNotIn("Content-Encoding", response.headers)
+        self.assertEqual(response.get_json(), {"expenses": self.rows})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,41 @@
+import unittest
+import sys
+import os
+import pytest
+sys.path.append(os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+from conftest import TEST_USER
+from src.repositories import finance_repository as fr
+from src.repositories.session_manager import issue_token
+from src.server import app
+
+@pytest.mark.usefixtures("test_user")
+class TestPatchApi(unittest.TestCase):
+    def setUp(self):
+        self.expense = {"id": 1, "name": "Obiad", "currency": "PLN", "amount": 50.0, "categoryId": 5,
+                        "date": "2025-04-01", "note": "karta"}
+        self.income = {"id": 1, "amount": 4000.0, "currency": "PLN", "date": "2025-04-10", "note": ""}
+        fr.finance_data["users"][str(TEST_USER)] = {"spending": [dict(self.expense)], "incomes": [dict(self.income)]}
+        self.client = app.test_client()
+        self.headers = {"Authorization": f"Bearer {issue_token(TEST_USER)}", "Content-Type": "application/json"}
+
+    def patch(self, url, body):
+        return self.client.patch(url, data=body, headers=self.headers)
+
+    def test_patch_changes_given_fields(self):
+        response = self.patch("/api/expenses/1", '{"amount": 12, "description": "gotówka"}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()["expense"], dict(self.expense, amount=12.0, note="gotówka"))
+        self.assertEqual(self.patch("/api/incomes/1", '{"amount": 4100.5}').get_json()["income"]["amount"], 4100.5)
+
+    def test_null_bool_and_non_finite_values_are_rejected(self):
+        for body in ('{"name": null}', '{"note": null}', '{"description": null}', '{"amount": true}',
+                     '{"amount": NaN}', '{"amount": Infinity}', '{"amount": "nan"}', '{"category": 5.9}'):
+            self.assertEqual(self.patch("/api/expenses/1", body).status_code, 400, body)
+        for body in ('{"note": null}', '{"amount": false}', '{"amount": -Infinity}', '{"date": null}'):
+            self.assertEqual(self.patch("/api/incomes/1", body).status_code, 400, body)
+        data = fr.get_user_finance_data(TEST_USER)
+        self.assertEqual((data["spending"], data["incomes"]), ([self.expense], [self.income]))
+        self.saved_finance.assert_not_called()
+
+if __name__ == '__main__':
+    unittest.main()
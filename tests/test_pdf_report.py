@@ -0,0 +1,75 @@
+import unittest
+import sys
+import os
+import fitz
+import pytest
+sys.path.append(os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+from conftest import TEST_USER
+from src.repositories import finance_repository as fr
+from src.utils.generate_pdf import FONT_FAMILY, CharSubset, create_report_pdf, render_monthly_report, pdf_to_bytes
+
+def page_texts(pdf):
+    with fitz.open(stream=pdf_to_bytes(pdf), filetype="pdf") as document:
+        return [page.get_text() for page in document]
+
+@pytest.mark.usefixtures("test_user")
+class TestPdfReport(unittest.TestCase):
+    def setUp(self):
+        fr.finance_data["users"][str(TEST_USER)] = {
+            "spending": [{"id": i, "name": f"Zakupy {i}", "currency": "PLN", "amount": 10.0, "categoryId": 5,
+                          "date": f"2025-04-{30 - i % 30:02d}", "note": ""} for i in range(1, 121)],
+            "incomes": [
+                {"id": 1, "amount": 100.0, "currency": "PLN", "date": "2025-04-20", "note": "premia"},
+                {"id": 2, "amount": 4000.0, "currency": "PLN", "date": "2025-04-10", "note": "wypłata"},
+                {"id": 3, "amount": 50.0, "currency": "PLN", "date": "2025-04-10", "note": ""},
+                {"id": 4, "amount": 70.0, "currency": "PLN", "date": "2025-05-01", "note": ""}
+            ]
+        }
+
+    def sources(self):
+        return (lambda: fr.iter_month_spending(4, 2025, TEST_USER),
+                lambda: fr.iter_month_income(4, 2025, TEST_USER))
+
+    def test_polish_text_through_the_font_subset(self):
+        pdf = create_report_pdf("Raport")
+        pdf.add_page()
+        pdf.set_font('DejaVu', '', 11)
+        for _ in range(50):
+            pdf.cell(0, 8, "Zażółć gęślą jaźń", ln=1)
+        subset = pdf.fonts[FONT_FAMILY]['subset']
+        self.assertIsInstance(subset, CharSubset)
+        self.assertEqual(len(subset), len(set(subset)))
+        self.assertIn(ord("ź"), subset)
+        self.assertEqual("".join(page_texts(pdf)).count("Zażółć gęślą jaźń"), 50)
+
+    def test_month_iterators_are_ordered_copies(self):
+        incomes = list(fr.iter_month_income(4, 2025, TEST_USER))
+        self.assertEqual([row["id"] for row in incomes], [2, 3, 1])
+        incomes[0]["amount"] = 0
+        spending = list(fr.iter_month_spending(4, 2025, TEST_USER))
+        self.assertEqual(len(spending), 120)
+        self.assertEqual([row["date"] for row in spending], sorted(row["date"] for row in spending))
+        self.assertNotIn("categoryId", spending[0])
+        self.assertEqual(fr.get_income_by_id(2, TEST_USER)["amount"], 4000.0)
+
+    def test_detail_tables_repeat_headers_on_every_page(self):
+        pages = page_texts(render_monthly_report(4, 2025, *self.sources()))
+        self.assertIn("wypłata", pages[1])
+        expense_pages = pages[2:]
+        self.assertGreater(len(expense_pages), 2)
+        for text in expense_pages:
+            self.assertIn("Kategoria", text)
+        self.assertEqual(sum(text.count("Zakupy ") for text in expense_pages), 120)
+
+    def test_large_sections_collapse_into_subtotals(self):
+        pages = page_texts(render_monthly_report(4, 2025, *self.sources(), detail_threshold=2))
+        self.assertIn("Liczba przychodów: 3", pages[1])
+        self.assertNotIn("wypłata", pages[1])
+        # 2025-04-10: two incomes; counts are integers, amounts have decimals
+        self.assertIn("2025-04-10\n2\n4050.00", pages[1])
+        self.assertNotIn("2.00", pages[1])
+        self.assertIn("Liczba wydatków: 120", pages[2])
+        self.assertNotIn("Zakupy 1", "".join(pages[2:]))
+
+if __name__ == '__main__':
+    unittest.main()
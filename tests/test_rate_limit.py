@@ -0,0 +1,46 @@
+import unittest
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+from flask import Flask, jsonify
+from src.utils.rate_limit import RequestLimit, TokenBucket
+
+class TestRateLimit(unittest.TestCase):
+    def setUp(self):
+        app = Flask(__name__)
+        self.limit = RequestLimit("test", per_minute=6, burst=2, concurrency=1)
+
+        @app.route('/expensive')
+        @self.limit
+        def expensive():
+            return jsonify({"success": True})
+
+        self.client = app.test_client()
+
+    def test_token_bucket_refills_at_its_rate(self):
+        bucket = TokenBucket(rate=1.0, capacity=1)
+        self.assertEqual(bucket.take(), 0.0)
+        self.assertGreater(bucket.take(), 0.9)
+        bucket.updated -= 1.0
+        self.assertEqual(bucket.take(), 0.0)
+
+    def test_burst_then_429_per_client(self):
+        codes = [self.client.get('/expensive').status_code for _ in range(3)]
+        self.assertEqual(codes, [200, 200, 429])
+        limited = self.client.get('/expensive')
+        self.assertEqual(int(limited.headers["Retry-After"]), 10)
+        other = self.client.get('/expensive', environ_base={"REMOTE_ADDR": "10.0.0.2"})
+        self.assertEqual(other.status_code, 200, "Each client has its own bucket")
+
+    def test_busy_when_all_slots_are_taken(self):
+        self.limit._slots.acquire()
+        try:
+            response = self.client.get('/expensive')
+            self.assertEqual(response.status_code, 429)
+            self.assertIn("Retry-After", response.headers)
+        finally:
+            self.limit._slots.release()
+        self.assertEqual(self.client.get('/expensive').status_code, 200)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import unittest
+import sys
+import os
+from datetime import date
+import pytest
+sys.path.append(os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+from conftest import TEST_USER
+from src.repositories import finance_repository as fr
+from src.repositories import recurring_repository as rr
+from src.repositories.session_manager import issue_token
+from src.server import app
+
+@pytest.mark.usefixtures("test_user")
+class TestRecurring(unittest.TestCase):
+    def test_next_occurrence(self):
+        start = date(2025, 1, 31)
+        monthly = {"freq": "monthly", "day": 31}
+        self.assertEqual(rr.next_occurrence(monthly, start, date(2025, 2, 1)), date(2025, 2, 28))
+        quarterly = {"freq": "monthly", "day": 10, "interval": 3}
+        self.assertEqual(rr.next_occurrence(quarterly, start, date(2025, 2, 1)), date(2025, 4, 10))
+        biweekly = {"freq": "weekly", "weekday": 4, "interval": 2}  # Fridays
+        self.assertEqual(rr.next_occurrence(biweekly, start, date(2025, 2, 1)), date(2025, 2, 14))
+        weekdays = {"freq": "cron", "cron": "* * 1-5"}
+        self.assertEqual(rr.next_occurrence(weekdays, start, date(2025, 2, 1)), date(2025, 2, 3))
+
+    def test_reads_materialize_due_transactions(self):
+        rr.add_recurring_rule({"kind": "spending", "start": "2025-01-01", "end": "2025-03-31",
+                               "schedule": {"freq": "monthly", "day": 10},
+                               "template": {"name": "Czynsz", "amount": 2000.0, "category": 8}}, TEST_USER)
+        rr.add_recurring_rule({"kind": "income", "start": "2025-01-01",
+                               "schedule": {"freq": "cron", "cron": "28 * *"},
+                               "template": {"amount": 8000.0, "note": "Wypłata"}}, TEST_USER)
+
+        february = fr.get_month_spending(2, 2025, TEST_USER)
+        self.assertEqual([row["date"] for row in february], ["2025-02-10"])
+        self.assertEqual(len(fr.get_user_finance_data(TEST_USER)["spending"]), 2)  # Nothing after February
+
+        self.assertEqual(len(fr.get_month_spending(12, 2025, TEST_USER)), 0)
+        self.assertEqual(len(fr.get_user_finance_data(TEST_USER)["spending"]), 3)  # Ended in March
+        self.assertEqual(rr.materialize_due(TEST_USER, "2025-12-31"), 0)
+        self.assertEqual(fr.get_month_income(6, 2025, TEST_USER)[0]["date"], "2025-06-28")
+
+    def test_invalid_templates_are_rejected(self):
+        client = app.test_client()
+        headers = {"Authorization": f"Bearer {issue_token(TEST_USER)}"}
+        rule = {"kind": "spending", "start": "2025-01-01", "schedule": {"freq": "weekly", "weekday": 0}}
+        for template in ({"name": "Czynsz", "amount": "abc", "category": 8},
+                         {"name": "Czynsz", "amount": 2000.0, "category": 999},
+                         {"name": None, "amount": 2000.0, "category": 8},
+                         {"name": "Czynsz", "amount": 2000.0, "category": 8, "date": "2025-01-01"}):
+            response = client.post("/api/recurring", json=dict(rule, template=template), headers=headers)
+            self.assertEqual(response.status_code, 400, template)
+        self.assertEqual(rr.get_recurring_rules(TEST_USER), [])
+        self.assertEqual(client.get("/api/expenses/last_30_days", headers=headers).status_code, 200)
+
+        created = rr.add_recurring_rule(dict(rule, template={"name": "Czynsz", "amount": 2000, "category": 8}),
+                                        TEST_USER)
+        self.assertEqual(created["template"], {"name": "Czynsz", "amount": 2000.0, "category": 8, "currency": "PLN"})
+
+if __name__ == '__main__':
+    unittest.main()
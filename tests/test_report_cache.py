@@ -0,0 +1,61 @@
+import unittest
+import sys
+import os
+import time
+import tempfile
+from pathlib import Path
+sys.path.append(os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+from src.utils.report_cache import report_version, cached_report_path, prune_report_cache, pin_report
+
+class TestReportCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def make_report(self, name, size, age):
+        path = self.dir / name
+        path.write_bytes(b"x" * size)
+        mtime = time.time() - age
+        os.utime(path, (mtime, mtime))
+        return path
+
+    def test_version_follows_data(self):
+        rows = [{"id": 1, "amount": 10.0, "date": "2025-04-01"}]
+        self.assertEqual(report_version('month', 4, 2025, rows), report_version('month', 4, 2025, list(rows)))
+        changed = [{"id": 1, "amount": 11.0, "date": "2025-04-01"}]
+        self.assertNotEqual(report_version('month', 4, 2025, rows), report_version('month', 4, 2025, changed))
+
+    def test_prune_by_age_then_size(self):
+        old = self.make_report("raport_budzetowy_1_2025_user1_a.pdf", 10, age=3600)
+        lru = self.make_report("raport_budzetowy_2_2025_user1_b.pdf", 10, age=30)
+        recent = self.make_report("raport_roczny_2025_user1_c.pdf", 10, age=10)
+        other = self.make_report("raport_1_2025.pdf", 10, age=7200)
+
+        removed = prune_report_cache(self.dir, max_bytes=10, max_age_seconds=60)
+
+        self.assertEqual(removed, 2)
+        self.assertFalse(old.exists())
+        self.assertFalse(lru.exists())
+        self.assertTrue(recent.exists())
+        self.assertTrue(other.exists(), "Files that are not generated reports are never evicted")
+
+    def test_pinned_reports_are_kept(self):
+        pinned = self.make_report("raport_budzetowy_1_2025_user1_p.pdf", 10, age=3600)
+        expired = self.make_report("raport_budzetowy_2_2025_user1_e.pdf", 10, age=3600)
+        pin_report(pinned.name, 60)
+        pin_report(expired.name, -1)
+        self.assertEqual(prune_report_cache(self.dir, max_bytes=0, max_age_seconds=60), 1)
+        self.assertTrue(pinned.exists())
+        self.assertFalse(expired.exists())
+
+    def test_cache_hit_refreshes_entry(self):
+        path = self.make_report("raport_budzetowy_1_2025_user1_a.pdf", 10, age=3600)
+        self.assertIsNone(cached_report_path("missing.pdf", self.dir))
+        self.assertEqual(cached_report_path(path.name, self.dir), path)
+        self.assertGreater(path.stat().st_mtime, time.time() - 60)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+import unittest
+import sys
+import os
+import time
+import threading
+from unittest import mock
+sys.path.append(os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+from src.utils import report_jobs, report_cache, batch_reports
+from src.utils.generate_pdf import summarize_year
+
+class TestReportJobs(unittest.TestCase):
+    def wait_for(self, job_id, timeout=5):
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            job = report_jobs.get_job(job_id)
+            if job['status'] in (report_jobs.STATUS_DONE, report_jobs.STATUS_FAILED):
+                return job
+            time.sleep(0.01)
+        self.fail("Report job did not finish in time")
+
+    def test_identical_requests_share_job(self):
+        release = threading.Event()
+
+        def slow_generate(month, year, user_id, progress=None):
+            release.wait(5)
+            return f"/tmp/raport_budzetowy_{month}_{year}_user{user_id}.pdf"
+
+        pinned_when_pruned = []
+        prune = lambda: pinned_when_pruned.append(report_cache._pinned_files())
+
+        with mock.patch.object(report_jobs, 'generate_pdf', side_effect=slow_generate) as generate, \
+                mock.patch.object(report_jobs, 'prune_report_cache', side_effect=prune):
+            first = report_jobs.submit_report(1, 2030, 99)
+            second = report_jobs.submit_report(1, 2030, 99)
+            self.assertEqual(first['id'], second['id'], "In-flight request should be reused")
+
+            release.set()
+            job = self.wait_for(first['id'])
+            self.assertEqual(job['status'], report_jobs.STATUS_DONE)
+            self.assertEqual(job['report_url'], "/download_report/raport_budzetowy_1_2030_user99.pdf")
+            self.assertIn("raport_budzetowy_1_2030_user99.pdf", report_cache._pinned_files())
+            # The cache is pruned by the job, after its file is pinned
+            self.assertIn("raport_budzetowy_1_2030_user99.pdf", pinned_when_pruned[0])
+            self.assertEqual(generate.call_count, 1)
+
+            # Once finished, a new request starts a new job
+            third = report_jobs.submit_report(1, 2030, 99)
+            self.assertNotEqual(third['id'], first['id'])
+            self.wait_for(third['id'])
+
+    def test_failed_job_reports_error(self):
+        with mock.patch.object(report_jobs, 'generate_pdf', side_effect=RuntimeError("boom")):
+            job = report_jobs.submit_report(2, 2030, 99)
+            job = self.wait_for(job['id'])
+        self.assertEqual(job['status'], report_jobs.STATUS_FAILED)
+        self.assertEqual(job['error'], "boom")
+
+    def test_job_hidden_from_other_users(self):
+        with mock.patch.object(report_jobs, 'generate_pdf', return_value="/tmp/r.pdf"), \
+                mock.patch.object(report_jobs, 'prune_report_cache'):
+            job = report_jobs.submit_report(3, 2030, 99)
+            self.wait_for(job['id'])
+        self.assertIsNone(report_jobs.get_job(job['id'], user_id=98))
+        self.assertIsNotNone(report_jobs.get_job(job['id'], user_id=99))
+
+    def test_batch_job_reports_progress(self):
+        halfway, release = threading.Event(), threading.Event()
+
+        def generate_batch(year, user_ids, months, workers=None, progress=None):
+            progress(50)
+            halfway.set()
+            release.wait(5)
+            return ["/tmp/raport_roczny_2030_user99.pdf"]
+
+        with mock.patch.object(report_jobs, 'generate_batch', side_effect=generate_batch), \
+                mock.patch.object(report_jobs, 'prune_report_cache'):
+            job = report_jobs.submit_batch(2030, 99, [1, 2])
+            self.assertTrue(halfway.wait(5))
+            self.assertEqual(report_jobs.get_job(job['id'])['progress'], 50)
+            release.set()
+            self.assertEqual(self.wait_for(job['id'])['progress'], 100)
+
+    def test_generate_batch_counts_finished_reports(self):
+        values = []
+        with mock.patch.object(batch_reports, 'build_snapshot', return_value={}), \
+                mock.patch.object(batch_reports, '_render', side_effect=lambda task: f"/tmp/{task[2]}.pdf"):
+            paths = batch_reports.generate_batch(2030, [99], [1, 2, 3], workers=1, progress=values.append)
+        self.assertEqual(paths, ["/tmp/1.pdf", "/tmp/2.pdf", "/tmp/3.pdf", "/tmp/None.pdf"])
+        self.assertEqual(values, [25, 50, 75, 100])
+
+class TestAnnualSummary(unittest.TestCase):
+    def test_summarize_year_aggregates_months(self):
+        months = {
+            1: {'spending': [{'amount': 100.0, 'category': 'Jedzenie'},
+                             {'amount': 50.0, 'category': 'Transport'}],
+                'income': [{'amount': 1000.0}]},
+            3: {'spending': [{'amount': 25.0, 'category': 'Jedzenie'}],
+                'income': []}
+        }
+        summary = summarize_year(months)
+        self.assertEqual(len(summary['monthly']), 12)
+        self.assertEqual(summary['monthly'][0]['balance'], 850.0)
+        self.assertEqual(summary['monthly'][2]['balance'], -25.0)
+        self.assertEqual(summary['categories'], {'Jedzenie': 125.0, 'Transport': 50.0})
+        self.assertEqual(summary['income'], 1000.0)
+        self.assertEqual(summary['spending'], 175.0)
+
+if __name__ == '__main__':
+    unittest.main()
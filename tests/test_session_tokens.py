@@ -0,0 +1,35 @@
+import unittest
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+from src.repositories.session_manager import issue_token, verify_token, revoke_token
+from src.server import app
+
+class TestSessionTokens(unittest.TestCase):
+    def test_valid_token_resolves_user(self):
+        token = issue_token(7)
+        self.assertEqual(verify_token(token), 7)
+
+    def test_tampered_token_is_rejected(self):
+        user_id, expires, nonce, signature = issue_token(7).split('.')
+        self.assertIsNone(verify_token(f"8.{expires}.{nonce}.{signature}"))
+        self.assertIsNone(verify_token("not-a-token"))
+        self.assertIsNone(verify_token(None))
+
+    def test_non_ascii_token_is_rejected(self):
+        self.assertIsNone(verify_token("1.2.3.éé"))
+        response = app.test_client().get("/api/expenses", headers={"Authorization": "Bearer 1.2.3.éé"})
+        self.assertEqual(response.status_code, 401)
+
+    def test_expired_token_is_rejected(self):
+        self.assertIsNone(verify_token(issue_token(7, ttl=-1)))
+
+    def test_revoked_token_is_rejected(self):
+        token = issue_token(7)
+        other = issue_token(7)
+        self.assertTrue(revoke_token(token))
+        self.assertIsNone(verify_token(token))
+        self.assertEqual(verify_token(other), 7, "Revoking one token keeps the user's other tokens")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import unittest
+import sys
+import os
+import gzip
+import shutil
+import tempfile
+sys.path.append(os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+from flask import Flask
+from src.utils.static_assets import asset_path, parse_fingerprinted, send_asset, send_fingerprinted
+
+class TestStaticAssets(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.folder, "css"))
+        self.css = b"body { margin: 0; }\n" * 100
+        self.write("css/style.css", self.css)
+
+        app = Flask(__name__)
+
+        @app.route('/assets/<path:filename>')
+        def fingerprinted(filename):
+            return send_fingerprinted(self.folder, filename)
+
+        @app.route('/<path:filename>')
+        def plain(filename):
+            return send_asset(self.folder, filename)
+
+        self.client = app.test_client()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def write(self, filename, data):
+        with open(os.path.join(self.folder, filename), "wb") as file:
+            file.write(data)
+
+    def test_url_changes_with_content(self):
+        url = asset_path(self.folder, "css/style.css")
+        self.assertRegex(url, r"^/assets/css/style\.[0-9a-f]{12}\.css$")
+        self.assertEqual(parse_fingerprinted(url[len("/assets/"):])[0], "css/style.css")
+        self.write("css/style.css", b"body { margin: 1px; }\n")
+        self.assertNotEqual(asset_path(self.folder, "css/style.css"), url)
+        self.assertEqual(asset_path(self.folder, "missing.js"), "/missing.js")
+
+    def test_fingerprinted_url_is_immutable(self):
+        url = asset_path(self.folder, "css/style.css")
+        response = self.client.get(url)
+        self.assertEqual(response.data, self.css)
+        self.assertIn("immutable", response.headers["Cache-Control"])
+        self.assertEqual(self.client.get("/css/style.css").headers["Cache-Control"], "public, no-cache")
+        # A stale fingerprint still gets the file, but revalidated
+        self.write("css/style.css", b"body { margin: 1px; }\n")
+        response = self.client.get(url)
+        self.assertEqual(response.data, b"body { margin: 1px; }\n")
+        self.assertNotIn("immutable", response.headers["Cache-Control"])
+
+    def test_precompressed_variant(self):
+        self.write("css/style.css.gz", gzip.compress(self.css))
+        response = self.client.get("/css/style.css", headers={"Accept-Encoding": "gzip"})
+        self.assertEqual(response.headers["Content-Encoding"], "gzip")
+        self.assertEqual(response.mimetype, "text/css")
+        self.assertIn("Accept-Encoding", response.headers["Vary"])
+        self.assertEqual(gzip.decompress(response.data), self.css)
+        response = self.client.get("/css/style.css")
+        self.assertNotIn("Content-Encoding", response.headers)
+        self.assertEqual(response.data, self.css)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,33 @@
+import unittest
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+from src.utils.text_index import InvertedIndex, fold_text
+
+class TestTextIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = InvertedIndex()
+        self.index.add(1, "Żabka zakupy")
+        self.index.add(2, "Zakupy spożywcze Biedronka")
+        self.index.add(3, "Bilet miesięczny ZTM")
+
+    def test_folding(self):
+        self.assertEqual(fold_text("Żółć Łódź"), "zolc lodz")
+
+    def test_prefix_and_conjunction(self):
+        self.assertEqual(self.index.search("zab"), {1})
+        self.assertEqual(self.index.search("ZAKUPY"), {1, 2})
+        self.assertEqual(self.index.search("zakupy spoz"), {2})
+        self.assertEqual(self.index.search("zak", prefix=False), set())
+        self.assertEqual(self.index.search("   "), set())
+
+    def test_incremental_updates(self):
+        self.index.add(1, "Stacja paliw")
+        self.index.remove(3)
+        self.assertEqual(self.index.search("zakupy"), {2})
+        self.assertEqual(self.index.search("paliw"), {1})
+        self.assertEqual(self.index.search("bilet"), set())
+        self.assertNotIn("bilet", self.index.postings)
+
+if __name__ == '__main__':
+    unittest.main()